@@ -81,7 +81,9 @@ function App() {
         try {
           const response = await axios.post('/api/summarize', {
             ...apiPayload,
-            model_type: 'bart'
+            model_type: 'bart',
+            // The server only echoes the article text back when asked; we need it for URLs
+            ...(inputType === 'url' ? { include: ['original_text'] } : {})
           });
           
           resultData = {
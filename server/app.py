@@ -1,4 +1,4 @@
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, Response, stream_with_context, g, url_for
 try:
     from flask_cors import CORS
 except ImportError:
@@ -7,31 +7,189 @@ except ImportError:
     class CORS:
         def __init__(self, app=None):
             pass
-import json
+import os
+import time
 import logging
-from summarizer import generate_summary
-from credibility import analyze_credibility
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from summarizer import generate_summary_details, stream_summary, get_batcher_stats, get_model_status, is_ready
+from budget import check_options, clamp_max_length, latency
+from preprocess import prepare
+from credibility import analyze_credibility, analyze_credibility_sentences, analyze_credibility_batch
 from url_processor import extract_article_from_url, is_valid_url
+from cache import get_cache_stats, make_key
+from url_cache import get_article_cache, canonicalize_url
+from dedup import get_dedup_index
+from jobs import JobQueue, JobQueueFullError, JOBS_DB_PATH
+from singleflight import get_group, get_singleflight_stats
+from model_pool import get_pool_client, PoolError
+from responses import install_json_provider, requested_fields, wants, shape, compress_response
+import metrics
 
 # Configure logging
 logging.basicConfig(level=logging.INFO,
                    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Limits for the batch endpoint
+BATCH_MAX_ITEMS = int(os.environ.get("BATCH_MAX_ITEMS", "1000"))
+BATCH_MAX_WORKERS = int(os.environ.get("BATCH_MAX_WORKERS", "8"))
+
 # Initialize Flask app
 app = Flask(__name__)
 CORS(app)  # Enable CORS for all routes
+install_json_provider(app)
+
+@app.before_request
+def start_timing():
+    g.request_started = time.perf_counter()
+    g.timing_token = metrics.begin_request()
+
+@app.after_request
+def finish_timing(response):
+    """Record the request duration and attach the per-stage breakdown as a Server-Timing header"""
+    if 'request_started' in g:
+        endpoint = request.url_rule.rule if request.url_rule else "unmatched"
+        metrics.REQUEST_DURATION.observe(time.perf_counter() - g.request_started, endpoint=endpoint,
+                                         method=request.method, status=response.status_code)
+        if metrics.SERVER_TIMING_HEADER and not response.is_streamed:
+            header = metrics.server_timing_header()
+            if header:
+                response.headers['Server-Timing'] = header
+    return response
+
+@app.before_request
+def start_job_workers():
+    # Queued jobs (including ones left from before a restart) run once the process serves its first request
+    if job_queue is not None:
+        job_queue.start()
+
+@app.after_request
+def compress(response):
+    """Compress buffered responses for clients that accept gzip or brotli"""
+    return compress_response(response, request.accept_encodings)
+
+@app.teardown_request
+def end_timing(exc=None):
+    if 'timing_token' in g:
+        metrics.end_request(g.pop('timing_token'))
+
+def with_timings(payload, data):
+    """Add the per-stage timing breakdown to a response payload when the request asks for debug output"""
+    if data and data.get('debug'):
+        return dict(payload, timings=metrics.request_timings())
+    return payload
+
+# Concurrent requests for the same URL or text share one extraction / summary
+extract_flight = get_group("extract")
+summary_flight = get_group("summary")
+
+def extract_article(url):
+    """extract_article_from_url, shared with concurrent requests for the same canonical URL"""
+    article_data, _ = extract_flight.do(canonicalize_url(url), extract_article_from_url, url)
+    # Each caller gets its own copy of the shared result
+    return dict(article_data)
+
+def summarize_text(text, model_type="bart", max_length=150, long_document=None, quality=None, deadline_ms=None):
+    """generate_summary_details, shared with concurrent requests for the same text and settings"""
+    text = prepare(text)
+    key = make_key(text.raw, model_type=model_type, max_length=max_length, long_document=long_document,
+                   quality=quality, deadline_ms=deadline_ms)
+    details, _ = summary_flight.do(key, generate_summary_details, text, model_type=model_type,
+                                   max_length=max_length, long_document=long_document, quality=quality,
+                                   deadline_ms=deadline_ms)
+    # Each caller gets its own copy of the shared generation details
+    return dict(details, generation=dict(details['generation']))
+
+def generation_options(data):
+    """
+    Read and validate the summary length and latency budget of a request
+    
+    Returns:
+        dict: max_length, quality and deadline_ms arguments for summarize_text
+    
+    Raises:
+        ValueError: If one of them is invalid
+    """
+    quality, deadline_ms = check_options(data.get('quality'), data.get('deadline_ms'))
+    return {"max_length": clamp_max_length(data.get('max_length', 150)), "quality": quality,
+            "deadline_ms": deadline_ms}
+
+def collect_runtime_metrics():
+    """Gauges for the batcher, result caches and article cache, sampled at scrape time"""
+    samples = []
+    batcher = get_batcher_stats()
+    for name in ("queue_depth", "max_queue_depth", "batches", "items", "rejected", "errors",
+                 "avg_batch_size", "p50_wait_ms", "p99_wait_ms", "avg_batch_run_ms"):
+        samples.append((f"batcher_{name}", f"Summary batcher {name.replace('_', ' ')}", {(): batcher[name]}, ()))
+    
+    cache_stats = get_cache_stats()
+    for field in ("hits", "misses", "evictions", "size"):
+        samples.append((f"result_cache_{field}", f"Result cache {field}",
+                        {(name,): stats[field] for name, stats in cache_stats.items()}, ("cache",)))
+    
+    article_cache = get_article_cache()
+    if article_cache:
+        samples.append(("article_cache_lookups", "Article cache lookups by outcome",
+                        {(outcome,): count for outcome, count in article_cache.get_stats().items()}, ("outcome",)))
+    
+    dedup_index = get_dedup_index()
+    if dedup_index:
+        dedup_stats = dedup_index.get_stats()
+        for field in ("lookups", "hits", "evictions", "size"):
+            samples.append((f"near_duplicate_{field}", f"Near-duplicate index {field}", {(): dedup_stats[field]}, ()))
+    return samples
+
+metrics.register_collector(collect_runtime_metrics)
+
+@app.route('/metrics', methods=['GET'])
+def prometheus_metrics():
+    """Prometheus scrape endpoint"""
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
 
 @app.route('/api/health', methods=['GET'])
 def health_check():
-    """Health check endpoint"""
-    return jsonify({"status": "ok", "message": "Server is running"})
+    """Health check endpoint, including the load state of each model"""
+    return jsonify({"status": "ok", "message": "Server is running", "models": get_model_status()})
+
+@app.route('/api/ready', methods=['GET'])
+def readiness_check():
+    """Readiness probe: only passes once the summarization model is warm"""
+    if not is_ready():
+        return jsonify({"status": "not_ready", "models": get_model_status()}), 503
+    return jsonify({"status": "ready", "models": get_model_status()})
+
+@app.route('/api/stats', methods=['GET'])
+def stats():
+    """Runtime metrics for tuning throughput against latency"""
+    article_cache = get_article_cache()
+    dedup_index = get_dedup_index()
+    pool = get_pool_client()
+    try:
+        pool_status = pool.status() if pool else None
+    except PoolError as e:
+        pool_status = {"error": str(e)}
+    return jsonify({
+        "batcher": get_batcher_stats(),
+        "cache": get_cache_stats(),
+        "article_cache": article_cache.get_stats() if article_cache else None,
+        "near_duplicates": dedup_index.get_stats() if dedup_index else None,
+        "jobs": job_queue.get_stats() if job_queue else None,
+        "singleflight": get_singleflight_stats(),
+        "generate_latency": latency.get_stats(),
+        "model_pool": pool_status
+    })
 
 @app.route('/api/summarize', methods=['POST'])
 def summarize():
     """Endpoint to summarize text using BART model"""
     try:
         data = request.json
+        if not data:
+            return jsonify({"error": "No text or URL provided"}), 400
+        try:
+            options = generation_options(data)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
         
         # Check if we've received a URL or text
         if 'url' in data and data['url']:
@@ -40,7 +198,7 @@ def summarize():
                 return jsonify({"error": "Invalid URL format"}), 400
                 
             # Extract article from URL
-            article_data = extract_article_from_url(url)
+            article_data = extract_article(url)
             
             if not article_data['success']:
                 return jsonify({"error": f"Failed to extract article from URL: {article_data.get('error', 'Unknown error')}"}), 400
@@ -55,27 +213,106 @@ def summarize():
             return jsonify({"error": "No text or URL provided"}), 400
         
         model_type = data.get('model_type', 'bart')  # Default to BART
-        max_length = data.get('max_length', 150)     # Default max length
-        
-        logger.info(f"Generating summary using model: {model_type}")
-        
-        # Generate summary
-        summary = generate_summary(text, model_type=model_type, max_length=max_length)
+        long_document = data.get('long_document')    # truncate, map or reduce
+        fields = requested_fields(data)
+        # Summarization and credibility share one normalized/lowercased/tokenized copy
+        document = prepare(text)
         
+        result = {}
+        if wants('summary', fields):
+            logger.info(f"Generating summary using model: {model_type}")
+            details = summarize_text(document, model_type=model_type, long_document=long_document, **options)
+            result['summary'] = details['summary']
+            result['generation'] = details['generation']
+
         # Analyze credibility
-        credibility_analysis = analyze_credibility(text)
+        if wants('credibility_score', fields) or wants('credibility_factors', fields):
+            credibility_analysis = analyze_credibility(document)
+            result['credibility_score'] = credibility_analysis["score"]
+            result['credibility_factors'] = credibility_analysis["factors"]
         
-        return jsonify({
-            "summary": summary,
-            "credibility_score": credibility_analysis["score"],
-            "credibility_factors": credibility_analysis["factors"],
-            "original_text": text
-        })
-    
+        # The caller already has the text, so it is only echoed back on request
+        result['original_text'] = text
+        
+        return jsonify(with_timings(shape(result, fields, optional=('original_text', 'generation')), data))
+
     except Exception as e:
         logger.error(f"Error processing summarization request: {str(e)}")
         return jsonify({"error": str(e)}), 500
 
+def sse_event(event, data):
+    """Format one Server-Sent Events message"""
+    return f"event: {event}\ndata: {app.json.dumps(data)}\n\n"
+
+@app.route('/api/summarize/stream', methods=['POST'])
+def summarize_stream():
+    """
+    Streaming variant of /api/summarize using Server-Sent Events
+    
+    Sends a 'metadata' event with the article details and credibility analysis
+    first, then 'token' events as the summary is decoded, and finally a 'done'
+    event with the full summary (or an 'error' event).
+    """
+    data = request.json
+    if not data:
+        return jsonify({"error": "No text or URL provided"}), 400
+    try:
+        max_length = clamp_max_length(data.get('max_length', 150))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    
+    metadata = {}
+    if 'url' in data and data['url']:
+        url = data['url']
+        if not is_valid_url(url):
+            return jsonify({"error": "Invalid URL format"}), 400
+        
+        # Extract article from URL
+        article_data = extract_article(url)
+        
+        if not article_data['success']:
+            return jsonify({"error": f"Failed to extract article from URL: {article_data.get('error', 'Unknown error')}"}), 400
+        
+        text = article_data['text']
+        metadata['title'] = article_data.get('title')
+        metadata['method'] = article_data.get('method')
+        # Add title if available
+        if article_data.get('title'):
+            text = article_data['title'] + "\n\n" + text
+    elif 'text' in data and data['text']:
+        text = data['text']
+    else:
+        return jsonify({"error": "No text or URL provided"}), 400
+    
+    model_type = data.get('model_type', 'bart')
+    long_document = data.get('long_document')
+    include_text = wants('original_text', requested_fields(data), optional=True)
+    document = prepare(text)
+    
+    def generate():
+        # Credibility is cheap, so it goes out before any summary tokens
+        credibility_analysis = analyze_credibility(document)
+        metadata['credibility_score'] = credibility_analysis["score"]
+        metadata['credibility_factors'] = credibility_analysis["factors"]
+        if include_text:
+            metadata['original_text'] = text
+        yield sse_event("metadata", metadata)
+        
+        pieces = []
+        try:
+            for piece in stream_summary(document, model_type=model_type, max_length=max_length,
+                                        long_document=long_document):
+                pieces.append(piece)
+                yield sse_event("token", {"text": piece})
+        except Exception as e:
+            logger.error(f"Error streaming summary: {str(e)}")
+            yield sse_event("error", {"error": str(e)})
+            return
+        yield sse_event("done", {"summary": ''.join(pieces)})
+    
+    return Response(stream_with_context(generate()), mimetype='text/event-stream',
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
 @app.route('/api/extract-url', methods=['POST'])
 def extract_url():
     """Endpoint to extract article content from a URL"""
@@ -90,12 +327,12 @@ def extract_url():
             return jsonify({"error": "Invalid URL format"}), 400
         
         # Extract article from URL
-        article_data = extract_article_from_url(url)
+        article_data = extract_article(url)
         
         if not article_data['success']:
             return jsonify({"error": f"Failed to extract article from URL: {article_data.get('error', 'Unknown error')}"}), 400
         
-        return jsonify(article_data)
+        return jsonify(with_timings(shape(article_data, requested_fields(data)), data))
     
     except Exception as e:
         logger.error(f"Error processing URL extraction request: {str(e)}")
@@ -115,7 +352,7 @@ def analyze():
                 return jsonify({"error": "Invalid URL format"}), 400
                 
             # Extract article from URL
-            article_data = extract_article_from_url(url)
+            article_data = extract_article(url)
             
             if not article_data['success']:
                 return jsonify({"error": f"Failed to extract article from URL: {article_data.get('error', 'Unknown error')}"}), 400
@@ -124,15 +361,226 @@ def analyze():
         else:
             text = data['text']
         
-        # Analyze credibility
-        credibility_analysis = analyze_credibility(text)
+        # Analyze credibility, optionally with the factor hits of each sentence
+        if data.get('sentences'):
+            credibility_analysis = analyze_credibility_sentences(text)
+        else:
+            credibility_analysis = analyze_credibility(text)
         
-        return jsonify(credibility_analysis)
+        return jsonify(with_timings(shape(credibility_analysis, requested_fields(data)), data))
     
     except Exception as e:
         logger.error(f"Error processing credibility analysis request: {str(e)}")
         return jsonify({"error": str(e)}), 500
 
+@app.route('/api/analyze/batch', methods=['POST'])
+def analyze_batch():
+    """Endpoint to analyze the credibility of many texts in one call"""
+    try:
+        data = request.json
+        texts = data.get('texts') if data else None
+        if not texts or not isinstance(texts, list):
+            return jsonify({"error": "No texts provided"}), 400
+        if len(texts) > BATCH_MAX_ITEMS:
+            return jsonify({"error": f"Too many texts (maximum is {BATCH_MAX_ITEMS})"}), 400
+        
+        fields = requested_fields(data)
+        results = analyze_credibility_batch([str(text) for text in texts], sentences=bool(data.get('sentences')))
+        return jsonify(with_timings({"results": [shape(result, fields) for result in results]}, data))
+    
+    except Exception as e:
+        logger.error(f"Error processing credibility batch request: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
+def process_batch_item(item, summarize=True, model_type="bart", max_length=150, long_document=None,
+                       fields=(None, set()), progress=None, quality=None, deadline_ms=None):
+    """
+    Extract (if needed), summarize and analyze a single batch item
+    
+    Args:
+        item (dict): Item with either a 'text' or a 'url' key
+        summarize (bool): Whether to generate a summary
+        model_type (str): Summarization model
+        max_length (int): Maximum summary length
+        long_document (str): Handling of texts longer than the model input
+        fields (tuple): Response field selection from requested_fields
+        progress (callable): Called with the name of each stage as it starts
+        quality (str): Decoding tier for the summary
+        deadline_ms (float): Time budget for the summary
+
+    Returns:
+        dict: Result record for the item
+    """
+    progress = progress or (lambda stage: None)
+    result = {}
+    
+    if item.get('url'):
+        url = item['url']
+        if not is_valid_url(url):
+            raise ValueError("Invalid URL format")
+        
+        # Extract article from URL
+        progress("extracting")
+        article_data = extract_article(url)
+        
+        if not article_data['success']:
+            raise ValueError(f"Failed to extract article from URL: {article_data.get('error', 'Unknown error')}")
+        
+        text = article_data['text']
+        result['title'] = article_data.get('title')
+        result['method'] = article_data.get('method')
+        # Add title if available
+        if article_data.get('title'):
+            text = article_data['title'] + "\n\n" + text
+    elif item.get('text'):
+        text = item['text']
+    else:
+        raise ValueError("No text or URL provided")
+    document = prepare(text)
+    
+    if summarize and wants('summary', fields):
+        progress("summarizing")
+        details = summarize_text(document, model_type=model_type, max_length=max_length, long_document=long_document,
+                                 quality=quality, deadline_ms=deadline_ms)
+        result['summary'] = details['summary']
+        result['generation'] = details['generation']
+
+    # Analyze credibility
+    if wants('credibility_score', fields) or wants('credibility_factors', fields):
+        progress("analyzing")
+        credibility_analysis = analyze_credibility(document)
+        result['credibility_score'] = credibility_analysis["score"]
+        result['credibility_factors'] = credibility_analysis["factors"]
+    result['original_text'] = text
+    return shape(result, fields, optional=('original_text', 'generation'))
+
+@app.route('/api/batch', methods=['POST'])
+def batch():
+    """Endpoint to process many texts and/or URLs, streaming NDJSON records as each item completes"""
+    try:
+        data = request.json
+        if not data:
+            return jsonify({"error": "No items provided"}), 400
+        if not isinstance(data, dict):
+            return jsonify({"error": "Request body must be a JSON object"}), 400
+        for name in ('items', 'texts', 'urls'):
+            if not isinstance(data.get(name, []), list):
+                return jsonify({"error": f"'{name}' must be a list"}), 400
+        
+        # Accept a list of {text|url, id} items, and/or plain lists of texts and URLs
+        items = []
+        for item in data.get('items', []):
+            items.append(item if isinstance(item, dict) else {"text": item})
+        items.extend({"text": text} for text in data.get('texts', []))
+        items.extend({"url": url} for url in data.get('urls', []))
+        
+        if not items:
+            return jsonify({"error": "No items provided"}), 400
+        if len(items) > BATCH_MAX_ITEMS:
+            return jsonify({"error": f"Too many items (maximum is {BATCH_MAX_ITEMS})"}), 400
+        
+        options = generation_options(data)
+        summarize = data.get('summarize', True)
+        model_type = data.get('model_type', 'bart')
+        long_document = data.get('long_document')
+        fields = requested_fields(data)
+    
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        logger.error(f"Error processing batch request: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
+    logger.info(f"Processing batch of {len(items)} items")
+    
+    def generate():
+        # Items run concurrently, so URL fetches overlap and summaries share batched model calls
+        executor = ThreadPoolExecutor(max_workers=min(BATCH_MAX_WORKERS, len(items)))
+        try:
+            futures = {
+                executor.submit(process_batch_item, item, summarize, model_type, long_document=long_document,
+                                fields=fields, **options): index
+                for index, item in enumerate(items)
+            }
+            for future in as_completed(futures):
+                index = futures[future]
+                record = {"index": index}
+                if 'id' in items[index]:
+                    record['id'] = items[index]['id']
+                try:
+                    record.update(future.result())
+                    record['success'] = True
+                except Exception as e:
+                    logger.warning(f"Batch item {index} failed: {str(e)}")
+                    record['success'] = False
+                    record['error'] = str(e)
+                yield app.json.dumps(record) + "\n"
+        finally:
+            # Stop pending work if the client goes away
+            executor.shutdown(wait=False, cancel_futures=True)
+    
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+def run_job(data, progress):
+    """Run a queued /api/jobs request; the result has the same fields as a /api/summarize response"""
+    item = {"url": data['url']} if data.get('url') else {"text": data.get('text')}
+    return process_batch_item(item, model_type=data.get('model_type', 'bart'), long_document=data.get('long_document'),
+                              fields=requested_fields(data), progress=progress, **generation_options(data))
+
+# Persistent queue for /api/jobs; an empty JOBS_DB disables it
+job_queue = JobQueue(run_job) if JOBS_DB_PATH else None
+
+def job_response(job, status_code, **extra):
+    job = dict(job, status_url=url_for('job_status', job_id=job['job_id']), **extra)
+    return jsonify(job), status_code
+
+@app.route('/api/jobs', methods=['POST'])
+def submit_job():
+    """
+    Queue a summarization and return its job id right away
+    
+    Takes the same body as /api/summarize, plus an optional 'callback_url'
+    that the finished job is POSTed to. An identical request with the same
+    callback_url that is still queued or running returns the existing job.
+    """
+    if job_queue is None:
+        return jsonify({"error": "Job queue is disabled"}), 503
+    try:
+        data = request.json
+        if not data or not (data.get('text') or data.get('url')):
+            return jsonify({"error": "No text or URL provided"}), 400
+        if data.get('url') and not is_valid_url(data['url']):
+            return jsonify({"error": "Invalid URL format"}), 400
+        try:
+            generation_options(data)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        callback_url = data.pop('callback_url', None)
+        if callback_url and not is_valid_url(callback_url):
+            return jsonify({"error": "Invalid callback URL format"}), 400
+        
+        job, existing = job_queue.submit(data, callback_url=callback_url)
+        return job_response(job, 202, deduplicated=existing)
+    
+    except JobQueueFullError as e:
+        response = jsonify({"error": str(e)})
+        response.headers['Retry-After'] = '30'
+        return response, 503
+    
+    except Exception as e:
+        logger.error(f"Error submitting job: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def job_status(job_id):
+    """Status, progress stage and (once finished) result or error of a job"""
+    if job_queue is None:
+        return jsonify({"error": "Job queue is disabled"}), 503
+    job = job_queue.get(job_id)
+    if job is None:
+        return jsonify({"error": "Unknown job"}), 404
+    return job_response(job, 200)
+
 if __name__ == '__main__':
     # Load model at startup
     logger.info("Starting server and initializing models...")
@@ -0,0 +1,206 @@
+import os
+import re
+import logging
+import torch
+from transformers import AutoTokenizer, AutoModelForSeq2SeqLM
+from metrics import span, INPUT_TOKENS, OUTPUT_TOKENS
+from preprocess import tokenizer_lock
+
+try:
+    # ONNX Runtime export/inference for seq2seq models
+    from optimum.onnxruntime import ORTModelForSeq2SeqLM
+except ImportError:
+    ORTModelForSeq2SeqLM = None
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Inference backends: 'pytorch' (fp32), 'int8' (dynamically quantized PyTorch, CPU)
+# and 'onnx' (ONNX Runtime encoder/decoder with KV cache, CPU)
+BACKENDS = ("pytorch", "int8", "onnx")
+# Backend used when a request asks for plain 'bart'
+SUMMARIZER_BACKEND = os.environ.get("SUMMARIZER_BACKEND", "pytorch").lower()
+# Where quantized and exported models are kept between runs
+MODEL_CACHE_DIR = os.environ.get(
+    "MODEL_CACHE_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "model_cache")
+)
+
+if SUMMARIZER_BACKEND not in BACKENDS:
+    logger.warning(f"Unknown SUMMARIZER_BACKEND '{SUMMARIZER_BACKEND}', using pytorch")
+    SUMMARIZER_BACKEND = "pytorch"
+
+def resolve_backend(model_type):
+    """
+    Map a request's model_type to an inference backend
+
+    'bart' uses SUMMARIZER_BACKEND; 'bart-pytorch', 'bart-int8' and 'bart-onnx'
+    select a backend explicitly.
+
+    Args:
+        model_type (str): Requested model type
+
+    Returns:
+        str: Backend name, or None if the model type is not a BART model
+    """
+    model_type = model_type.lower()
+    if model_type == "bart":
+        return SUMMARIZER_BACKEND
+    if model_type.startswith("bart-") and model_type[5:] in BACKENDS:
+        return model_type[5:]
+    return None
+
+def _cache_path(backend, model_name):
+    """Location of the exported/quantized copy of a model for a backend"""
+    safe_name = re.sub(r'[^A-Za-z0-9_.-]+', '_', model_name.strip('/'))
+    return os.path.join(MODEL_CACHE_DIR, backend, safe_name)
+
+def _load_pytorch(model_name):
+    model = AutoModelForSeq2SeqLM.from_pretrained(model_name)
+    # Move model to GPU if available
+    device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+    model.to(device)
+    model.eval()
+    return model, device
+
+def _load_int8(model_name):
+    path = _cache_path("int8", model_name) + ".pt"
+    if os.path.exists(path):
+        logger.info(f"Loading quantized model from {path}")
+        model = torch.load(path, weights_only=False)
+    else:
+        # Quantize the Linear layers to int8 once and keep the result on disk
+        logger.info("Quantizing model to int8 (one-time step)")
+        model = AutoModelForSeq2SeqLM.from_pretrained(model_name)
+        model.eval()
+        model = torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        torch.save(model, path)
+        logger.info(f"Saved quantized model to {path}")
+    model.eval()
+    return model, torch.device("cpu")
+
+def _load_onnx(model_name):
+    if ORTModelForSeq2SeqLM is None:
+        raise Exception("optimum[onnxruntime] not available")
+    path = _cache_path("onnx", model_name)
+    if os.path.exists(os.path.join(path, "config.json")):
+        logger.info(f"Loading ONNX model from {path}")
+        model = ORTModelForSeq2SeqLM.from_pretrained(path, use_cache=True)
+    else:
+        # Export the encoder and decoder (with past key values) once and keep them on disk
+        logger.info("Exporting model to ONNX (one-time step)")
+        model = ORTModelForSeq2SeqLM.from_pretrained(model_name, export=True, use_cache=True)
+        model.save_pretrained(path)
+        logger.info(f"Saved ONNX model to {path}")
+    return model, torch.device("cpu")
+
+_LOADERS = {
+    "pytorch": _load_pytorch,
+    "int8": _load_int8,
+    "onnx": _load_onnx,
+}
+
+def load_backend(backend, model_name):
+    """
+    Load a tokenizer and model for an inference backend
+
+    The int8 and onnx backends convert the model on first use and reuse the
+    converted copy from MODEL_CACHE_DIR afterwards.
+
+    Args:
+        backend (str): One of BACKENDS
+        model_name (str): Hugging Face model name or local path
+
+    Returns:
+        tuple: (tokenizer, model, device)
+    """
+    if backend not in _LOADERS:
+        raise ValueError(f"Unknown inference backend: {backend}")
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    model, device = _LOADERS[backend](model_name)
+    return tokenizer, model, device
+
+def encode_batch(tokenizer, texts, device, max_length=1024):
+    """
+    Pad a batch into model inputs
+
+    Args:
+        tokenizer: Tokenizer returned by load_backend
+        texts (list): Texts, or input id lists that were already tokenized (see preprocess.PreparedText.encode)
+        device: Device the tensors are moved to
+        max_length (int): Input token limit applied to texts
+
+    Returns:
+        dict: 'input_ids' and 'attention_mask' tensors
+    """
+    if all(isinstance(text, str) for text in texts):
+        with tokenizer_lock:
+            inputs = tokenizer(texts, return_tensors="pt", max_length=max_length, truncation=True, padding=True)
+        return inputs.to(device)
+
+    rows = list(texts)
+    strings = [i for i, text in enumerate(texts) if isinstance(text, str)]
+    if strings:
+        with tokenizer_lock:
+            encoded = tokenizer([texts[i] for i in strings], max_length=max_length, truncation=True)["input_ids"]
+        for i, ids in zip(strings, encoded):
+            rows[i] = ids
+
+    width = max(len(ids) for ids in rows)
+    input_ids = torch.full((len(rows), width), tokenizer.pad_token_id, dtype=torch.long)
+    attention_mask = torch.zeros((len(rows), width), dtype=torch.long)
+    for i, ids in enumerate(rows):
+        cols = slice(width - len(ids), width) if tokenizer.padding_side == "left" else slice(0, len(ids))
+        input_ids[i, cols] = torch.tensor(ids, dtype=torch.long)
+        attention_mask[i, cols] = 1
+    return {"input_ids": input_ids.to(device), "attention_mask": attention_mask.to(device)}
+
+def generate_batch(tokenizer, model, device, texts, max_length=150, num_beams=4, backend="", max_time=None,
+                   return_truncated=False):
+    """
+    Run one padded generate call over a batch of preprocessed texts
+
+    Args:
+        tokenizer: Tokenizer returned by load_backend
+        model: Model returned by load_backend
+        device: Device returned by load_backend
+        texts (list): Texts to summarize, or their input ids
+        max_length (int): Maximum summary length in tokens
+        num_beams (int): Beam width
+        backend (str): Backend name, used to label token metrics
+        max_time (float): Seconds after which decoding stops and the partial summaries are returned
+        return_truncated (bool): Also report, per text, whether decoding stopped before the summary was finished
+
+    Returns:
+        list: One summary per text, or (summary, truncated) pairs with return_truncated
+    """
+    with span("tokenize"):
+        inputs = encode_batch(tokenizer, texts, device)
+
+    # Generate summaries for the whole batch
+    summary_ids = model.generate(
+        inputs["input_ids"],
+        attention_mask=inputs["attention_mask"],
+        num_beams=num_beams,
+        min_length=min(30, max_length),
+        max_length=max_length,
+        max_time=max_time,
+        early_stopping=num_beams > 1
+    )
+
+    for count in inputs["attention_mask"].sum(dim=1).tolist():
+        INPUT_TOKENS.observe(count, backend=backend)
+    for count in (summary_ids != tokenizer.pad_token_id).sum(dim=1).tolist():
+        OUTPUT_TOKENS.observe(count, backend=backend)
+
+    # Decode summaries
+    with tokenizer_lock:
+        summaries = tokenizer.batch_decode(summary_ids, skip_special_tokens=True)
+    if not return_truncated:
+        return summaries
+    # A finished summary ends with EOS (forced at max_length); one stopped by max_time does not.
+    # The first position holds the decoder start token, which is EOS for BART.
+    truncated = [tokenizer.eos_token_id not in row for row in summary_ids[:, 1:].tolist()]
+    return list(zip(summaries, truncated))
@@ -0,0 +1,209 @@
+import os
+import time
+import logging
+import threading
+from collections import deque
+from concurrent.futures import Future
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Default scheduler settings (overridable through the environment)
+DEFAULT_MAX_BATCH_SIZE = int(os.environ.get("SUMMARY_BATCH_MAX_SIZE", "8"))
+DEFAULT_MAX_WAIT_MS = float(os.environ.get("SUMMARY_BATCH_MAX_WAIT_MS", "20"))
+DEFAULT_MAX_QUEUE_SIZE = int(os.environ.get("SUMMARY_BATCH_MAX_QUEUE", "256"))
+
+# Number of recent wait/batch samples kept for percentile reporting
+STATS_WINDOW = 1024
+
+
+class QueueFullError(Exception):
+    """Raised when the scheduler queue has reached its maximum depth"""
+
+
+def _percentile(samples, pct):
+    """Return the given percentile of a list of numbers (0 if empty)"""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+class BatchScheduler:
+    """
+    Collects pending texts and runs them through the model as a single batch.
+
+    Items are grouped by their generation settings, since only texts that share
+    the same settings can go through one generate call. A batch is dispatched
+    as soon as it reaches max_batch_size, or once its oldest item has waited
+    max_wait_ms.
+
+    Args:
+        run_batch (callable): Function taking (texts, **settings) and returning
+            a list of results in the same order as texts
+        max_batch_size (int): Largest number of texts per model call
+        max_wait_ms (float): Longest time an item waits for a batch to fill
+        max_queue_size (int): Pending items allowed before submit() rejects
+    """
+
+    def __init__(self, run_batch, max_batch_size=DEFAULT_MAX_BATCH_SIZE,
+                 max_wait_ms=DEFAULT_MAX_WAIT_MS, max_queue_size=DEFAULT_MAX_QUEUE_SIZE):
+        self.run_batch = run_batch
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000.0
+        self.max_queue_size = max_queue_size
+        self._reset()
+
+    def _reset(self):
+        """(Re)initialize locks, queues and the worker thread"""
+        self._pid = os.getpid()
+        self._cond = threading.Condition()
+        self._pending = {}       # settings key -> deque of (text, future, enqueued_at)
+        self._depth = 0
+        self._thread = None
+        self._stats = {
+            "batches": 0,
+            "items": 0,
+            "rejected": 0,
+            "errors": 0,
+            "cancelled": 0,
+            "max_queue_depth": 0,
+        }
+        self._batch_sizes = deque(maxlen=STATS_WINDOW)
+        self._wait_times = deque(maxlen=STATS_WINDOW)
+        self._run_times = deque(maxlen=STATS_WINDOW)
+
+    def _ensure_worker(self):
+        """Start the worker thread, restarting state after a fork"""
+        if self._pid != os.getpid():
+            # Threads and locks do not survive fork (e.g. gunicorn workers)
+            self._reset()
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._worker, name="summary-batcher", daemon=True)
+            self._thread.start()
+
+    def submit(self, text, **settings):
+        """
+        Queue a text for batched processing
+
+        Args:
+            text (str or list): Input text, or its model input ids
+            **settings: Generation settings passed through to run_batch
+
+        Returns:
+            Future: Resolves to the result for this text; cancelling it before
+                its batch starts drops the text from the batch
+        """
+        key = tuple(sorted(settings.items()))
+        future = Future()
+
+        with self._cond:
+            self._ensure_worker()
+            if self._depth >= self.max_queue_size:
+                self._stats["rejected"] += 1
+                raise QueueFullError(f"Summarization queue is full ({self._depth} pending)")
+
+            self._pending.setdefault(key, deque()).append((text, future, time.monotonic()))
+            self._depth += 1
+            self._stats["max_queue_depth"] = max(self._stats["max_queue_depth"], self._depth)
+            self._cond.notify()
+
+        return future
+
+    def _next_batch(self):
+        """Block until a batch is ready, then remove and return it"""
+        with self._cond:
+            while True:
+                if not self._pending:
+                    self._cond.wait()
+                    continue
+
+                # Serve the group whose oldest item has waited the longest
+                key = min(self._pending, key=lambda k: self._pending[k][0][2])
+                group = self._pending[key]
+                waited = time.monotonic() - group[0][2]
+
+                if len(group) < self.max_batch_size and waited < self.max_wait:
+                    self._cond.wait(self.max_wait - waited)
+                    continue
+
+                items = [group.popleft() for _ in range(min(len(group), self.max_batch_size))]
+                if not group:
+                    del self._pending[key]
+                self._depth -= len(items)
+                return dict(key), items
+
+    def _worker(self):
+        """Worker loop that dispatches ready batches to the model"""
+        while True:
+            settings, items = self._next_batch()
+
+            # Drop items whose caller gave up (cancelled the future) while they were queued
+            live = [item for item in items if item[1].set_running_or_notify_cancel()]
+            if len(live) < len(items):
+                with self._cond:
+                    self._stats["cancelled"] += len(items) - len(live)
+            items = live
+            if not items:
+                continue
+            started = time.monotonic()
+            texts = [item[0] for item in items]
+
+            try:
+                results = self.run_batch(texts, **settings)
+                if len(results) != len(texts):
+                    raise RuntimeError("Batch returned an unexpected number of results")
+                finished = time.monotonic()
+                for (_, future, enqueued), result in zip(items, results):
+                    # Expose this item's queue wait and batch run time to the caller
+                    future.queue_wait = started - enqueued
+                    future.run_time = finished - started
+                    future.set_result(result)
+            except Exception as e:
+                logger.error(f"Error running summarization batch: {str(e)}")
+                with self._cond:
+                    self._stats["errors"] += 1
+                for _, future, _ in items:
+                    future.set_exception(e)
+
+            finished = time.monotonic()
+            with self._cond:
+                self._stats["batches"] += 1
+                self._stats["items"] += len(items)
+                self._batch_sizes.append(len(items))
+                self._run_times.append(finished - started)
+                self._wait_times.extend(started - item[2] for item in items)
+
+    def get_queue_depth(self):
+        """Number of texts waiting for a batch"""
+        with self._cond:
+            return self._depth
+
+    def get_stats(self):
+        """
+        Return scheduler metrics
+
+        Returns:
+            dict: Counters plus batch size, queue depth and wait time summaries
+        """
+        with self._cond:
+            batch_sizes = list(self._batch_sizes)
+            wait_ms = [w * 1000.0 for w in self._wait_times]
+            run_ms = [r * 1000.0 for r in self._run_times]
+            stats = dict(self._stats)
+            stats["queue_depth"] = self._depth
+
+        stats.update({
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000.0,
+            "max_queue_size": self.max_queue_size,
+            "avg_batch_size": sum(batch_sizes) / len(batch_sizes) if batch_sizes else 0.0,
+            "avg_wait_ms": sum(wait_ms) / len(wait_ms) if wait_ms else 0.0,
+            "p50_wait_ms": _percentile(wait_ms, 50),
+            "p99_wait_ms": _percentile(wait_ms, 99),
+            "avg_batch_run_ms": sum(run_ms) / len(run_ms) if run_ms else 0.0,
+            "p99_batch_run_ms": _percentile(run_ms, 99),
+        })
+        return stats
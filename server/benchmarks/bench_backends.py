@@ -0,0 +1,130 @@
+"""
+Benchmark for the summarizer inference backends
+Summarizes a fixed set of local articles with each backend, reporting load time,
+per-article latency and ROUGE-1/2/L of each backend's summaries against the
+fp32 PyTorch backend's output.
+
+Usage: python benchmarks/bench_backends.py [--backends pytorch int8 onnx] [--max-length N] [articles ...]
+"""
+
+import os
+import re
+import sys
+import glob
+import time
+import argparse
+import logging
+from collections import Counter
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+# Load models only when the benchmark asks for them
+os.environ.setdefault("MODEL_LOAD_MODE", "lazy")
+
+from backends import BACKENDS
+from summarizer import load_bart_model, _generate_bart_batch, get_model_status, _status_name
+
+ARTICLES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "articles")
+TOKEN_PATTERN = re.compile(r'\w+')
+
+
+def tokenize(text):
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+def rouge_n(candidate, reference, n):
+    """ROUGE-N F1 between two token lists"""
+    cand = Counter(tuple(candidate[i:i + n]) for i in range(len(candidate) - n + 1))
+    ref = Counter(tuple(reference[i:i + n]) for i in range(len(reference) - n + 1))
+    overlap = sum((cand & ref).values())
+    if not overlap:
+        return 0.0
+    precision = overlap / sum(cand.values())
+    recall = overlap / sum(ref.values())
+    return 2 * precision * recall / (precision + recall)
+
+
+def rouge_l(candidate, reference):
+    """ROUGE-L F1 (longest common subsequence) between two token lists"""
+    if not candidate or not reference:
+        return 0.0
+    previous = [0] * (len(reference) + 1)
+    for token in candidate:
+        current = [0]
+        for j, ref_token in enumerate(reference):
+            current.append(previous[j] + 1 if token == ref_token else max(previous[j + 1], current[j]))
+        previous = current
+    lcs = previous[-1]
+    if not lcs:
+        return 0.0
+    precision = lcs / len(candidate)
+    recall = lcs / len(reference)
+    return 2 * precision * recall / (precision + recall)
+
+
+def rouge_scores(candidates, references):
+    """Average ROUGE-1/2/L F1 over paired summaries"""
+    totals = [0.0, 0.0, 0.0]
+    for candidate, reference in zip(candidates, references):
+        cand, ref = tokenize(candidate), tokenize(reference)
+        totals[0] += rouge_n(cand, ref, 1)
+        totals[1] += rouge_n(cand, ref, 2)
+        totals[2] += rouge_l(cand, ref)
+    return [total / max(len(candidates), 1) for total in totals]
+
+
+def summarize_all(backend, texts, max_length):
+    """Summarize each text on its own; returns the summaries and per-article latencies"""
+    summaries, latencies = [], []
+    for text in texts:
+        start = time.perf_counter()
+        summaries.extend(_generate_bart_batch([text], max_length=max_length, backend=backend))
+        latencies.append(time.perf_counter() - start)
+    return summaries, latencies
+
+
+def run_benchmark(paths, backends, max_length):
+    texts = []
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            texts.append(' '.join(f.read().split()))
+
+    # PyTorch fp32 output is the quality reference
+    backends = ["pytorch"] + [backend for backend in backends if backend != "pytorch"]
+    reference = None
+
+    print(f"{len(texts)} articles, max_length={max_length}")
+    print(f"{'backend':<10} {'load s':>8} {'mean ms':>9} {'p50 ms':>9} {'total s':>8} {'speedup':>8} "
+          f"{'ROUGE-1':>8} {'ROUGE-2':>8} {'ROUGE-L':>8}")
+    print("-" * 86)
+    baseline_total = None
+    for backend in backends:
+        if not load_bart_model(backend):
+            error = get_model_status().get(_status_name(backend), {}).get("error", "load failed")
+            print(f"{backend:<10} skipped: {error}")
+            continue
+        load_seconds = get_model_status()[_status_name(backend)].get("load_seconds", 0.0)
+
+        # Warm up once so one-off initialization is not counted
+        _generate_bart_batch(texts[:1], max_length=max_length, backend=backend)
+        summaries, latencies = summarize_all(backend, texts, max_length)
+        total = sum(latencies)
+        if reference is None:
+            reference, baseline_total = summaries, total
+        r1, r2, rl = rouge_scores(summaries, reference)
+        print(f"{backend:<10} {load_seconds:>8.2f} {total / len(texts) * 1000:>9.1f} "
+              f"{sorted(latencies)[len(latencies) // 2] * 1000:>9.1f} {total:>8.2f} "
+              f"{baseline_total / total:>7.2f}x {r1:>8.3f} {r2:>8.3f} {rl:>8.3f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare summarizer backends on quality and latency")
+    parser.add_argument("--backends", nargs="+", choices=BACKENDS, default=list(BACKENDS),
+                        help="Backends to compare (pytorch is always run as the reference)")
+    parser.add_argument("--max-length", type=int, default=150, help="Maximum summary length in tokens")
+    parser.add_argument("articles", nargs="*", help="Plain-text articles to use (defaults to the bundled fixtures)")
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    run_benchmark(args.articles or sorted(glob.glob(os.path.join(ARTICLES_DIR, "*.txt"))),
+                  args.backends, args.max_length)
@@ -0,0 +1,118 @@
+"""
+Benchmark for the credibility rule engine
+Compares the compiled rule engine against the original multi-pass
+implementation on 1 KB - 1 MB inputs and checks that both give the same result.
+
+Usage: python benchmarks/bench_credibility.py [--repeat N]
+"""
+
+import os
+import re
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from credibility import default_rules, ahocorasick
+
+SIZES = [1024, 10 * 1024, 100 * 1024, 1024 * 1024]
+
+SAMPLE_PARAGRAPH = (
+    "The city council approved the new transit budget on Tuesday after a lengthy debate. "
+    "Officials said the plan would expand bus service to three neighborhoods that currently "
+    "lack reliable routes, while critics argued that the cost estimates were too optimistic. "
+    "\"We have to invest in the people who depend on public transit every day,\" the mayor told "
+    "reporters outside city hall. According to a study by the regional planning office, ridership "
+    "could grow by 12 percent over the next five years if service frequency improves. "
+    "However, the finance committee noted that fare revenue has declined since last year, and "
+    "several members questioned whether the projections account for remote work. "
+)
+
+
+def legacy_analyze_credibility(text):
+    """The original implementation: one regex pass per factor plus a sentence split"""
+    factors = []
+    score = 50
+    text = text.lower()
+    if len(text) > 3000:
+        score += 5
+        factors.append({"type": "positive", "text": "Article length indicates depth of coverage"})
+    elif len(text) < 1000:
+        score -= 5
+        factors.append({"type": "negative", "text": "Brief article may lack comprehensive details"})
+    if re.search(r'\d+(\.\d+)?(%|percent|percentage)', text):
+        score += 7
+        factors.append({"type": "positive", "text": "Contains statistical information"})
+    if re.findall(r'"([^"]*)"', text):
+        score += 8
+        factors.append({"type": "positive", "text": "Contains direct quotes from sources"})
+    if re.search(r'(according to|said|reported by|cited|source|study)', text):
+        score += 10
+        factors.append({"type": "positive", "text": "References external sources or studies"})
+    if re.search(r'(shocking|unbelievable|mind-blowing|jaw-dropping|you won\'t believe|incredible|amazing|outrageous|scandal)', text):
+        score -= 15
+        factors.append({"type": "negative", "text": "Contains sensationalist language"})
+    if re.search(r'(however|on the other hand|alternatively|in contrast|while|despite|nevertheless|conversely|critics|proponents)', text):
+        score += 8
+        factors.append({"type": "positive", "text": "Presents multiple perspectives"})
+    if re.search(r'(may|might|could|possibly|potentially|suggests|indicates|appears|likely)', text):
+        score += 5
+        factors.append({"type": "positive", "text": "Uses appropriately cautious language"})
+    if re.search(r'(absolutely|definitely|undoubtedly|without question|100 percent|guaranteed|proven fact|irrefutable)', text):
+        score -= 8
+        factors.append({"type": "negative", "text": "Makes claims of absolute certainty"})
+    sentences = re.split(r'[.!?]+', text)
+    sentences = [s.strip() for s in sentences if s.strip()]
+    if len(text) / max(len(sentences), 1) > 100:
+        score -= 5
+        factors.append({"type": "negative", "text": "Complex sentence structure may obscure meaning"})
+    if re.search(r'(methodology|analysis|hypothesis|conclusion|investigation|evidence-based|peer-reviewed|correlation|causation|significant|variable)', text):
+        score += 7
+        factors.append({"type": "positive", "text": "Uses technical or academic language"})
+    if re.search(r'(top \d+|what happens next|won\'t believe|changed my life|mind-blowing|trending now|gone wrong)', text[:500]):
+        score -= 12
+        factors.append({"type": "negative", "text": "Contains clickbait-style patterns"})
+    if re.search(r'(january|february|march|april|may|june|july|august|september|october|november|december|yesterday|today|last week|this week)', text, re.IGNORECASE):
+        score += 5
+        factors.append({"type": "positive", "text": "Includes temporal references for context"})
+    factors.append({"type": "neutral", "text": "Analysis uses text patterns to estimate credibility"})
+    score = max(0, min(100, score))
+    return {"score": round(score), "factors": factors}
+
+
+def make_article(size):
+    """Build an article of roughly `size` characters from the sample paragraph"""
+    copies = size // len(SAMPLE_PARAGRAPH) + 1
+    return (SAMPLE_PARAGRAPH * copies)[:size]
+
+
+def time_call(func, text, repeat):
+    """Return the best wall-clock time in seconds over `repeat` runs"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(text)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run_benchmark(repeat):
+    print(f"Keyword matching: {'Aho-Corasick automaton' if ahocorasick else 'regex fallback (pyahocorasick not installed)'}")
+    print(f"{'size':>10} {'legacy ms':>12} {'compiled ms':>12} {'speedup':>9}  match")
+    print("-" * 56)
+    for size in SIZES:
+        text = make_article(size)
+        legacy = legacy_analyze_credibility(text)
+        compiled = default_rules.evaluate(text)
+        legacy_time = time_call(legacy_analyze_credibility, text, repeat)
+        compiled_time = time_call(lambda t: default_rules.evaluate(t), text, repeat)
+        print(f"{size:>10} {legacy_time * 1000:>12.3f} {compiled_time * 1000:>12.3f} "
+              f"{legacy_time / compiled_time:>8.2f}x  {'yes' if legacy == compiled else 'NO'}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the credibility rule engine")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per input size (best time is reported)")
+    args = parser.parse_args()
+    run_benchmark(args.repeat)
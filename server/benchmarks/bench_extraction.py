@@ -0,0 +1,63 @@
+"""
+Benchmark for the BeautifulSoup fallback extraction
+Compares the streamlined extractor (single walk over an lxml tree) against the
+original html.parser path on saved HTML pages, reporting timing and how closely
+the extracted texts agree.
+
+Usage: python benchmarks/bench_extraction.py [--repeat N] [pages ...]
+"""
+
+import os
+import sys
+import glob
+import time
+import argparse
+import logging
+from difflib import SequenceMatcher
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from url_processor import extract_with_soup, lxml_html
+
+PAGES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "pages")
+
+
+def time_call(func, repeat):
+    """Return the best wall-clock time in seconds over `repeat` runs, and the last result"""
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def text_similarity(a, b):
+    """Word-level similarity ratio between two extracted texts"""
+    return SequenceMatcher(None, a.split(), b.split(), autojunk=False).ratio()
+
+
+def run_benchmark(paths, repeat):
+    if lxml_html is None:
+        print("lxml is not installed, so the fast path falls back to the legacy extractor")
+    print(f"{'page':<22} {'KB':>7} {'legacy ms':>10} {'fast ms':>9} {'speedup':>8} {'legacy chars':>13} {'fast chars':>11} {'similarity':>11}")
+    print("-" * 98)
+    for path in paths:
+        with open(path, "rb") as f:
+            content = f.read()
+        legacy_time, legacy = time_call(lambda: extract_with_soup(content, mode="legacy"), repeat)
+        fast_time, fast = time_call(lambda: extract_with_soup(content, mode="fast"), repeat)
+        print(f"{os.path.basename(path):<22} {len(content) / 1024:>7.1f} {legacy_time * 1000:>10.1f} "
+              f"{fast_time * 1000:>9.1f} {legacy_time / fast_time:>7.2f}x {len(legacy['text']):>13} "
+              f"{len(fast['text']):>11} {text_similarity(legacy['text'], fast['text']):>11.3f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the BeautifulSoup extraction paths")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per page (best time is reported)")
+    parser.add_argument("pages", nargs="*", help="HTML files to use (defaults to the bundled fixtures)")
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    run_benchmark(args.pages or sorted(glob.glob(os.path.join(PAGES_DIR, "*.html"))), args.repeat)
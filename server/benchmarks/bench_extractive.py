@@ -0,0 +1,108 @@
+"""
+Benchmark for the extractive summarizer
+Measures documents per second for the TF-IDF/TextRank engine (single process
+and with a process pool) against the original position/length heuristic, on
+the bundled articles repeated to the requested batch size, then checks that
+long, repetitive inputs stay within a time and memory bound.
+
+Usage: python benchmarks/bench_extractive.py [--docs N] [--workers N] [--show]
+"""
+
+import os
+import sys
+import glob
+import time
+import argparse
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from extractive import summarize, summarize_batch
+
+ARTICLES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "articles")
+
+# Bounds for one long input; the extractive engine is the fallback under deadlines and load
+LONG_INPUT_MAX_SECONDS = 1.0
+LONG_INPUT_MAX_MB = 64
+
+
+def legacy_extract_sentences(text, num_sentences=5):
+    """The original extract_sentences: split on '.', rank by position sign times word count"""
+    sentences = text.replace('!', '.').replace('?', '.').split('.')
+    sentences = [s.strip() for s in sentences if s.strip()]
+    scored_sentences = [(i, len(s.split()) / 5) for i, s in enumerate(sentences)]
+    scored_sentences.sort(key=lambda x: (-1 if x[0] < 3 else 1) * x[1], reverse=True)
+    top_indices = [x[0] for x in scored_sentences[:min(num_sentences, len(sentences))]]
+    top_indices.sort()
+    summary = '. '.join([sentences[i] for i in top_indices])
+    return summary + ('.' if not summary.endswith('.') else '')
+
+
+def throughput(func, docs):
+    """Documents per second for one call of func over all docs"""
+    start = time.perf_counter()
+    func(docs)
+    return len(docs) / (time.perf_counter() - start)
+
+
+def long_inputs(articles):
+    """Large inputs that stress ranking: repeated articles, and sentences sharing most of their words"""
+    shared = " ".join(f"term{i}" for i in range(200))
+    return {
+        "articles repeated (430 KB)": ("\n\n".join(articles * 100))[:430000],
+        "shared vocabulary (740 KB)": " ".join(f"Report {shared} item{i}." for i in range(400)),
+    }
+
+
+def check_long_inputs(articles):
+    """Summarize each long input once; returns False if one exceeds the time or memory bound"""
+    print(f"\n{'long input':<32} {'seconds':>8} {'peak MB':>8}")
+    print("-" * 50)
+    passed = True
+    for name, text in long_inputs(articles).items():
+        start = time.perf_counter()
+        summarize(text)
+        elapsed = time.perf_counter() - start
+        # Memory is measured on a second run, since tracing slows allocation-heavy code down
+        tracemalloc.start()
+        summarize(text)
+        peak_mb = tracemalloc.get_traced_memory()[1] / 1024 ** 2
+        tracemalloc.stop()
+        ok = elapsed <= LONG_INPUT_MAX_SECONDS and peak_mb <= LONG_INPUT_MAX_MB
+        passed &= ok
+        print(f"{name:<32} {elapsed:>8.2f} {peak_mb:>8.1f}{'' if ok else '  over bound'}")
+    return passed
+
+
+def run_benchmark(num_docs, workers, show):
+    articles = []
+    for path in sorted(glob.glob(os.path.join(ARTICLES_DIR, "*.txt"))):
+        with open(path, encoding="utf-8") as f:
+            articles.append(f.read())
+    docs = (articles * (num_docs // len(articles) + 1))[:num_docs]
+    average_kb = sum(len(doc) for doc in docs) / len(docs) / 1024
+
+    print(f"{num_docs} documents, {average_kb:.1f} KB on average")
+    print(f"{'engine':<28} {'docs/s':>10}")
+    print("-" * 40)
+    print(f"{'legacy heuristic':<28} {throughput(lambda d: [legacy_extract_sentences(t) for t in d], docs):>10.0f}")
+    print(f"{'textrank (1 process)':<28} {throughput(summarize_batch, docs):>10.0f}")
+    if workers > 1:
+        label = f"textrank ({workers} processes)"
+        print(f"{label:<28} {throughput(lambda d: summarize_batch(d, workers=workers), docs):>10.0f}")
+
+    if show:
+        for article in articles:
+            print("\nlegacy:  ", legacy_extract_sentences(article))
+            print("textrank:", summarize(article))
+
+    return check_long_inputs(articles)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the extractive summarizer")
+    parser.add_argument("--docs", type=int, default=4000, help="Number of documents to summarize")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Processes for the pooled run")
+    parser.add_argument("--show", action="store_true", help="Print both engines' summaries of each article")
+    args = parser.parse_args()
+    sys.exit(0 if run_benchmark(args.docs, args.workers, args.show) else 1)
@@ -0,0 +1,101 @@
+"""
+Benchmark for the multi-process model pool
+Starts the pool with different process x thread layouts and measures summary
+throughput for a fixed number of articles sent by concurrent clients, so the
+layouts can be compared for the same number of cores.
+
+Usage: python benchmarks/bench_model_pool.py [--layouts 1x4 2x2 4x1] [--requests N] [--clients N] [--batch-size N]
+"""
+
+import os
+import sys
+import glob
+import time
+import argparse
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import model_pool
+from model_pool import start_pool, get_pool_client
+
+ARTICLES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "articles")
+
+
+def default_layouts():
+    """Process x thread layouts using all cores: 1xN, 2x(N/2), ... Nx1"""
+    cores = os.cpu_count() or 1
+    layouts = []
+    size = 1
+    while size <= cores:
+        layouts.append((size, cores // size))
+        size *= 2
+    return layouts
+
+
+def run_layout(size, threads, texts, clients, batch_size, max_length):
+    """Start a pool, send all texts in batches from concurrent clients, and return texts per second"""
+    model_pool.MODEL_POOL_ADDRESS = ""
+    model_pool.MODEL_POOL_AUTHKEY = ""
+    os.environ.pop("MODEL_POOL_ADDRESS", None)
+    os.environ.pop("MODEL_POOL_AUTHKEY", None)
+
+    process = start_pool(size=size, threads=threads)
+    try:
+        client = get_pool_client()
+        started = time.perf_counter()
+        if not client.wait_ready():
+            raise RuntimeError("Model pool failed to start")
+        # Wait for every process, so load time is not counted
+        while client.status()["ready"] < size:
+            time.sleep(0.2)
+        load_seconds = time.perf_counter() - started
+
+        # Warm up each process once
+        with ThreadPoolExecutor(max_workers=size) as executor:
+            list(executor.map(lambda text: client.generate([text], max_length=max_length), texts[:size]))
+
+        batches = [texts[i:i + batch_size] for i in range(0, len(texts), batch_size)]
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=clients) as executor:
+            list(executor.map(lambda batch: client.generate(batch, max_length=max_length), batches))
+        return load_seconds, len(texts) / (time.perf_counter() - started)
+    finally:
+        process.terminate()
+        process.join()
+
+
+def run_benchmark(layouts, num_requests, clients, batch_size, max_length):
+    articles = []
+    for path in sorted(glob.glob(os.path.join(ARTICLES_DIR, "*.txt"))):
+        with open(path, encoding="utf-8") as f:
+            articles.append(' '.join(f.read().split()))
+    # Vary the texts so no layout benefits from repeated inputs
+    texts = [f"{articles[i % len(articles)]} ({i})" for i in range(num_requests)]
+
+    print(f"{os.cpu_count()} cores, {num_requests} articles, {clients} clients, batch size {batch_size}")
+    print(f"{'layout':<12} {'cores used':>10} {'load s':>8} {'articles/s':>11}")
+    print("-" * 44)
+    for size, threads in layouts:
+        load_seconds, rate = run_layout(size, threads, texts, clients, batch_size, max_length)
+        print(f"{f'{size}x{threads}':<12} {size * threads:>10} {load_seconds:>8.1f} {rate:>11.2f}")
+
+
+def parse_layout(value):
+    size, _, threads = value.partition("x")
+    return int(size), int(threads or 1)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark model pool throughput against process/thread layout")
+    parser.add_argument("--layouts", nargs="+", type=parse_layout,
+                        help="Layouts as PROCESSESxTHREADS (defaults to 1xN, 2xN/2, ... for N cores)")
+    parser.add_argument("--requests", type=int, default=32, help="Articles to summarize per layout")
+    parser.add_argument("--clients", type=int, default=8, help="Concurrent client threads")
+    parser.add_argument("--batch-size", type=int, default=4, help="Articles per generate request")
+    parser.add_argument("--max-length", type=int, default=150, help="Maximum summary length in tokens")
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    run_benchmark(args.layouts or default_layouts(), args.requests, args.clients, args.batch_size, args.max_length)
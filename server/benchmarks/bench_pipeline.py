@@ -0,0 +1,350 @@
+"""
+Offline benchmark suite for the whole server pipeline
+Measures throughput, latency percentiles and peak RSS for URL validation, URL
+extraction (against a local HTTP stand-in serving the bundled pages),
+credibility analysis, extractive summaries and BART summaries (with a tiny
+local model), and optionally load-tests the Flask endpoints over HTTP.
+Everything runs without network access. Results can be written to JSON and
+compared against a previous run to catch regressions.
+
+Usage:
+    python benchmarks/bench_pipeline.py [--iterations N] [--output results.json]
+    python benchmarks/bench_pipeline.py --load-test [--clients N] [--duration S]
+    python benchmarks/bench_pipeline.py --compare baseline.json [--tolerance 0.2]
+"""
+
+import os
+import sys
+import glob
+import json
+import time
+import socket
+import random
+import argparse
+import logging
+import platform
+import resource
+import threading
+import subprocess
+from datetime import datetime, timezone
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+SERVER_DIR = os.path.join(BENCHMARKS_DIR, "..")
+sys.path.insert(0, SERVER_DIR)
+sys.path.insert(0, BENCHMARKS_DIR)
+
+from tiny_model import build_tiny_model
+
+PAGES_DIR = os.path.join(BENCHMARKS_DIR, "fixtures", "pages")
+ARTICLES_DIR = os.path.join(BENCHMARKS_DIR, "fixtures", "articles")
+
+VALID_URLS = [
+    "https://www.example.com/news/2024/03/city-council-approves-budget",
+    "http://localhost:8080/article?id=42",
+    "https://sub.domain.example.org/path/to/page.html?utm_source=x#section",
+    "http://192.168.1.20/story",
+]
+INVALID_URLS = ["not a url", "ftp://example.com/file", "https://", "http://exa mple.com/"]
+
+
+def configure_environment(model_dir):
+    """Point the server modules at local, non-persistent resources (must run before importing them)"""
+    os.environ["BART_MODEL_NAME"] = model_dir
+    os.environ["MODEL_LOAD_MODE"] = "lazy"
+    os.environ["ARTICLE_CACHE_DB"] = ""
+    os.environ["RESULT_CACHE_DB"] = ""
+    # The text variants below differ by one line, so near-duplicate reuse would serve them all
+    os.environ["DEDUP_ENABLED"] = "0"
+    os.environ.setdefault("SUMMARIZER_BACKEND", "pytorch")
+    os.environ.setdefault("MODEL_CACHE_DIR", os.path.join(BENCHMARKS_DIR, ".model_cache"))
+    os.environ.pop("MODEL_POOL_ADDRESS", None)
+
+
+def load_corpus():
+    """Bundled HTML pages and plain-text articles, keyed by file name"""
+    pages, articles = {}, {}
+    for path in sorted(glob.glob(os.path.join(PAGES_DIR, "*.html"))):
+        with open(path, "rb") as f:
+            pages[os.path.basename(path)] = f.read()
+    for path in sorted(glob.glob(os.path.join(ARTICLES_DIR, "*.txt"))):
+        with open(path, encoding="utf-8") as f:
+            articles[os.path.basename(path)] = f.read()
+    return pages, articles
+
+
+class CorpusHandler(BaseHTTPRequestHandler):
+    """Serves the bundled pages at /pages/<name>"""
+    pages = {}
+
+    def do_GET(self):
+        name = self.path.split("?")[0].rsplit("/", 1)[-1]
+        body = self.pages.get(name)
+        if body is None:
+            self.send_response(404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_server(server):
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process so far, in MB"""
+    usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Reported in bytes on macOS and kilobytes on Linux
+    return usage / (1024 * 1024) if sys.platform == "darwin" else usage / 1024
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))]
+
+
+def summarize_latencies(name, latencies, elapsed, **extra):
+    """Build a result record from per-call latencies in seconds"""
+    return dict({
+        "name": name,
+        "calls": len(latencies),
+        "throughput_per_s": round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+        "mean_ms": round(sum(latencies) / len(latencies) * 1000, 3) if latencies else 0.0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+    }, **extra)
+
+
+def measure(name, func, inputs, iterations, warmup=1, **extra):
+    """
+    Call func on each input `iterations` times and record per-call latency
+
+    Args:
+        name (str): Benchmark name
+        func (callable): Function taking one input
+        inputs (list): Inputs, cycled through in order
+        iterations (int): Total number of calls
+        warmup (int): Untimed calls made first, taken from the end of inputs
+    """
+    for i in range(warmup):
+        func(inputs[-1 - i % len(inputs)])
+    latencies = []
+    started = time.perf_counter()
+    for i in range(iterations):
+        call_started = time.perf_counter()
+        func(inputs[i % len(inputs)])
+        latencies.append(time.perf_counter() - call_started)
+    return summarize_latencies(name, latencies, time.perf_counter() - started, **extra)
+
+
+def unique_texts(articles, count):
+    """Distinct variants of the articles, so exact-text caches do not turn the benchmark into cache hits
+
+    The variants are near-duplicates of each other; configure_environment turns
+    off near-duplicate reuse so they are still summarized from scratch.
+    """
+    texts = list(articles.values())
+    return [f"{texts[i % len(texts)]}\n\nRef {i}." for i in range(count)]
+
+
+def run_components(args, pages, articles):
+    """Benchmark each pipeline stage in-process"""
+    from url_processor import is_valid_url, extract_article_from_url
+    from credibility import analyze_credibility
+    from summarizer import extract_sentences, generate_summary, load_bart_model
+
+    results = []
+    urls = VALID_URLS + INVALID_URLS
+    results.append(measure("is_valid_url", is_valid_url, urls, args.iterations * 100))
+
+    stand_in = start_server(ThreadingHTTPServer(("127.0.0.1", 0), CorpusHandler))
+    try:
+        base = f"http://127.0.0.1:{stand_in.server_address[1]}/pages/"
+        for name, content in pages.items():
+            results.append(measure(f"extract_article_from_url[{name}]", extract_article_from_url,
+                                   [base + name], args.iterations, page_kb=round(len(content) / 1024, 1)))
+    finally:
+        stand_in.shutdown()
+
+    # One extra text for the warmup call
+    texts = unique_texts(articles, args.iterations * 10 + 1)
+    results.append(measure("analyze_credibility", analyze_credibility, texts, args.iterations * 10))
+    for name, text in articles.items():
+        results.append(measure(f"extract_sentences[{name}]", extract_sentences, [text], args.iterations * 10,
+                               text_kb=round(len(text) / 1024, 1)))
+
+    started = time.perf_counter()
+    load_bart_model()
+    results.append({"name": "load_bart_model", "seconds": round(time.perf_counter() - started, 3),
+                    "peak_rss_mb": round(peak_rss_mb(), 1)})
+    texts = unique_texts(articles, args.iterations + 1)
+    results.append(measure("generate_summary", lambda text: generate_summary(text, max_length=args.max_length),
+                           texts, args.iterations))
+    return results
+
+
+def run_load_test(args, pages, articles):
+    """Drive the Flask endpoints over HTTP from concurrent clients for a fixed duration"""
+    import requests
+    from werkzeug.serving import make_server
+    from app import app
+
+    stand_in = start_server(ThreadingHTTPServer(("127.0.0.1", 0), CorpusHandler))
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+    api = start_server(make_server("127.0.0.1", port, app, threaded=True))
+    base = f"http://127.0.0.1:{port}"
+    page_base = f"http://127.0.0.1:{stand_in.server_address[1]}/pages/"
+    texts = list(articles.values())
+
+    # Each scenario builds a (path, payload) for a request; texts vary so caches are not hit every time
+    scenarios = {
+        "POST /api/analyze": lambda i: ("/api/analyze", {"text": f"{texts[i % len(texts)]} Ref {i}."}),
+        "POST /api/summarize (extractive)": lambda i: ("/api/summarize", {"text": f"{texts[i % len(texts)]} Ref {i}.",
+                                                                          "model_type": "extractive"}),
+        "POST /api/summarize (bart)": lambda i: ("/api/summarize", {"text": f"{texts[i % len(texts)]} Ref {i}.",
+                                                                    "max_length": args.max_length}),
+        "POST /api/extract-url": lambda i: ("/api/extract-url", {"url": page_base + list(pages)[i % len(pages)]}),
+    }
+
+    results = []
+    try:
+        for name, make_request in scenarios.items():
+            latencies, errors = [], [0]
+            lock = threading.Lock()
+            counter = iter(range(10 ** 9))
+            deadline = time.perf_counter() + args.duration
+
+            def client():
+                session = requests.Session()
+                while time.perf_counter() < deadline:
+                    with lock:
+                        i = next(counter)
+                    path, payload = make_request(i)
+                    call_started = time.perf_counter()
+                    try:
+                        ok = session.post(base + path, json=payload, timeout=120).status_code == 200
+                    except requests.RequestException:
+                        ok = False
+                    elapsed = time.perf_counter() - call_started
+                    with lock:
+                        latencies.append(elapsed)
+                        if not ok:
+                            errors[0] += 1
+
+            started = time.perf_counter()
+            threads = [threading.Thread(target=client) for _ in range(args.clients)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            results.append(summarize_latencies(f"load[{name}]", latencies, time.perf_counter() - started,
+                                               clients=args.clients, errors=errors[0]))
+    finally:
+        api.shutdown()
+        stand_in.shutdown()
+    return results
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=SERVER_DIR,
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline_path, tolerance):
+    """
+    Print throughput changes against a baseline run
+
+    Returns:
+        list: Names of benchmarks whose throughput dropped by more than the tolerance
+    """
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = {r["name"]: r for r in json.load(f)["results"]}
+
+    regressions = []
+    print(f"\n{'benchmark':<56} {'baseline/s':>11} {'current/s':>11} {'change':>8}")
+    print("-" * 90)
+    for result in results:
+        before = baseline.get(result["name"], {}).get("throughput_per_s")
+        after = result.get("throughput_per_s")
+        if not before or after is None:
+            continue
+        change = after / before - 1.0
+        flag = ""
+        if change < -tolerance:
+            regressions.append(result["name"])
+            flag = "  REGRESSION"
+        print(f"{result['name']:<56} {before:>11.2f} {after:>11.2f} {change:>+7.1%}{flag}")
+    return regressions
+
+
+def print_results(results):
+    print(f"{'benchmark':<56} {'calls':>6} {'per s':>10} {'p50 ms':>9} {'p99 ms':>9} {'RSS MB':>8}")
+    print("-" * 103)
+    for result in results:
+        if "calls" not in result:
+            print(f"{result['name']:<56} {'':>6} {'':>10} {result['seconds'] * 1000:>9.1f} {'':>9} {result['peak_rss_mb']:>8.1f}")
+            continue
+        print(f"{result['name']:<56} {result['calls']:>6} {result['throughput_per_s']:>10.2f} "
+              f"{result['p50_ms']:>9.3f} {result['p99_ms']:>9.3f} {result['peak_rss_mb']:>8.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Offline benchmark suite for the server pipeline")
+    parser.add_argument("--iterations", type=int, default=20, help="Base number of calls per benchmark")
+    parser.add_argument("--max-length", type=int, default=60, help="Maximum summary length in tokens")
+    parser.add_argument("--model", help="Model to summarize with (defaults to a tiny local model built on first run)")
+    parser.add_argument("--load-test", action="store_true", help="Also load-test the Flask endpoints over HTTP")
+    parser.add_argument("--clients", type=int, default=8, help="Concurrent clients in the load test")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds per load-test scenario")
+    parser.add_argument("--output", help="Write results to this JSON file")
+    parser.add_argument("--compare", help="Compare throughput against a previous JSON results file")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed throughput drop before --compare fails")
+    args = parser.parse_args()
+
+    random.seed(0)
+    configure_environment(args.model or build_tiny_model())
+    logging.disable(logging.WARNING)
+    pages, articles = load_corpus()
+    CorpusHandler.pages = pages
+
+    results = run_components(args, pages, articles)
+    if args.load_test:
+        results.extend(run_load_test(args, pages, articles))
+    print_results(results)
+
+    report = {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "git_revision": git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "model": os.environ["BART_MODEL_NAME"],
+        "settings": vars(args),
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nResults written to {args.output}")
+
+    if args.compare and compare(results, args.compare, args.tolerance):
+        sys.exit(1)
@@ -0,0 +1,167 @@
+import os
+import time
+import logging
+import threading
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Quality tiers: beam width per tier, from best to fastest
+QUALITY_TIERS = {"beams4": 4, "beams2": 2, "greedy": 1}
+TIER_ORDER = ("beams4", "beams2", "greedy")
+
+# Budget settings (overridable through the environment)
+# Tier used when a request does not ask for one
+SUMMARY_QUALITY = os.environ.get("SUMMARY_QUALITY", "beams4")
+# Deadline in milliseconds applied when a request does not set one; 0 means no deadline
+SUMMARY_DEADLINE_MS = float(os.environ.get("SUMMARY_DEADLINE_MS", "0"))
+# Upper bound on a request's max_length (summary tokens)
+SUMMARY_MAX_LENGTH_LIMIT = int(os.environ.get("SUMMARY_MAX_LENGTH_LIMIT", "300"))
+# Lower the tier when the queue is deep or the deadline is tight; 0 always uses the requested tier
+SUMMARY_ADAPTIVE = os.environ.get("SUMMARY_ADAPTIVE", "1") == "1"
+# Queue depth at which requests drop one tier; at twice this depth they decode greedily
+SUMMARY_DEGRADE_QUEUE_DEPTH = int(os.environ.get("SUMMARY_DEGRADE_QUEUE_DEPTH", "16"))
+# Inputs longer than this many characters drop one tier when they have a deadline
+SUMMARY_LONG_INPUT_CHARS = int(os.environ.get("SUMMARY_LONG_INPUT_CHARS", "4000"))
+
+# Generation time budgets are rounded down to this step (seconds)
+MAX_TIME_STEP = 0.25
+# Weight of the newest sample in the per-tier latency averages
+LATENCY_SMOOTHING = 0.2
+
+if SUMMARY_QUALITY not in QUALITY_TIERS:
+    logger.warning(f"Unknown SUMMARY_QUALITY '{SUMMARY_QUALITY}', using beams4")
+    SUMMARY_QUALITY = "beams4"
+
+
+def clamp_max_length(max_length):
+    """
+    Bound a requested summary length to 1..SUMMARY_MAX_LENGTH_LIMIT tokens
+
+    Raises:
+        ValueError: If max_length is not a number
+    """
+    try:
+        max_length = int(max_length)
+    except (TypeError, ValueError):
+        raise ValueError(f"Invalid max_length: {max_length!r}")
+    return max(1, min(max_length, SUMMARY_MAX_LENGTH_LIMIT))
+
+
+def check_options(quality=None, deadline_ms=None):
+    """
+    Validate request-supplied generation options
+
+    Args:
+        quality (str): Quality tier, or None for SUMMARY_QUALITY
+        deadline_ms (float): Time budget in milliseconds, or None for SUMMARY_DEADLINE_MS (0 means none)
+
+    Returns:
+        tuple: (quality, deadline_ms) with deadline_ms as a float (or None)
+
+    Raises:
+        ValueError: If the tier is unknown or the deadline is not a non-negative number
+    """
+    if quality is not None and quality not in QUALITY_TIERS:
+        raise ValueError(f"Unknown quality tier: {quality} (expected one of {', '.join(TIER_ORDER)})")
+    if deadline_ms is not None:
+        try:
+            deadline_ms = float(deadline_ms)
+        except (TypeError, ValueError):
+            raise ValueError(f"Invalid deadline_ms: {deadline_ms!r}")
+        if deadline_ms < 0:
+            raise ValueError("deadline_ms must not be negative")
+    return quality, deadline_ms
+
+
+def remaining(deadline):
+    """Seconds left until a time.monotonic() deadline, or None without a deadline"""
+    if deadline is None:
+        return None
+    return max(0.0, deadline - time.monotonic())
+
+
+def time_budget(deadline):
+    """
+    Seconds a generate call may run before the deadline, or None without a deadline
+
+    Rounded down to MAX_TIME_STEP (but at least one step), so requests with
+    similar deadlines still share batches.
+    """
+    if deadline is None:
+        return None
+    return max(MAX_TIME_STEP, remaining(deadline) // MAX_TIME_STEP * MAX_TIME_STEP)
+
+
+class LatencyTracker:
+    """Moving average of generate-call time per beam width, used to predict whether a tier fits a deadline"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._averages = {}
+
+    def observe(self, num_beams, seconds):
+        with self._lock:
+            previous = self._averages.get(num_beams)
+            self._averages[num_beams] = seconds if previous is None else (
+                LATENCY_SMOOTHING * seconds + (1 - LATENCY_SMOOTHING) * previous)
+
+    def estimate(self, num_beams):
+        """Expected seconds for one generate call, or None before the first observation"""
+        with self._lock:
+            return self._averages.get(num_beams)
+
+    def get_stats(self):
+        with self._lock:
+            return {f"beams{beams}_ms": round(seconds * 1000, 1) for beams, seconds in sorted(self._averages.items())}
+
+
+latency = LatencyTracker()
+
+
+def plan_generation(quality=None, deadline=None, queue_depth=0, batch_size=1, input_chars=0):
+    """
+    Choose decoding settings for one request
+
+    Starts from the requested tier and, when SUMMARY_ADAPTIVE is on, steps
+    down to cheaper tiers while the queue is deep, a long input has a
+    deadline, or the recent generate time of the tier would overrun the
+    deadline (counting the batches queued ahead of this request).
+
+    Args:
+        quality (str): Requested tier (see QUALITY_TIERS), or None for SUMMARY_QUALITY
+        deadline (float): time.monotonic() value the summary is due by, or None
+        queue_depth (int): Requests waiting in the scheduler
+        batch_size (int): Largest batch the scheduler runs at once
+        input_chars (int): Length of the text to summarize
+
+    Returns:
+        dict: 'quality', 'num_beams' and 'max_time' (seconds generate may run, or None)
+
+    Raises:
+        ValueError: If quality is not a known tier
+    """
+    quality = quality or SUMMARY_QUALITY
+    if quality not in QUALITY_TIERS:
+        raise ValueError(f"Unknown quality tier: {quality} (expected one of {', '.join(TIER_ORDER)})")
+    index = TIER_ORDER.index(quality)
+
+    if SUMMARY_ADAPTIVE:
+        if queue_depth >= 2 * SUMMARY_DEGRADE_QUEUE_DEPTH:
+            index = len(TIER_ORDER) - 1
+        elif queue_depth >= SUMMARY_DEGRADE_QUEUE_DEPTH:
+            index = max(index, 1)
+        if deadline is not None and input_chars > SUMMARY_LONG_INPUT_CHARS:
+            index = min(index + 1, len(TIER_ORDER) - 1)
+        if deadline is not None:
+            left = remaining(deadline)
+            batches_ahead = 1 + queue_depth // max(batch_size, 1)
+            while index < len(TIER_ORDER) - 1:
+                expected = latency.estimate(QUALITY_TIERS[TIER_ORDER[index]])
+                if expected is None or expected * batches_ahead <= left:
+                    break
+                index += 1
+
+    tier = TIER_ORDER[index]
+    return {"quality": tier, "num_beams": QUALITY_TIERS[tier], "max_time": time_budget(deadline)}
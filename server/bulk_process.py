@@ -0,0 +1,410 @@
+"""
+Bulk processor for offline corpora
+Summarizes and scores articles from a JSONL or CSV file, or a directory of
+them, without going through the Flask server. URLs are fetched concurrently,
+credibility analysis and extractive summaries run in a process pool, and BART
+summaries go through the batch scheduler so the model runs on full batches.
+
+Results are appended to a JSONL file, one record per input in input order.
+After each chunk of records the output is flushed and a checkpoint is written
+next to it, so an interrupted run continues with --resume where it stopped.
+
+Usage:
+    python bulk_process.py articles.jsonl --output results.jsonl
+    python bulk_process.py archive/ --output results.jsonl --workers 4 --resume
+    python bulk_process.py urls.csv --output results.jsonl --model-type extractive
+"""
+
+import os
+import sys
+import csv
+import json
+import time
+import argparse
+import logging
+import multiprocessing
+from itertools import islice
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from credibility import analyze_credibility
+from url_processor import extract_article_from_url, is_valid_url
+import extractive
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# File types read from an input directory
+INPUT_EXTENSIONS = (".jsonl", ".csv", ".txt")
+
+
+def read_records(path, text_field="text", url_field="url", id_field="id"):
+    """
+    Read input records in a stable order
+
+    JSONL lines are objects (or plain strings, taken as a URL when they look
+    like one and as text otherwise); a line that is not valid JSON becomes a
+    record with an 'error', so it fails on its own without stopping the run
+    or shifting the indexes a checkpoint counts. CSV files need a header row.
+    In a directory, .jsonl and .csv files are read as above and each .txt
+    file is one article, with its relative path as id. Files are read in sorted order
+    so a resumed run sees the same sequence.
+
+    Args:
+        path (str): File or directory
+        text_field (str): Field holding the article text
+        url_field (str): Field holding the article URL
+        id_field (str): Field holding a caller-supplied id
+
+    Yields:
+        dict: Record with 'text' or 'url' (or 'error'), and 'id' when the input has one
+    """
+    if os.path.isdir(path):
+        files = []
+        for root, dirs, names in os.walk(path):
+            dirs.sort()
+            files.extend(os.path.join(root, name) for name in sorted(names) if name.endswith(INPUT_EXTENSIONS))
+        for file_path in files:
+            if file_path.endswith(".txt"):
+                with open(file_path, encoding="utf-8", errors="replace") as f:
+                    yield {"id": os.path.relpath(file_path, path), "text": f.read()}
+            else:
+                yield from read_records(file_path, text_field, url_field, id_field)
+        return
+
+    def as_record(row):
+        if isinstance(row, str):
+            return {"url": row} if is_valid_url(row) else {"text": row}
+        if not isinstance(row, dict):
+            return {"error": f"Expected an object or string, got {type(row).__name__}"}
+        record = {}
+        if row.get(id_field) not in (None, ""):
+            record["id"] = row[id_field]
+        if row.get(url_field):
+            record["url"] = row[url_field]
+        elif row.get(text_field):
+            record["text"] = row[text_field]
+        return record
+
+    with open(path, encoding="utf-8", errors="replace", newline="") as f:
+        if path.endswith(".csv"):
+            csv.field_size_limit(sys.maxsize)
+            for row in csv.DictReader(f):
+                yield as_record(row)
+        else:
+            for line_number, line in enumerate(f, 1):
+                if line.strip():
+                    try:
+                        row = json.loads(line)
+                    except json.JSONDecodeError as e:
+                        yield {"error": f"Invalid JSON on line {line_number} of {path}: {e.msg}"}
+                        continue
+                    yield as_record(row)
+
+
+def read_chunks(records, size):
+    """Group records into lists of at most size"""
+    chunk = []
+    for record in records:
+        chunk.append(record)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def analyze(text, summarize_extractive, num_sentences):
+    """Credibility analysis and (optionally) an extractive summary of one text; runs in the worker processes"""
+    summary = extractive.summarize(text, num_sentences) if summarize_extractive else None
+    return analyze_credibility(text), summary
+
+
+def analyze_safely(text, summarize_extractive, num_sentences):
+    """analyze, returning a failure as an exception instead of raising it, so one text cannot stop the others"""
+    try:
+        return analyze(text, summarize_extractive, num_sentences)
+    except Exception as e:
+        # Rebuilt from the message: not every exception survives the trip back from a worker process
+        return RuntimeError(f"Analysis failed: {str(e)}")
+
+
+def fetch(record):
+    """Resolve a record to (text, extra result fields), extracting the article when it is a URL"""
+    if record.get("error"):
+        raise ValueError(record["error"])
+    if record.get("url"):
+        url = record["url"]
+        if not is_valid_url(url):
+            raise ValueError("Invalid URL format")
+        article_data = extract_article_from_url(url)
+        if not article_data['success']:
+            raise ValueError(f"Failed to extract article from URL: {article_data.get('error', 'Unknown error')}")
+        text = article_data['text']
+        extra = {"title": article_data.get('title'), "method": article_data.get('method')}
+        # Add title if available
+        if article_data.get('title'):
+            text = article_data['title'] + "\n\n" + text
+        return text, extra
+    if record.get("text"):
+        return record["text"], {}
+    raise ValueError("No text or URL provided")
+
+
+def _process_pool(workers):
+    """Start a pool of spawned worker processes for analyze"""
+    return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+
+
+class Checkpoint:
+    """
+    Progress of a run, stored next to its output file
+
+    Records how many input records are fully written and the output size at
+    that point. A resumed run truncates the output back to that size (dropping
+    records of a chunk that was cut off) and skips that many input records.
+
+    Args:
+        output_path (str): JSONL output file
+    """
+
+    def __init__(self, output_path):
+        self.path = output_path + ".checkpoint"
+
+    def load(self):
+        """Return (records done, output bytes), or (0, 0) without a checkpoint"""
+        if not os.path.exists(self.path):
+            return 0, 0
+        with open(self.path, encoding="utf-8") as f:
+            state = json.load(f)
+        return state["records"], state["output_bytes"]
+
+    def save(self, records, output_bytes):
+        """Atomically record progress"""
+        temp_path = self.path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump({"records": records, "output_bytes": output_bytes, "updated_at": time.time()}, f)
+        os.replace(temp_path, self.path)
+
+
+class BulkProcessor:
+    """
+    Processes chunks of input records
+
+    Args:
+        args (argparse.Namespace): Command-line settings
+        pool (ProcessPoolExecutor): Pool for credibility and extractive work, or None to run it in this process
+    """
+
+    def __init__(self, args, pool):
+        self.args = args
+        self.pool = pool
+        # Imported here rather than at the top, so the worker processes never load torch
+        from backends import resolve_backend
+        self.use_bart = args.summarize and resolve_backend(args.model_type) is not None
+        self.fetcher = ThreadPoolExecutor(max_workers=args.fetch_workers)
+        # Enough concurrent requests to keep the batch scheduler's batches full
+        self.summarizer = ThreadPoolExecutor(max_workers=2 * args.batch_size) if self.use_bart else None
+
+    def process(self, chunk, start):
+        """
+        Process one chunk of records
+
+        Args:
+            chunk (list): Input records
+            start (int): Input index of the first record
+
+        Returns:
+            list: Output records in input order
+        """
+        args = self.args
+        results = [{"index": start + i} for i in range(len(chunk))]
+        for result, record in zip(results, chunk):
+            result.update((key, record[key]) for key in ("id", "url") if key in record)
+
+        # Fetch URLs concurrently
+        texts = [None] * len(chunk)
+        for i, outcome in enumerate(self.fetcher.map(self._fetch, chunk)):
+            if isinstance(outcome, Exception):
+                results[i].update(success=False, error=str(outcome))
+            else:
+                texts[i], extra = outcome
+                results[i].update(extra)
+        ready = [i for i, text in enumerate(texts) if text is not None]
+
+        # Queue the CPU work in the process pool first, so it overlaps with the model
+        summarize_extractive = args.summarize and not self.use_bart
+        cpu_work = None
+        if args.credibility or summarize_extractive:
+            inputs = [texts[i] for i in ready]
+            flags = [summarize_extractive] * len(inputs)
+            sentences = [args.num_sentences] * len(inputs)
+            if self.pool is not None:
+                chunksize = max(1, len(inputs) // (4 * args.workers))
+                try:
+                    cpu_work = self.pool.map(analyze_safely, inputs, flags, sentences, chunksize=chunksize)
+                except BrokenProcessPool:
+                    self._replace_pool()
+                    cpu_work = self.pool.map(analyze_safely, inputs, flags, sentences, chunksize=chunksize)
+            else:
+                cpu_work = map(analyze_safely, inputs, flags, sentences)
+
+        if self.use_bart:
+            # Longest texts first, so each batch pads to similar lengths
+            order = sorted(ready, key=lambda i: len(texts[i]), reverse=True)
+            futures = {i: self.summarizer.submit(self._summarize, texts[i]) for i in order}
+            for i, future in futures.items():
+                outcome = future.result()
+                if isinstance(outcome, Exception):
+                    results[i].update(success=False, error=str(outcome))
+                else:
+                    results[i]["summary"] = outcome
+
+        if cpu_work is not None:
+            for i, outcome in zip(ready, self._collect(cpu_work, len(ready))):
+                if isinstance(outcome, Exception):
+                    results[i].update(success=False, error=str(outcome))
+                    continue
+                credibility_analysis, summary = outcome
+                if summary is not None:
+                    results[i]["summary"] = summary
+                if args.credibility:
+                    results[i]["credibility_score"] = credibility_analysis["score"]
+                    results[i]["credibility_factors"] = credibility_analysis["factors"]
+
+        for i in ready:
+            results[i].setdefault("success", True)
+            if args.include_text:
+                results[i]["original_text"] = texts[i]
+        return results
+
+    def _fetch(self, record):
+        try:
+            return fetch(record)
+        except Exception as e:
+            return e
+
+    def _summarize(self, text):
+        from summarizer import generate_summary
+        try:
+            return generate_summary(text, model_type=self.args.model_type, max_length=self.args.max_length,
+                                    long_document=self.args.long_document, quality=self.args.quality)
+        except Exception as e:
+            return e
+
+    def _collect(self, cpu_work, count):
+        """Yield count outcomes from cpu_work; if the pool itself fails, the outcomes still missing are that error"""
+        try:
+            for outcome in cpu_work:
+                yield outcome
+                count -= 1
+        except Exception as e:
+            logger.error(f"Process pool failed: {str(e)}")
+            if isinstance(e, BrokenProcessPool):
+                self._replace_pool()
+            error = RuntimeError(f"Analysis failed: {str(e) or type(e).__name__}")
+            for _ in range(count):
+                yield error
+
+    def _replace_pool(self):
+        """Swap a pool broken by a dead worker process for a fresh one"""
+        logger.warning("A worker process died; starting a new process pool")
+        self.pool.shutdown(wait=False)
+        self.pool = _process_pool(self.args.workers)
+
+
+def run(args):
+    """Process the input into the output file; returns the number of failed records, or None if it could not start"""
+    checkpoint = Checkpoint(args.output)
+    exists = os.path.exists(args.output)
+    if exists and not (args.resume or args.overwrite):
+        logger.error(f"{args.output} already exists; pass --resume to continue it or --overwrite to replace it")
+        return None
+    done, output_bytes = checkpoint.load() if args.resume and exists else (0, 0)
+    if args.resume and exists and not done:
+        logger.warning(f"No checkpoint for {args.output}; starting over")
+
+    # Start the worker processes before the model loads; spawned workers do not inherit torch threads
+    pool = None
+    if args.workers > 1 and (args.credibility or args.summarize):
+        pool = _process_pool(args.workers)
+
+    processor = BulkProcessor(args, pool)
+    if processor.use_bart:
+        from summarizer import load_bart_model
+        if not load_bart_model():
+            logger.warning("BART model not available; summaries fall back to extractive")
+
+    with open(args.output, "r+b" if args.resume and exists else "wb") as out:
+        # Drop anything written after the last checkpoint
+        out.truncate(output_bytes)
+        out.seek(output_bytes)
+        if done:
+            logger.info(f"Resuming after {done} records")
+
+        # Records before the checkpoint are read but not processed again
+        records = islice(read_records(args.input, args.text_field, args.url_field, args.id_field), done, None)
+        processed = failed = 0
+        started = time.monotonic()
+        try:
+            for chunk in read_chunks(records, args.chunk_size):
+                if args.limit is not None and processed >= args.limit:
+                    break
+                if args.limit is not None:
+                    chunk = chunk[:args.limit - processed]
+                for result in processor.process(chunk, done + processed):
+                    failed += not result["success"]
+                    out.write(json.dumps(result, ensure_ascii=False).encode("utf-8") + b"\n")
+                out.flush()
+                os.fsync(out.fileno())
+                processed += len(chunk)
+                checkpoint.save(done + processed, out.tell())
+
+                elapsed = time.monotonic() - started
+                logger.info(f"{done + processed} records done ({processed / elapsed:.1f}/s, {failed} failed)")
+        finally:
+            if processor.pool is not None:
+                processor.pool.shutdown(cancel_futures=True)
+
+    elapsed = time.monotonic() - started
+    print(f"Processed {processed} records in {elapsed:.1f}s ({failed} failed); output in {args.output}")
+    if processor.use_bart:
+        from summarizer import get_batcher_stats
+        print(f"BART batches averaged {get_batcher_stats()['avg_batch_size']:.1f} texts")
+    return failed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Summarize and score a corpus of articles or URLs offline")
+    parser.add_argument("input", help="JSONL or CSV file, or a directory of .jsonl/.csv/.txt files")
+    parser.add_argument("--output", required=True, help="JSONL file results are appended to")
+    parser.add_argument("--resume", action="store_true", help="Continue from the output's checkpoint")
+    parser.add_argument("--overwrite", action="store_true", help="Replace an existing output file")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="Processes for credibility and extractive work")
+    parser.add_argument("--fetch-workers", type=int, default=8, help="Concurrent URL downloads")
+    parser.add_argument("--batch-size", type=int, default=8, help="Texts per BART generate call")
+    parser.add_argument("--chunk-size", type=int, default=256, help="Records processed between checkpoints")
+    parser.add_argument("--limit", type=int, help="Stop after this many records")
+    parser.add_argument("--model-type", default="bart", help="'bart', 'bart-<backend>' or 'extractive'")
+    parser.add_argument("--max-length", type=int, default=150, help="Maximum summary length in tokens")
+    parser.add_argument("--long-document", choices=("truncate", "map", "reduce"),
+                        help="Handling of texts longer than the model input")
+    parser.add_argument("--quality", choices=("beams4", "beams2", "greedy"), help="BART decoding tier")
+    parser.add_argument("--num-sentences", type=int, default=extractive.DEFAULT_NUM_SENTENCES,
+                        help="Sentences per extractive summary")
+    parser.add_argument("--no-summary", dest="summarize", action="store_false", help="Skip summarization")
+    parser.add_argument("--no-credibility", dest="credibility", action="store_false",
+                        help="Skip credibility analysis")
+    parser.add_argument("--include-text", action="store_true", help="Write the article text into each record")
+    parser.add_argument("--text-field", default="text", help="Input field holding the article text")
+    parser.add_argument("--url-field", default="url", help="Input field holding the article URL")
+    parser.add_argument("--id-field", default="id", help="Input field holding a record id")
+    args = parser.parse_args()
+
+    # The summarizer reads these at import: load the model on demand and batch to --batch-size
+    os.environ.setdefault("MODEL_LOAD_MODE", "lazy")
+    os.environ["SUMMARY_BATCH_MAX_SIZE"] = str(args.batch_size)
+
+    # Records that failed (e.g. unreachable URLs) are reported in the output, not by the exit status
+    sys.exit(1 if run(args) is None else 0)
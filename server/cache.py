@@ -0,0 +1,249 @@
+import os
+import copy
+import json
+import time
+import hashlib
+import logging
+import sqlite3
+import threading
+from collections import OrderedDict
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Default cache settings (overridable through the environment)
+DEFAULT_MAX_ENTRIES = int(os.environ.get("RESULT_CACHE_MAX_ENTRIES", "1024"))
+DEFAULT_TTL = float(os.environ.get("RESULT_CACHE_TTL", "3600"))
+# Path of the SQLite file used for the persistent tier; empty disables it
+DEFAULT_DB_PATH = os.environ.get("RESULT_CACHE_DB", "")
+
+# Registry of named caches, so their stats can be reported together
+_caches = {}
+_registry_lock = threading.Lock()
+
+
+def make_key(text, **params):
+    """
+    Build a content-addressed cache key
+
+    Args:
+        text (str): Text the result was computed from
+        **params: Settings that influence the result (model_type, max_length, ...)
+
+    Returns:
+        str: Hex digest identifying the text and settings
+    """
+    digest = hashlib.sha256()
+    digest.update(text.encode("utf-8", "surrogatepass"))
+    for name in sorted(params):
+        digest.update(f"\x00{name}={params[name]!r}".encode("utf-8"))
+    return digest.hexdigest()
+
+
+class ResultCache:
+    """
+    Two-tier result cache: an in-process LRU with a TTL, backed by an optional
+    SQLite table that survives restarts.
+
+    Values must be JSON-serializable when the disk tier is enabled.
+
+    Args:
+        namespace (str): Name separating this cache's entries in the shared database
+        max_entries (int): Maximum number of entries kept in memory
+        ttl (float): Seconds an entry stays valid (0 disables expiry)
+        db_path (str): SQLite file for the persistent tier, or empty to disable it
+        copy_values (bool): Hand out copies of cached values; callers that never
+            mutate them (e.g. tuples) can turn this off to skip the copying cost
+    """
+
+    def __init__(self, namespace, max_entries=DEFAULT_MAX_ENTRIES, ttl=DEFAULT_TTL, db_path=DEFAULT_DB_PATH,
+                 copy_values=True):
+        self.namespace = namespace
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.db_path = db_path
+        self._copy = copy.deepcopy if copy_values else (lambda value: value)
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()   # key -> (expires_at, value)
+        self._db = None
+        self._stats = {
+            "hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "evictions": 0,
+            "expirations": 0,
+            "sets": 0,
+        }
+
+        if db_path:
+            self._open_db()
+
+    def _open_db(self):
+        """Open (and create if needed) the SQLite tier"""
+        try:
+            self._db = sqlite3.connect(self.db_path, check_same_thread=False, isolation_level=None)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS result_cache ("
+                "namespace TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL, expires_at REAL, "
+                "PRIMARY KEY (namespace, key))"
+            )
+        except sqlite3.Error as e:
+            logger.error(f"Error opening result cache database {self.db_path}: {str(e)}")
+            self._db = None
+
+    def _expiry(self):
+        return time.time() + self.ttl if self.ttl > 0 else None
+
+    def get(self, key):
+        """
+        Look up a cached value
+
+        Args:
+            key (str): Key from make_key()
+
+        Returns:
+            The cached value (a copy of it), or None on a miss
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at is None or expires_at > now:
+                    self._entries.move_to_end(key)
+                    self._stats["hits"] += 1
+                    return self._copy(value)
+                del self._entries[key]
+                self._stats["expirations"] += 1
+
+            value = self._disk_get(key, now)
+            if value is None:
+                self._stats["misses"] += 1
+                return None
+
+            self._stats["disk_hits"] += 1
+            self._memory_set(key, value, self._expiry())
+            return self._copy(value)
+
+    def set(self, key, value):
+        """
+        Store a value in both tiers
+
+        Args:
+            key (str): Key from make_key()
+            value: JSON-serializable result
+        """
+        expires_at = self._expiry()
+        with self._lock:
+            self._stats["sets"] += 1
+            self._memory_set(key, self._copy(value), expires_at)
+            self._disk_set(key, value, expires_at)
+
+    def _memory_set(self, key, value, expires_at):
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self._stats["evictions"] += 1
+
+    def _disk_get(self, key, now):
+        if self._db is None:
+            return None
+        try:
+            row = self._db.execute(
+                "SELECT value, expires_at FROM result_cache WHERE namespace = ? AND key = ?",
+                (self.namespace, key)
+            ).fetchone()
+            if row is None:
+                return None
+            if row[1] is not None and row[1] <= now:
+                self._db.execute("DELETE FROM result_cache WHERE namespace = ? AND key = ?", (self.namespace, key))
+                self._stats["expirations"] += 1
+                return None
+            return json.loads(row[0])
+        except (sqlite3.Error, ValueError) as e:
+            logger.warning(f"Result cache disk lookup failed: {str(e)}")
+            return None
+
+    def _disk_set(self, key, value, expires_at):
+        if self._db is None:
+            return
+        try:
+            self._db.execute(
+                "INSERT OR REPLACE INTO result_cache (namespace, key, value, expires_at) VALUES (?, ?, ?, ?)",
+                (self.namespace, key, json.dumps(value), expires_at)
+            )
+        except (sqlite3.Error, TypeError, ValueError) as e:
+            logger.warning(f"Result cache disk write failed: {str(e)}")
+
+    def purge_expired(self):
+        """Drop expired entries from both tiers"""
+        now = time.time()
+        with self._lock:
+            expired = [k for k, (expires_at, _) in self._entries.items()
+                       if expires_at is not None and expires_at <= now]
+            for k in expired:
+                del self._entries[k]
+            self._stats["expirations"] += len(expired)
+            if self._db is not None:
+                try:
+                    cursor = self._db.execute(
+                        "DELETE FROM result_cache WHERE namespace = ? AND expires_at IS NOT NULL AND expires_at <= ?",
+                        (self.namespace, now)
+                    )
+                    self._stats["expirations"] += max(cursor.rowcount, 0)
+                except sqlite3.Error as e:
+                    logger.warning(f"Result cache purge failed: {str(e)}")
+
+    def clear(self):
+        """Remove every entry from both tiers"""
+        with self._lock:
+            self._entries.clear()
+            if self._db is not None:
+                try:
+                    self._db.execute("DELETE FROM result_cache WHERE namespace = ?", (self.namespace,))
+                except sqlite3.Error as e:
+                    logger.warning(f"Result cache clear failed: {str(e)}")
+
+    def get_stats(self):
+        """
+        Return cache counters
+
+        Returns:
+            dict: Hit/miss/eviction counters, hit rate and current size
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats["size"] = len(self._entries)
+        lookups = stats["hits"] + stats["disk_hits"] + stats["misses"]
+        stats["hit_rate"] = (stats["hits"] + stats["disk_hits"]) / lookups if lookups else 0.0
+        stats["max_entries"] = self.max_entries
+        stats["ttl"] = self.ttl
+        stats["persistent"] = self._db is not None
+        return stats
+
+
+def get_cache(namespace, **kwargs):
+    """
+    Return the shared cache for a namespace, creating it on first use
+
+    Args:
+        namespace (str): Cache name (e.g. "summary", "credibility")
+        **kwargs: ResultCache settings used when the cache is created
+
+    Returns:
+        ResultCache: The cache instance
+    """
+    with _registry_lock:
+        if namespace not in _caches:
+            _caches[namespace] = ResultCache(namespace, **kwargs)
+        return _caches[namespace]
+
+
+def get_cache_stats():
+    """Return stats for every registered cache, keyed by namespace"""
+    with _registry_lock:
+        caches = dict(_caches)
+    return {name: cache.get_stats() for name, cache in caches.items()}
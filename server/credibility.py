@@ -1,148 +1,547 @@
+import os
 import re
+import json
 import logging
+from cache import get_cache, make_key
+from dedup import get_dedup_index
+from metrics import span
+from preprocess import prepare
+try:
+    import ahocorasick
+except ImportError:
+    # Without pyahocorasick, keyword rules are matched with compiled regexes
+    ahocorasick = None
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-def analyze_credibility(text):
+# Cache of analysis results, keyed by a hash of the exact text
+credibility_cache = get_cache("credibility")
+# Per-sentence scan results for sentence-level analysis, keyed by a hash of the sentence
+CREDIBILITY_SENTENCE_CACHE_SIZE = int(os.environ.get("CREDIBILITY_SENTENCE_CACHE_SIZE", "20000"))
+sentence_cache = get_cache("credibility_sentence", max_entries=CREDIBILITY_SENTENCE_CACHE_SIZE, copy_values=False)
+
+# Declarative rule table, evaluated in order. Each rule that fires adjusts the
+# score and adds its factor. Rule kinds:
+#   length           - fires when the text length is above/below a threshold
+#   pattern          - fires when any of a list of keywords or a regex occurs
+#                      (optionally only within the first `window` characters)
+#   sentence_length  - fires when the average sentence length is above a threshold
+#   always           - always adds its factor
+CREDIBILITY_RULES = [
+    {
+        "name": "long_article", "kind": "length", "above": 3000,
+        "score": 5, "type": "positive", "text": "Article length indicates depth of coverage"
+    },
+    {
+        "name": "short_article", "kind": "length", "below": 1000,
+        "score": -5, "type": "negative", "text": "Brief article may lack comprehensive details"
+    },
+    {
+        "name": "statistics", "kind": "pattern", "pattern": r'\d+(\.\d+)?(%|percent|percentage)',
+        "score": 7, "type": "positive", "text": "Contains statistical information"
+    },
+    {
+        "name": "quotes", "kind": "pattern", "pattern": r'"[^"]*"',
+        "score": 8, "type": "positive", "text": "Contains direct quotes from sources"
+    },
+    {
+        "name": "citations", "kind": "pattern",
+        "keywords": ["according to", "said", "reported by", "cited", "source", "study"],
+        "score": 10, "type": "positive", "text": "References external sources or studies"
+    },
+    {
+        "name": "sensationalism", "kind": "pattern",
+        "keywords": ["shocking", "unbelievable", "mind-blowing", "jaw-dropping", "you won't believe",
+                     "incredible", "amazing", "outrageous", "scandal"],
+        "score": -15, "type": "negative", "text": "Contains sensationalist language"
+    },
+    {
+        "name": "balanced_perspective", "kind": "pattern",
+        "keywords": ["however", "on the other hand", "alternatively", "in contrast", "while", "despite",
+                     "nevertheless", "conversely", "critics", "proponents"],
+        "score": 8, "type": "positive", "text": "Presents multiple perspectives"
+    },
+    {
+        "name": "hedging", "kind": "pattern",
+        "keywords": ["may", "might", "could", "possibly", "potentially", "suggests", "indicates",
+                     "appears", "likely"],
+        "score": 5, "type": "positive", "text": "Uses appropriately cautious language"
+    },
+    {
+        "name": "certainty", "kind": "pattern",
+        "keywords": ["absolutely", "definitely", "undoubtedly", "without question", "100 percent",
+                     "guaranteed", "proven fact", "irrefutable"],
+        "score": -8, "type": "negative", "text": "Makes claims of absolute certainty"
+    },
+    {
+        "name": "complex_sentences", "kind": "sentence_length", "above": 100,
+        "score": -5, "type": "negative", "text": "Complex sentence structure may obscure meaning"
+    },
+    {
+        "name": "academic_language", "kind": "pattern",
+        "keywords": ["methodology", "analysis", "hypothesis", "conclusion", "investigation",
+                     "evidence-based", "peer-reviewed", "correlation", "causation", "significant",
+                     "variable"],
+        "score": 7, "type": "positive", "text": "Uses technical or academic language"
+    },
+    {
+        "name": "clickbait", "kind": "pattern", "window": 500,
+        "keywords": ["what happens next", "won't believe", "changed my life", "mind-blowing",
+                     "trending now", "gone wrong"],
+        "pattern": r'top \d+',
+        "score": -12, "type": "negative", "text": "Contains clickbait-style patterns"
+    },
+    {
+        "name": "temporal_references", "kind": "pattern",
+        "keywords": ["january", "february", "march", "april", "may", "june", "july", "august",
+                     "september", "october", "november", "december", "yesterday", "today",
+                     "last week", "this week"],
+        "score": 5, "type": "positive", "text": "Includes temporal references for context"
+    },
+    {
+        "name": "disclaimer", "kind": "always",
+        "score": 0, "type": "neutral", "text": "Analysis uses text patterns to estimate credibility"
+    },
+]
+
+# Optional JSON file replacing the built-in rule table
+RULES_FILE = os.environ.get("CREDIBILITY_RULES_FILE", "")
+
+# Sentence terminators used for the readability heuristic
+SENTENCE_TERMINATORS = ".!?"
+TERMINATOR_PATTERN = re.compile(r'[.!?]+')
+# Candidate sentence boundaries for sentence-level analysis: terminators followed by whitespace
+SENTENCE_BOUNDARY = re.compile(r'[.!?]+(?=\s)')
+
+
+def _keywords_to_pattern(keywords):
+    """Compile a keyword list into a trie-shaped regex, so alternatives sharing a prefix are tried once"""
+    trie = {}
+    for word in keywords:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def build(node):
+        terminal = "" in node
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        if terminal:
+            # A keyword ends here; a longer keyword may also continue from this node
+            return "(?:" + body + ")?"
+        return body
+
+    return build(trie)
+
+
+def _count_sentences(text, terminators):
+    """
+    Count non-empty sentences given the (start, end) spans of the terminators,
+    matching len([s for s in re.split(r'[.!?]+', text) if s.strip()])
+    """
+    count = 0
+    previous = 0
+    for start, end in terminators:
+        if start > previous and not text[previous:start].isspace():
+            count += 1
+        previous = end
+    if previous < len(text) and not text[previous:].isspace():
+        count += 1
+    return count
+
+
+def split_sentence_spans(text):
+    """
+    Split text into sentences for sentence-level analysis
+
+    Sentences end after a run of terminators followed by whitespace, but never
+    inside a double-quoted passage, so no rule match (including a quote
+    spanning several sentences) crosses a boundary. The whitespace after a
+    boundary starts the next sentence, so the spans cover the whole text.
+
+    Args:
+        text (str): Article text
+
+    Returns:
+        list: (start, end) character offsets of each sentence
+    """
+    spans = []
+    start = 0
+    position = 0
+    quotes = 0
+    for match in SENTENCE_BOUNDARY.finditer(text):
+        quotes += text.count('"', position, match.end())
+        position = match.end()
+        if quotes % 2 == 0:
+            spans.append((start, match.end()))
+            start = match.end()
+    if start < len(text):
+        spans.append((start, len(text)))
+    return spans
+
+
+class CompiledRules:
+    """
+    A rule table compiled once into a scanner.
+
+    When pyahocorasick is installed, every keyword of every rule (plus the
+    sentence terminators) goes into one Aho-Corasick automaton, so a single
+    pass over the text yields all keyword hits. Regex rules, and keyword rules
+    when the automaton is unavailable, are matched with precompiled patterns.
+
+    Args:
+        rules (list): Rule definitions in the CREDIBILITY_RULES format
+    """
+
+    def __init__(self, rules):
+        self.rules = rules
+        # Identifies the rule table, so cached results never outlive a rule change
+        self.version = make_key(json.dumps(rules, sort_keys=True))
+        self._automaton = ahocorasick.Automaton() if ahocorasick else None
+        self._regexes = []     # (rule name, compiled pattern, window)
+        self._windows = {}     # rule name -> window, for windowed rules
+
+        for rule in rules:
+            if rule["kind"] != "pattern":
+                continue
+            name = rule["name"]
+            window = rule.get("window")
+            if window is not None:
+                self._windows[name] = window
+
+            if rule.get("keywords"):
+                if self._automaton is not None:
+                    for word in rule["keywords"]:
+                        if word in self._automaton:
+                            self._automaton.get(word)[1].append(name)
+                        else:
+                            self._automaton.add_word(word, (len(word), [name]))
+                else:
+                    self._regexes.append((name, re.compile(_keywords_to_pattern(rule["keywords"])), window))
+            if rule.get("pattern"):
+                self._regexes.append((name, re.compile(rule["pattern"]), window))
+
+        if self._automaton is not None:
+            for char in SENTENCE_TERMINATORS:
+                self._automaton.add_word(char, (1, None))
+            self._automaton.make_automaton()
+
+    def scan(self, text, apply_windows=True):
+        """
+        Collect every rule hit in the text
+
+        Args:
+            text (str): Lowercased article text
+            apply_windows (bool): Limit rules with a window to the start of the text
+                (off when scanning a sentence from the middle of an article)
+
+        Returns:
+            tuple: (dict of rule name -> sorted, non-overlapping (start, end) offsets,
+                number of non-empty sentences)
+        """
+        hits = {rule["name"]: [] for rule in self.rules if rule["kind"] == "pattern"}
+
+        if self._automaton is not None:
+            terminators = []
+            for end, (length, names) in self._automaton.iter(text):
+                hit = (end - length + 1, end + 1)
+                if names is None:
+                    terminators.append(hit)
+                else:
+                    for name in names:
+                        hits[name].append(hit)
+        else:
+            terminators = [m.span() for m in TERMINATOR_PATTERN.finditer(text)]
+
+        for name, pattern, window in self._regexes:
+            endpos = len(text) if window is None or not apply_windows else min(window, len(text))
+            hits[name].extend(m.span() for m in pattern.finditer(text, 0, endpos))
+
+        for name, spans in hits.items():
+            window = self._windows.get(name) if apply_windows else None
+            if window is not None:
+                # Rules limited to the start of the text behave as if the text were truncated
+                spans = [hit for hit in spans if hit[1] <= window]
+            spans.sort()
+            # Within a rule, keep hits non-overlapping (as re.findall would report them)
+            kept = []
+            last_end = -1
+            for hit in spans:
+                if hit[0] >= last_end:
+                    kept.append(hit)
+                    last_end = hit[1] if hit[1] > hit[0] else hit[0] + 1
+            hits[name] = kept
+
+        return hits, _count_sentences(text, terminators)
+
+    def _detect(self, text):
+        """
+        Find which pattern rules fire, stopping each search at its first match
+        when no automaton is available
+
+        Returns:
+            tuple: (set of rule names that matched, number of non-empty sentences)
+        """
+        if self._automaton is not None:
+            hits, sentence_count = self.scan(text)
+            return {name for name, spans in hits.items() if spans}, sentence_count
+
+        matched = set()
+        for name, pattern, window in self._regexes:
+            if name in matched:
+                continue
+            endpos = len(text) if window is None else min(window, len(text))
+            if pattern.search(text, 0, endpos):
+                matched.add(name)
+        terminators = [m.span() for m in TERMINATOR_PATTERN.finditer(text)]
+        return matched, _count_sentences(text, terminators)
+
+    def evaluate(self, text):
+        """
+        Score a text against the rule table
+
+        Args:
+            text (str or PreparedText): Article text
+
+        Returns:
+            dict: Score (0-100) and the list of factors
+        """
+        # Normalize text for analysis (reusing the lowercased copy of a prepared text)
+        text = prepare(text).lowered
+        matched, sentence_count = self._detect(text)
+        return self._score(matched, sentence_count, len(text))
+
+    def _sentence_hits(self, sentence, start):
+        """
+        Rule hits in one lowercased sentence starting at offset start, with windows applied
+
+        Returns:
+            tuple: (dict of rule name -> (start, end) offsets relative to the sentence, number of sentences)
+        """
+        cache_key = make_key(sentence, rules=self.version)
+        cached = sentence_cache.get(cache_key)
+        if cached is None:
+            hits, count = self.scan(sentence, apply_windows=False)
+            # Stored as tuples, since cached values are shared rather than copied
+            cached = (tuple((name, tuple(spans)) for name, spans in hits.items() if spans), count)
+            sentence_cache.set(cache_key, cached)
+
+        hits = dict(cached[0])
+        for name, window in self._windows.items():
+            if name not in hits:
+                continue
+            if start >= window:
+                del hits[name]
+            elif start + len(sentence) > window:
+                # The window ends inside this sentence: match as the whole-text scan does
+                limit = window - start
+                spans = [tuple(hit) for hit in hits[name] if hit[1] <= limit]
+                for rule_name, pattern, _ in self._regexes:
+                    if rule_name == name:
+                        spans.extend(m.span() for m in pattern.finditer(sentence, 0, limit))
+                spans = sorted(set(spans))
+                kept, last_end = [], -1
+                for hit in spans:
+                    if hit[0] >= last_end:
+                        kept.append(hit)
+                        last_end = hit[1] if hit[1] > hit[0] else hit[0] + 1
+                hits[name] = kept
+        return {name: spans for name, spans in hits.items() if spans}, cached[1]
+
+    def evaluate_sentences(self, text):
+        """
+        Score a text sentence by sentence, reporting where each factor occurs
+
+        Gives the same score and factors as evaluate. Each sentence's scan is
+        cached by its hash, so re-analyzing an edited or extended article only
+        scans the sentences that changed.
+
+        Args:
+            text (str or PreparedText): Article text
+
+        Returns:
+            dict: Score (0-100), the list of factors, and per-sentence
+                {"start", "end", "hits": {rule name: [[start, end], ...]}} with offsets into text
+        """
+        lowered = prepare(text).lowered
+        matched = set()
+        sentence_count = 0
+        sentences = []
+        for start, end in split_sentence_spans(lowered):
+            hits, count = self._sentence_hits(lowered[start:end], start)
+            sentence_count += count
+            matched.update(hits)
+            sentences.append({
+                "start": start,
+                "end": end,
+                "hits": {name: [[start + s, start + e] for s, e in spans] for name, spans in hits.items()}
+            })
+
+        result = self._score(matched, sentence_count, len(lowered))
+        result["sentences"] = sentences
+        return result
+
+    def _score(self, matched, sentence_count, length):
+        """Apply the rule table to the pattern rules that matched, the sentence count and the text length"""
+        factors = []
+        score = 50  # Start with a neutral score
+
+        for rule in self.rules:
+            kind = rule["kind"]
+            if kind == "length":
+                fired = (("above" in rule and length > rule["above"]) or
+                         ("below" in rule and length < rule["below"]))
+            elif kind == "pattern":
+                fired = rule["name"] in matched
+            elif kind == "sentence_length":
+                fired = length / max(sentence_count, 1) > rule["above"]
+            elif kind == "always":
+                fired = True
+            else:
+                raise ValueError(f"Unknown credibility rule kind: {kind}")
+
+            if fired:
+                score += rule["score"]
+                factors.append({
+                    "type": rule["type"],
+                    "text": rule["text"]
+                })
+
+        # Ensure score is within 0-100 range
+        score = max(0, min(100, score))
+
+        return {
+            "score": round(score),
+            "factors": factors
+        }
+
+
+def compile_rules(rules):
+    """
+    Compile a rule table for use with analyze_credibility
+
+    Args:
+        rules (list): Rule definitions in the CREDIBILITY_RULES format
+
+    Returns:
+        CompiledRules: The compiled rule set
+    """
+    return CompiledRules(rules)
+
+
+def load_rules(path):
+    """
+    Load a rule table from a JSON file
+
+    Args:
+        path (str): Path to a JSON list of rule definitions
+
+    Returns:
+        list: The rule definitions
+    """
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+if RULES_FILE:
+    logger.info(f"Loading credibility rules from {RULES_FILE}")
+    CREDIBILITY_RULES = load_rules(RULES_FILE)
+
+# Rule set used when no custom rules are given, compiled once at import
+default_rules = compile_rules(CREDIBILITY_RULES)
+
+
+def scan_credibility(text, rules=None):
+    """
+    Find every credibility factor hit in the text
+
+    Args:
+        text (str or PreparedText): Article text
+        rules (CompiledRules): Rule set to use instead of the default one
+
+    Returns:
+        dict: Rule name -> {"count": number of hits, "offsets": list of (start, end)}
+    """
+    rules = rules or default_rules
+    hits, _ = rules.scan(prepare(text).lowered)
+    return {
+        name: {"count": len(spans), "offsets": spans}
+        for name, spans in hits.items()
+    }
+
+
+def analyze_credibility(text, rules=None):
     """
     Analyze the credibility of an article based on various textual factors.
     Returns a score (0-100) and a list of factors.
+
+    Takes a str or a PreparedText; passing the PreparedText the summarizer
+    used shares its normalized and lowercased copies.
     """
-    factors = []
-    score = 50  # Start with a neutral score
-    
-    # Normalize text for analysis
-    text = text.lower()
-    
-    # 1. Check text length (longer articles tend to have more depth)
-    if len(text) > 3000:
-        score += 5
-        factors.append({
-            "type": "positive",
-            "text": "Article length indicates depth of coverage"
-        })
-    elif len(text) < 1000:
-        score -= 5
-        factors.append({
-            "type": "negative",
-            "text": "Brief article may lack comprehensive details"
-        })
-    
-    # 2. Check for statistical references
-    stats_pattern = r'\d+(\.\d+)?(%|percent|percentage)'
-    if re.search(stats_pattern, text):
-        score += 7
-        factors.append({
-            "type": "positive",
-            "text": "Contains statistical information"
-        })
-    
-    # 3. Check for quotes (indicates sourcing)
-    quotes_pattern = r'"([^"]*)"'
-    quotes = re.findall(quotes_pattern, text)
-    if quotes and len(quotes) > 0:
-        score += 8
-        factors.append({
-            "type": "positive",
-            "text": "Contains direct quotes from sources"
-        })
-    
-    # 4. Check for citation patterns
-    citation_pattern = r'(according to|said|reported by|cited|source|study)'
-    if re.search(citation_pattern, text):
-        score += 10
-        factors.append({
-            "type": "positive",
-            "text": "References external sources or studies"
-        })
-    
-    # 5. Check for sensationalist language
-    sensationalist_words = r'(shocking|unbelievable|mind-blowing|jaw-dropping|you won\'t believe|incredible|amazing|outrageous|scandal)'
-    if re.search(sensationalist_words, text):
-        score -= 15
-        factors.append({
-            "type": "negative",
-            "text": "Contains sensationalist language"
-        })
-    
-    # 6. Check for balanced perspective
-    balanced_perspective_words = r'(however|on the other hand|alternatively|in contrast|while|despite|nevertheless|conversely|critics|proponents)'
-    if re.search(balanced_perspective_words, text):
-        score += 8
-        factors.append({
-            "type": "positive",
-            "text": "Presents multiple perspectives"
-        })
-    
-    # 7. Check for hedging language (indicates scientific caution)
-    hedging_words = r'(may|might|could|possibly|potentially|suggests|indicates|appears|likely)'
-    if re.search(hedging_words, text):
-        score += 5
-        factors.append({
-            "type": "positive",
-            "text": "Uses appropriately cautious language"
-        })
-    
-    # 8. Check for excessive certainty
-    certainty_claims = r'(absolutely|definitely|undoubtedly|without question|100 percent|guaranteed|proven fact|irrefutable)'
-    if re.search(certainty_claims, text):
-        score -= 8
-        factors.append({
-            "type": "negative",
-            "text": "Makes claims of absolute certainty"
-        })
-    
-    # 9. General readability check (simple heuristic)
-    sentences = re.split(r'[.!?]+', text)
-    sentences = [s.strip() for s in sentences if s.strip()]
-    avg_sentence_length = len(text) / max(len(sentences), 1)
-    
-    if avg_sentence_length > 100:
-        score -= 5
-        factors.append({
-            "type": "negative",
-            "text": "Complex sentence structure may obscure meaning"
-        })
-    
-    # 10. Check for academic/technical terms (indicates expertise)
-    academic_terms = r'(methodology|analysis|hypothesis|conclusion|investigation|evidence-based|peer-reviewed|correlation|causation|significant|variable)'
-    if re.search(academic_terms, text):
-        score += 7
-        factors.append({
-            "type": "positive",
-            "text": "Uses technical or academic language"
-        })
-    
-    # 11. Check for clickbait title patterns
-    clickbait_patterns = r'(top \d+|what happens next|won\'t believe|changed my life|mind-blowing|trending now|gone wrong)'
-    if re.search(clickbait_patterns, text[:500]):  # Check mainly in the beginning
-        score -= 12
-        factors.append({
-            "type": "negative",
-            "text": "Contains clickbait-style patterns"
-        })
-    
-    # 12. Check for date references (timeliness)
-    date_patterns = r'(january|february|march|april|may|june|july|august|september|october|november|december|yesterday|today|last week|this week)'
-    if re.search(date_patterns, text, re.IGNORECASE):
-        score += 5
-        factors.append({
-            "type": "positive",
-            "text": "Includes temporal references for context"
-        })
-    
-    # Add neutral information factor
-    factors.append({
-        "type": "neutral",
-        "text": "Analysis uses text patterns to estimate credibility"
-    })
-    
-    # Ensure score is within 0-100 range
-    score = max(0, min(100, score))
-    
-    return {
-        "score": round(score),
-        "factors": factors
-    }
\ No newline at end of file
+    if rules is not None:
+        return rules.evaluate(text)
+
+    with span("credibility"):
+        document = prepare(text)
+        # Reuse the result if this exact text was analyzed before
+        cache_key = make_key(document.raw, rules=default_rules.version)
+        cached = credibility_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+        # Near-duplicates of an article reuse its analysis. Hashing costs more than
+        # the analysis itself, so only texts the summarizer already hashed are looked up.
+        index = get_dedup_index()
+        if index is not None:
+            normalized = document.normalized
+            near_key = f"credibility:{default_rules.version}"
+            match = index.lookup(normalized, near_key, compute=False)
+            if match is not None:
+                credibility_cache.set(cache_key, match[0])
+                return match[0]
+
+        result = default_rules.evaluate(document)
+        credibility_cache.set(cache_key, result)
+        if index is not None:
+            index.store(normalized, near_key, result, compute=False)
+        return result
+
+
+def analyze_credibility_sentences(text, rules=None):
+    """
+    Sentence-level credibility analysis
+
+    Same score and factors as analyze_credibility, plus the rule hits of each
+    sentence with character offsets. Sentence scans are cached, so after an
+    edit only the changed sentences are scanned again.
+
+    Args:
+        text (str or PreparedText): Article text
+        rules (CompiledRules): Rule set to use instead of the default one
+
+    Returns:
+        dict: Score, factors and the list of sentences with their hits
+    """
+    with span("credibility"):
+        return (rules or default_rules).evaluate_sentences(text)
+
+
+def analyze_credibility_batch(texts, rules=None, sentences=False):
+    """
+    Analyze many documents in one call
+
+    Args:
+        texts (list): Article texts
+        rules (CompiledRules): Rule set to use instead of the default one
+        sentences (bool): Return sentence-level results (see analyze_credibility_sentences)
+
+    Returns:
+        list: One result per text, in order
+    """
+    analyze = analyze_credibility_sentences if sentences else analyze_credibility
+    return [analyze(text, rules=rules) for text in texts]
@@ -0,0 +1,379 @@
+import os
+import re
+import json
+import time
+import zlib
+import hashlib
+import logging
+import sqlite3
+import threading
+from collections import OrderedDict
+import numpy as np
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Near-duplicate settings (overridable through the environment)
+# Set to 0 to disable near-duplicate reuse
+DEDUP_ENABLED = os.environ.get("DEDUP_ENABLED", "1") == "1"
+# Estimated Jaccard similarity above which two articles count as the same story
+DEDUP_THRESHOLD = float(os.environ.get("DEDUP_THRESHOLD", "0.85"))
+# Number of MinHash permutations per signature
+DEDUP_NUM_PERM = int(os.environ.get("DEDUP_NUM_PERM", "128"))
+# Words per shingle
+DEDUP_SHINGLE_SIZE = int(os.environ.get("DEDUP_SHINGLE_SIZE", "5"))
+# Texts shorter than this many words are never matched (short texts share too many shingles by chance)
+DEDUP_MIN_WORDS = int(os.environ.get("DEDUP_MIN_WORDS", "80"))
+# Maximum number of articles kept in the index
+DEDUP_MAX_ENTRIES = int(os.environ.get("DEDUP_MAX_ENTRIES", "10000"))
+# Seconds an article stays in the index (0 disables expiry)
+DEDUP_TTL = float(os.environ.get("DEDUP_TTL", "86400"))
+# SQLite file that keeps the index across restarts; empty disables persistence
+DEDUP_DB_PATH = os.environ.get("DEDUP_DB", "")
+
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64(0xFFFFFFFF)
+WORD_PATTERN = re.compile(r"\w+")
+# Number of recent signatures kept so the summarizer and credibility analysis hash a text only once
+SIGNATURE_MEMO_SIZE = 256
+
+
+def _false_probabilities(threshold, bands, rows):
+    """Integrated false positive and false negative rates of a band layout"""
+    below = np.linspace(0.0, threshold, 101)
+    above = np.linspace(threshold, 1.0, 101)
+    false_positive = np.mean(1 - (1 - below ** rows) ** bands) * threshold
+    false_negative = np.mean((1 - above ** rows) ** bands) * (1 - threshold)
+    return false_positive, false_negative
+
+
+def optimal_bands(threshold, num_perm):
+    """
+    Pick the LSH band layout that best separates pairs around the threshold
+
+    Args:
+        threshold (float): Jaccard similarity threshold
+        num_perm (int): Signature length
+
+    Returns:
+        tuple: (bands, rows per band)
+    """
+    best, best_error = (1, num_perm), float("inf")
+    for bands in range(1, num_perm + 1):
+        rows = num_perm // bands
+        if rows == 0:
+            break
+        false_positive, false_negative = _false_probabilities(threshold, bands, rows)
+        # Missed duplicates only cost a model call, so false negatives weigh less than false positives
+        error = 0.7 * false_positive + 0.3 * false_negative
+        if error < best_error:
+            best, best_error = (bands, rows), error
+    return best
+
+
+class MinHasher:
+    """
+    MinHash signatures over word shingles
+
+    The permutations are derived from a fixed seed, so signatures are stable
+    across processes and restarts.
+
+    Args:
+        num_perm (int): Number of permutations
+        shingle_size (int): Words per shingle
+        seed (int): Seed for the permutations
+    """
+
+    def __init__(self, num_perm=DEDUP_NUM_PERM, shingle_size=DEDUP_SHINGLE_SIZE, seed=1):
+        generator = np.random.RandomState(seed)
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        self._a = generator.randint(1, 1 << 32, size=num_perm, dtype=np.uint64)
+        self._b = generator.randint(0, 1 << 32, size=num_perm, dtype=np.uint64)
+
+    def words(self, text):
+        return WORD_PATTERN.findall(text.lower())
+
+    def signature(self, words):
+        """
+        Compute the signature of a tokenized text
+
+        Args:
+            words (list): Lowercased words
+
+        Returns:
+            numpy.ndarray: uint32 array of length num_perm
+        """
+        size = self.shingle_size
+        shingles = {' '.join(words[i:i + size]) for i in range(max(len(words) - size + 1, 1))}
+        hashes = np.fromiter((zlib.crc32(s.encode("utf-8")) for s in shingles), dtype=np.uint64, count=len(shingles))
+        # (a * x + b) mod p, with 32-bit a, b and x so the product fits in 64 bits
+        permuted = (np.outer(self._a, hashes) + self._b[:, None]) % _MERSENNE_PRIME & _MAX_HASH
+        return permuted.min(axis=1).astype(np.uint32)
+
+
+class NearDuplicateIndex:
+    """
+    MinHash/LSH index of recently processed articles and their results
+
+    Each article is stored with its signature and a dict of results (e.g. a
+    summary per model setting). A lookup finds an indexed article whose
+    estimated Jaccard similarity passes the threshold and returns its result.
+    The index holds at most max_entries articles (least recently used are
+    dropped first), and articles expire after the TTL.
+
+    Args:
+        threshold (float): Estimated Jaccard similarity needed for a match
+        num_perm (int): Signature length
+        shingle_size (int): Words per shingle
+        min_words (int): Texts with fewer words are ignored
+        max_entries (int): Maximum number of articles kept
+        ttl (float): Seconds an article stays in the index (0 disables expiry)
+        db_path (str): SQLite file for persistence, or empty to keep the index in memory only
+    """
+
+    def __init__(self, threshold=DEDUP_THRESHOLD, num_perm=DEDUP_NUM_PERM, shingle_size=DEDUP_SHINGLE_SIZE,
+                 min_words=DEDUP_MIN_WORDS, max_entries=DEDUP_MAX_ENTRIES, ttl=DEDUP_TTL, db_path=DEDUP_DB_PATH):
+        self.threshold = threshold
+        self.min_words = min_words
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.db_path = db_path
+        self.hasher = MinHasher(num_perm, shingle_size)
+        self.bands, self.rows = optimal_bands(threshold, num_perm)
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()   # doc_id -> [expires_at, signature, results]
+        self._buckets = [{} for _ in range(self.bands)]   # band key -> set of doc_ids
+        self._signatures = OrderedDict()   # text digest -> (doc_id, signature), for recent texts
+        self._db = None
+        self._stats = {"lookups": 0, "hits": 0, "misses": 0, "stores": 0, "evictions": 0, "expirations": 0}
+
+        if db_path:
+            self._open_db()
+
+    def _open_db(self):
+        """Open the SQLite file and load the articles that have not expired"""
+        try:
+            self._db = sqlite3.connect(self.db_path, check_same_thread=False, isolation_level=None)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS near_duplicates ("
+                "doc_id TEXT PRIMARY KEY, signature BLOB NOT NULL, results TEXT NOT NULL, expires_at REAL)"
+            )
+            now = time.time()
+            self._db.execute("DELETE FROM near_duplicates WHERE expires_at IS NOT NULL AND expires_at <= ?", (now,))
+            rows = self._db.execute(
+                "SELECT doc_id, signature, results, expires_at FROM near_duplicates "
+                "ORDER BY expires_at DESC LIMIT ?", (self.max_entries,)
+            ).fetchall()
+            # Insert oldest first so the LRU order matches
+            for doc_id, signature, results, expires_at in reversed(rows):
+                signature = np.frombuffer(signature, dtype=np.uint32)
+                if len(signature) != self.hasher.num_perm:
+                    continue
+                self._insert(doc_id, signature, json.loads(results), expires_at)
+            logger.info(f"Loaded {len(self._entries)} articles into the near-duplicate index")
+        except (sqlite3.Error, ValueError) as e:
+            logger.error(f"Error opening near-duplicate index {self.db_path}: {str(e)}")
+            self._db = None
+
+    def _expiry(self):
+        return time.time() + self.ttl if self.ttl > 0 else None
+
+    def _band_keys(self, signature):
+        rows = self.rows
+        return [signature[i * rows:(i + 1) * rows].tobytes() for i in range(self.bands)]
+
+    def _fingerprint(self, text, compute=True):
+        """
+        Return (doc_id, signature) for a text, or None if it is too short to match
+
+        Recent texts are memoized, since one article is usually looked up by
+        several stages in a row. With compute=False, only a memoized
+        fingerprint is returned.
+        """
+        digest = hashlib.sha256(text.encode("utf-8", "surrogatepass")).hexdigest()
+        with self._lock:
+            if digest in self._signatures:
+                self._signatures.move_to_end(digest)
+                return self._signatures[digest]
+        if not compute:
+            return None
+        words = self.hasher.words(text)
+        memo = (digest, self.hasher.signature(words)) if len(words) >= self.min_words else None
+        with self._lock:
+            self._signatures[digest] = memo
+            while len(self._signatures) > SIGNATURE_MEMO_SIZE:
+                self._signatures.popitem(last=False)
+        return memo
+
+    def _insert(self, doc_id, signature, results, expires_at):
+        self._entries[doc_id] = [expires_at, signature, results]
+        for band, key in enumerate(self._band_keys(signature)):
+            self._buckets[band].setdefault(key, set()).add(doc_id)
+        while len(self._entries) > self.max_entries:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self._stats["evictions"] += 1
+
+    def _remove(self, doc_id):
+        _, signature, _ = self._entries.pop(doc_id)
+        for band, key in enumerate(self._band_keys(signature)):
+            bucket = self._buckets[band].get(key)
+            if bucket is not None:
+                bucket.discard(doc_id)
+                if not bucket:
+                    del self._buckets[band][key]
+        if self._db is not None:
+            try:
+                self._db.execute("DELETE FROM near_duplicates WHERE doc_id = ?", (doc_id,))
+            except sqlite3.Error as e:
+                logger.warning(f"Near-duplicate index delete failed: {str(e)}")
+
+    def _persist(self, doc_id):
+        if self._db is None:
+            return
+        expires_at, signature, results = self._entries[doc_id]
+        try:
+            self._db.execute(
+                "INSERT OR REPLACE INTO near_duplicates (doc_id, signature, results, expires_at) VALUES (?, ?, ?, ?)",
+                (doc_id, signature.tobytes(), json.dumps(results), expires_at)
+            )
+        except (sqlite3.Error, TypeError, ValueError) as e:
+            logger.warning(f"Near-duplicate index write failed: {str(e)}")
+
+    def lookup(self, text, result_key, compute=True):
+        """
+        Find a result computed for a near-duplicate of this text
+
+        Args:
+            text (str): Article text
+            result_key (str): Identifies the result and the settings it was computed with
+            compute (bool): Hash the text if it was not hashed recently; with False,
+                only texts another stage already hashed are looked up
+
+        Returns:
+            tuple: (result, similarity, doc_id of the matched article), or None if there is no match
+        """
+        fingerprint = self._fingerprint(text, compute)
+        if fingerprint is None:
+            return None
+        doc_id, signature = fingerprint
+        now = time.time()
+
+        with self._lock:
+            self._stats["lookups"] += 1
+            candidates = set()
+            for band, key in enumerate(self._band_keys(signature)):
+                candidates.update(self._buckets[band].get(key, ()))
+
+            best = None
+            for candidate in candidates:
+                expires_at, candidate_signature, results = self._entries[candidate]
+                if expires_at is not None and expires_at <= now:
+                    self._remove(candidate)
+                    self._stats["expirations"] += 1
+                    continue
+                if result_key not in results:
+                    continue
+                similarity = float(np.mean(candidate_signature == signature))
+                if similarity >= self.threshold and (best is None or similarity > best[1]):
+                    best = (candidate, similarity)
+
+            if best is None:
+                self._stats["misses"] += 1
+                return None
+            self._stats["hits"] += 1
+            self._entries.move_to_end(best[0])
+            result = self._entries[best[0]][2][result_key]
+        if best[0] != doc_id:
+            logger.info(f"Reusing {result_key.split(':')[0]} from a near-duplicate article "
+                        f"(similarity {best[1]:.2f})")
+        return result, best[1], best[0]
+
+    def store(self, text, result_key, result, compute=True):
+        """
+        Record a result computed for a text
+
+        Args:
+            text (str): Article text
+            result_key (str): Identifies the result and the settings it was computed with
+            result: JSON-serializable result
+            compute (bool): Hash the text if it was not hashed recently (see lookup)
+        """
+        fingerprint = self._fingerprint(text, compute)
+        if fingerprint is None:
+            return
+        doc_id, signature = fingerprint
+        with self._lock:
+            self._stats["stores"] += 1
+            entry = self._entries.get(doc_id)
+            if entry is None:
+                self._insert(doc_id, signature, {result_key: result}, self._expiry())
+            else:
+                entry[0] = self._expiry()
+                entry[2][result_key] = result
+                self._entries.move_to_end(doc_id)
+            self._persist(doc_id)
+
+    def purge_expired(self):
+        """Drop expired articles"""
+        now = time.time()
+        with self._lock:
+            expired = [doc_id for doc_id, (expires_at, _, _) in self._entries.items()
+                       if expires_at is not None and expires_at <= now]
+            for doc_id in expired:
+                self._remove(doc_id)
+            self._stats["expirations"] += len(expired)
+
+    def clear(self):
+        """Remove every article"""
+        with self._lock:
+            self._entries.clear()
+            self._buckets = [{} for _ in range(self.bands)]
+            self._signatures.clear()
+            if self._db is not None:
+                try:
+                    self._db.execute("DELETE FROM near_duplicates")
+                except sqlite3.Error as e:
+                    logger.warning(f"Near-duplicate index clear failed: {str(e)}")
+
+    def get_stats(self):
+        """
+        Return index counters
+
+        Returns:
+            dict: Lookup/hit/eviction counters, hit rate, size and settings
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats["size"] = len(self._entries)
+        stats["hit_rate"] = stats["hits"] / stats["lookups"] if stats["lookups"] else 0.0
+        stats["threshold"] = self.threshold
+        stats["bands"] = self.bands
+        stats["rows"] = self.rows
+        stats["max_entries"] = self.max_entries
+        stats["ttl"] = self.ttl
+        stats["persistent"] = self._db is not None
+        return stats
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_dedup_index():
+    """
+    Return the shared near-duplicate index, or None if it is disabled
+
+    Returns:
+        NearDuplicateIndex: The index instance
+    """
+    global _index
+    if not DEDUP_ENABLED:
+        return None
+    with _index_lock:
+        if _index is None:
+            _index = NearDuplicateIndex()
+        return _index
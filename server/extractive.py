@@ -0,0 +1,241 @@
+import os
+import re
+import logging
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Ranking settings (overridable through the environment)
+DEFAULT_NUM_SENTENCES = int(os.environ.get("EXTRACTIVE_NUM_SENTENCES", "5"))
+# Trade-off between sentence importance (1.0) and novelty (0.0) when picking sentences
+MMR_LAMBDA = float(os.environ.get("EXTRACTIVE_MMR_LAMBDA", "0.7"))
+# Share of the TextRank teleport probability given to the lead sentences of the article
+LEAD_BIAS = float(os.environ.get("EXTRACTIVE_LEAD_BIAS", "0.3"))
+# Sentences ranked per document (the first ones); keeps time and memory bounded on very long texts
+MAX_SENTENCES = int(os.environ.get("EXTRACTIVE_MAX_SENTENCES", "400"))
+DAMPING = 0.85
+# Graphs up to this many sentences are solved directly, larger ones by power iteration
+TEXTRANK_DIRECT_MAX = 100
+TEXTRANK_MAX_ITERATIONS = 100
+TEXTRANK_TOLERANCE = 1e-6
+TEXTRANK_CHECK_EVERY = 5
+# Similarities below this are dropped, keeping the sentence graph sparse
+MIN_SIMILARITY = 0.05
+# Shared terms used for similarities; keeps the dense (sentences x terms) block small
+SIMILARITY_MAX_TERMS = 4096
+
+# Sentence ends: terminal punctuation (plus closing quotes) followed by a capitalized word or number
+SENTENCE_END_PATTERN = re.compile(r'[.!?]+["\'”’)]*\s+(?=["\'“‘(]?[A-Z0-9])')
+ABBREVIATIONS = frozenset("""
+mr mrs ms dr prof sr jr st mt ft gov sen rep gen col lt sgt capt rev inc co corp ltd vs etc
+jan feb mar apr jun jul aug sep sept oct nov dec no
+""".split())
+WORD_PATTERN = re.compile(r"[a-z0-9]+(?:'[a-z]+)?")
+MIN_SENTENCE_WORDS = 4
+
+STOPWORDS = frozenset("""
+a about above after again against all am an and any are as at be because been before being
+below between both but by can did do does doing down during each few for from further had has
+have having he her here hers herself him himself his how i if in into is it its itself just me
+more most my myself no nor not now of off on once only or other our ours ourselves out over own
+same she should so some such than that the their theirs them themselves then there these they
+this those through to too under until up very was we were what when where which while who whom
+why will with you your yours yourself yourselves also would could said says one two new
+""".split())
+
+
+def split_sentences(text):
+    """
+    Split text into sentences on '.', '!' and '?', keeping the punctuation
+
+    Periods after common abbreviations and initials ("Dr.", "U.S.", "a.m.")
+    do not end a sentence.
+
+    Args:
+        text (str): Text to split
+
+    Returns:
+        list: Sentences with whitespace normalized
+    """
+    sentences = []
+    start = 0
+    for match in SENTENCE_END_PATTERN.finditer(text):
+        if text[match.start()] == '.':
+            word = text[text.rfind(' ', start, match.start()) + 1:match.start()].lower()
+            if word in ABBREVIATIONS or len(word) == 1 or '.' in word:
+                continue
+        sentences.append(text[start:match.end()])
+        start = match.end()
+    sentences.append(text[start:])
+    sentences = (' '.join(s.split()) for s in sentences)
+    return [s for s in sentences if s]
+
+
+def _sentence_vectors(sentences):
+    """
+    Build L2-normalized TF-IDF vectors for the sentences of one document
+
+    Returns:
+        tuple: (data, indices, indptr) of a CSR (sentences x terms) matrix, or None
+            if no sentence has content words
+    """
+    vocabulary = {}
+    rows, cols = [], []
+    for i, sentence in enumerate(sentences):
+        ids = [vocabulary.setdefault(word, len(vocabulary))
+               for word in WORD_PATTERN.findall(sentence.lower()) if word not in STOPWORDS]
+        rows.extend([i] * len(ids))
+        cols.extend(ids)
+    if not vocabulary:
+        return None
+
+    # Count each (sentence, term) pair once; sorting the flattened positions gives CSR order
+    size = len(vocabulary)
+    flat = np.asarray(rows, dtype=np.int64) * size + np.asarray(cols, dtype=np.int64)
+    positions, counts = np.unique(flat, return_counts=True)
+    row_of, indices = np.divmod(positions, size)
+    indptr = np.concatenate(([0], np.cumsum(np.bincount(row_of, minlength=len(sentences)))))
+
+    # Sublinear term frequency and smoothed inverse sentence frequency
+    document_frequency = np.bincount(indices, minlength=size)
+    idf = np.log((1.0 + len(sentences)) / (1.0 + document_frequency)) + 1.0
+    data = np.log1p(counts) * idf[indices]
+    norms = np.sqrt(np.bincount(row_of, weights=data * data, minlength=len(sentences)))
+    data /= np.maximum(norms, 1e-9)[row_of]
+    return data, indices, indptr
+
+
+def _cosine_similarity(vectors, n):
+    """
+    Pairwise dot products of CSR row vectors, as a dense (n x n) matrix
+
+    Terms that occur in a single sentence add nothing between sentences, so
+    only shared terms are expanded into a dense (n x terms) block and
+    multiplied. Beyond SIMILARITY_MAX_TERMS shared terms, the most widely
+    shared ones are kept, which bounds memory and time for any input.
+    """
+    data, indices, indptr = vectors
+    row_of = np.repeat(np.arange(n), np.diff(indptr))
+    document_frequency = np.bincount(indices)
+    shared = np.flatnonzero(document_frequency > 1)
+    if len(shared) > SIMILARITY_MAX_TERMS:
+        shared = np.sort(shared[np.argsort(-document_frequency[shared], kind="stable")[:SIMILARITY_MAX_TERMS]])
+
+    column = np.full(len(document_frequency), -1)
+    column[shared] = np.arange(len(shared))
+    keep = column[indices] >= 0
+    dense = np.zeros((n, len(shared)))
+    dense[row_of[keep], column[indices[keep]]] = data[keep]
+    return dense @ dense.T
+
+
+def _textrank(similarity):
+    """Score sentences with PageRank over the similarity graph, teleporting preferentially to the lead"""
+    n = similarity.shape[0]
+    out_weight = similarity.sum(axis=1, keepdims=True)
+    # Sentences without neighbours spread their score evenly
+    transition = np.where(out_weight > 0, similarity / np.maximum(out_weight, 1e-9), 1.0 / n)
+
+    lead = 1.0 / np.arange(1, n + 1)
+    teleport = (1.0 - LEAD_BIAS) / n + LEAD_BIAS * lead / lead.sum()
+
+    if n <= TEXTRANK_DIRECT_MAX:
+        # Small graphs: solving for the stationary scores is cheaper than iterating
+        return np.linalg.solve(np.eye(n) - DAMPING * transition.T, (1.0 - DAMPING) * teleport)
+
+    # Power iteration, checking for convergence every few steps; at most TEXTRANK_MAX_ITERATIONS steps
+    step = np.ascontiguousarray(DAMPING * transition.T)
+    base = (1.0 - DAMPING) * teleport
+    scores = teleport
+    for _ in range(0, TEXTRANK_MAX_ITERATIONS, TEXTRANK_CHECK_EVERY):
+        previous = scores
+        for _ in range(TEXTRANK_CHECK_EVERY):
+            scores = base + step @ scores
+        if np.abs(scores - previous).sum() < TEXTRANK_TOLERANCE:
+            break
+    return scores
+
+
+def _select_mmr(scores, similarity, count):
+    """Pick sentences by maximal marginal relevance (important, but not redundant with picks so far)"""
+    scores = scores / max(scores.max(), 1e-9)
+    selected = []
+    redundancy = np.zeros_like(scores)
+    available = np.ones(len(scores), dtype=bool)
+    for _ in range(min(count, len(scores))):
+        relevance = np.where(available, MMR_LAMBDA * scores - (1.0 - MMR_LAMBDA) * redundancy, -np.inf)
+        best = int(np.argmax(relevance))
+        selected.append(best)
+        available[best] = False
+        redundancy = np.maximum(redundancy, similarity[best])
+    return sorted(selected)
+
+
+def rank_sentences(sentences):
+    """
+    Score the sentences of one document with TextRank over TF-IDF similarities
+
+    Args:
+        sentences (list): Sentences of the document
+
+    Returns:
+        tuple: (scores, similarity matrix) as numpy arrays
+    """
+    vectors = _sentence_vectors(sentences)
+    if vectors is None:
+        return np.ones(len(sentences)) / len(sentences), np.zeros((len(sentences), len(sentences)))
+
+    similarity = _cosine_similarity(vectors, len(sentences))
+    np.fill_diagonal(similarity, 0.0)
+    similarity[similarity < MIN_SIMILARITY] = 0.0
+    return _textrank(similarity), similarity
+
+
+def summarize(text, num_sentences=DEFAULT_NUM_SENTENCES):
+    """
+    Extractive summary: the top-ranked, non-redundant sentences in their original order
+
+    Args:
+        text (str): Text to summarize
+        num_sentences (int): Number of sentences to keep
+
+    Returns:
+        str: Summary
+    """
+    sentences = split_sentences(text)
+    if len(sentences) <= num_sentences:
+        return ' '.join(sentences)
+
+    # Very short fragments (bylines, captions) make poor summary sentences
+    candidates = [i for i, s in enumerate(sentences) if len(s.split()) >= MIN_SENTENCE_WORDS]
+    if len(candidates) <= num_sentences:
+        candidates = list(range(len(sentences)))
+    # The similarity graph is quadratic in its size, so very long texts are ranked on their opening
+    candidates = candidates[:max(MAX_SENTENCES, num_sentences)]
+
+    scores, similarity = rank_sentences([sentences[i] for i in candidates])
+    picked = _select_mmr(scores, similarity, num_sentences)
+    return ' '.join(sentences[candidates[i]] for i in picked)
+
+
+def summarize_batch(texts, num_sentences=DEFAULT_NUM_SENTENCES, workers=1):
+    """
+    Extractive summaries for many documents
+
+    Args:
+        texts (list): Texts to summarize
+        num_sentences (int): Number of sentences to keep per text
+        workers (int): Processes to spread large batches over (1 runs in this process)
+
+    Returns:
+        list: One summary per text
+    """
+    if workers <= 1 or len(texts) < 2 * workers:
+        return [summarize(text, num_sentences) for text in texts]
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        chunksize = max(1, len(texts) // (workers * 4))
+        return list(executor.map(summarize, texts, [num_sentences] * len(texts), chunksize=chunksize))
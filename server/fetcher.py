@@ -0,0 +1,163 @@
+import os
+import re
+import logging
+import threading
+from urllib.parse import urlsplit
+from concurrent.futures import ThreadPoolExecutor
+import requests
+from requests.adapters import HTTPAdapter
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Fetch settings (overridable through the environment)
+CONNECT_TIMEOUT = float(os.environ.get("FETCH_CONNECT_TIMEOUT", "3.05"))
+READ_TIMEOUT = float(os.environ.get("FETCH_READ_TIMEOUT", "10"))
+MAX_RESPONSE_BYTES = int(os.environ.get("FETCH_MAX_BYTES", str(5 * 1024 * 1024)))
+PER_HOST_LIMIT = int(os.environ.get("FETCH_PER_HOST_LIMIT", "4"))
+POOL_SIZE = int(os.environ.get("FETCH_POOL_SIZE", "32"))
+
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+}
+
+CHUNK_SIZE = 64 * 1024
+META_CHARSET_PATTERN = re.compile(rb'<meta[^>]+charset=["\']?([A-Za-z0-9_\-]+)', re.IGNORECASE)
+
+_session = None
+_session_pid = None
+_host_limits = {}
+_lock = threading.Lock()
+
+
+class FetchError(Exception):
+    """Raised when a page cannot be fetched"""
+
+
+def get_session():
+    """
+    Return the shared keep-alive session, creating it on first use (and again after a fork)
+
+    Returns:
+        requests.Session: Session with a pooled connection adapter
+    """
+    global _session, _session_pid
+    with _lock:
+        if _session is None or _session_pid != os.getpid():
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            session.headers.update(DEFAULT_HEADERS)
+            _session = session
+            _session_pid = os.getpid()
+            _host_limits.clear()
+        return _session
+
+
+def _host_semaphore(url):
+    """Return the semaphore limiting concurrent requests to the URL's host"""
+    host = urlsplit(url).netloc.lower()
+    with _lock:
+        if host not in _host_limits:
+            _host_limits[host] = threading.BoundedSemaphore(PER_HOST_LIMIT)
+        return _host_limits[host]
+
+
+def fetch_url(url, headers=None, max_bytes=MAX_RESPONSE_BYTES, timeout=(CONNECT_TIMEOUT, READ_TIMEOUT)):
+    """
+    Download a page over the shared connection pool
+
+    Args:
+        url (str): URL to fetch
+        headers (dict): Extra request headers
+        max_bytes (int): Largest response body accepted
+        timeout (tuple): (connect, read) timeouts in seconds
+
+    Returns:
+        dict: status, final url, response headers and the raw body bytes
+
+    Raises:
+        FetchError: On network errors, error status codes or oversized responses
+    """
+    session = get_session()
+    with _host_semaphore(url):
+        try:
+            with session.get(url, headers=headers, timeout=timeout, stream=True) as response:
+                if response.status_code >= 400:
+                    raise FetchError(f"Failed to fetch URL, status code: {response.status_code}")
+
+                declared = response.headers.get('Content-Length')
+                if declared and declared.isdigit() and int(declared) > max_bytes:
+                    raise FetchError(f"Response too large ({declared} bytes)")
+
+                chunks = []
+                size = 0
+                for chunk in response.iter_content(CHUNK_SIZE):
+                    size += len(chunk)
+                    if size > max_bytes:
+                        raise FetchError(f"Response too large (over {max_bytes} bytes)")
+                    chunks.append(chunk)
+
+                return {
+                    "status": response.status_code,
+                    "url": response.url,
+                    "headers": response.headers,
+                    "content": b"".join(chunks),
+                }
+        except requests.RequestException as e:
+            raise FetchError(f"Failed to fetch URL: {str(e)}")
+
+
+def fetch_many(urls, max_workers=8, **kwargs):
+    """
+    Fetch several URLs concurrently (still subject to the per-host limit)
+
+    Args:
+        urls (list): URLs to fetch
+        max_workers (int): Number of concurrent downloads
+        **kwargs: Passed to fetch_url
+
+    Returns:
+        list: One result dict per URL, or the FetchError raised for it
+    """
+    def fetch_one(url):
+        try:
+            return fetch_url(url, **kwargs)
+        except FetchError as e:
+            return e
+
+    if not urls:
+        return []
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(urls))) as executor:
+        return list(executor.map(fetch_one, urls))
+
+
+def decode_html(page):
+    """
+    Decode a fetched page body to text
+
+    Uses the charset from the Content-Type header, then a <meta> charset, then UTF-8.
+
+    Args:
+        page (dict): Result of fetch_url
+
+    Returns:
+        str: Decoded HTML
+    """
+    encoding = None
+    content_type = page["headers"].get('Content-Type', '')
+    match = re.search(r'charset=["\']?([A-Za-z0-9_\-]+)', content_type, re.IGNORECASE)
+    if match:
+        encoding = match.group(1)
+    else:
+        match = META_CHARSET_PATTERN.search(page["content"][:4096])
+        if match:
+            encoding = match.group(1).decode('ascii')
+
+    try:
+        return page["content"].decode(encoding or 'utf-8', errors='replace')
+    except LookupError:
+        return page["content"].decode('utf-8', errors='replace')
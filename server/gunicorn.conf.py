@@ -0,0 +1,42 @@
+"""
+Gunicorn configuration for the Flask server
+Run with: gunicorn -c gunicorn.conf.py app:app
+"""
+
+import os
+
+bind = os.environ.get("GUNICORN_BIND", "0.0.0.0:5000")
+workers = int(os.environ.get("GUNICORN_WORKERS", "2"))
+threads = int(os.environ.get("GUNICORN_THREADS", "4"))
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", "120"))
+
+# With GUNICORN_PRELOAD=1 the app (and the model) is loaded once in the master
+# before forking, so workers share the weights copy-on-write instead of each
+# loading their own copy. Loading has to finish before the fork, so it is done
+# eagerly rather than on a background thread.
+preload_app = os.environ.get("GUNICORN_PRELOAD", "0") == "1"
+if preload_app:
+    os.environ.setdefault("MODEL_LOAD_MODE", "eager")
+
+# With MODEL_POOL_SIZE > 0 the model runs in a separate pool of processes
+# (see model_pool.py) and the web workers only hold the tokenizer. The pool is
+# started here, before the app is loaded or workers are forked, so they all
+# inherit its address. MODEL_POOL_ADDRESS is exported by start_pool, which
+# keeps a config reload from starting a second pool.
+_model_pool = None
+if int(os.environ.get("MODEL_POOL_SIZE", "0")) > 0 and not os.environ.get("MODEL_POOL_ADDRESS"):
+    from model_pool import start_pool
+    _model_pool = start_pool()
+
+
+def post_worker_init(worker):
+    # Start the job workers right away so jobs queued before a restart resume
+    # without waiting for the first request
+    from app import job_queue
+    if job_queue is not None:
+        job_queue.start()
+
+
+def on_exit(server):
+    if _model_pool is not None:
+        _model_pool.terminate()
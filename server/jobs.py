@@ -0,0 +1,349 @@
+import os
+import json
+import time
+import uuid
+import logging
+import sqlite3
+import threading
+import requests
+from cache import make_key
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# SQLite file holding the job queue, so queued jobs and results survive restarts
+JOBS_DB_PATH = os.environ.get(
+    "JOBS_DB",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "jobs.db")
+)
+# Worker threads per server process that run queued jobs
+JOBS_WORKERS = int(os.environ.get("JOBS_WORKERS", "2"))
+# Queued jobs allowed before new submissions are rejected
+JOBS_MAX_QUEUED = int(os.environ.get("JOBS_MAX_QUEUED", "200"))
+# Seconds finished jobs (and their results) are kept
+JOBS_RESULT_TTL = float(os.environ.get("JOBS_RESULT_TTL", "86400"))
+# A running job whose lease has not been renewed for this long is assumed lost (e.g. a killed worker) and requeued
+JOBS_LEASE_SECONDS = float(os.environ.get("JOBS_LEASE_SECONDS", "900"))
+# Times a job is started before it is marked as failed
+JOBS_MAX_ATTEMPTS = int(os.environ.get("JOBS_MAX_ATTEMPTS", "3"))
+# Webhook delivery: request timeout and attempts
+JOBS_WEBHOOK_TIMEOUT = float(os.environ.get("JOBS_WEBHOOK_TIMEOUT", "10"))
+JOBS_WEBHOOK_ATTEMPTS = int(os.environ.get("JOBS_WEBHOOK_ATTEMPTS", "3"))
+
+# Seconds an idle worker waits before checking the database for jobs queued by other processes
+POLL_INTERVAL = 1.0
+# Leases of running jobs are renewed this many times per lease period
+HEARTBEATS_PER_LEASE = 3
+ACTIVE_STATUSES = ("queued", "running")
+
+
+class JobQueueFullError(Exception):
+    """Raised when the job queue has reached its maximum number of queued jobs"""
+
+
+class JobQueue:
+    """
+    Persistent queue of summarization jobs, run by background worker threads
+
+    Jobs are stored in SQLite, so several server processes can share one
+    queue and jobs survive restarts. Submitting a request identical to a job
+    that is still queued or running returns that job instead of a new one.
+    Worker threads start on first use in each process (see start).
+
+    A running job holds a lease that a heartbeat thread renews. If the lease
+    lapses, the job is requeued, and its previous run can no longer record
+    progress or a result.
+
+    Args:
+        handler (callable): Runs a job; takes (request dict, progress callback) and returns a JSON-serializable result
+        db_path (str): SQLite file holding the queue
+        workers (int): Worker threads in this process
+        max_queued (int): Queued jobs allowed before submit() rejects
+        result_ttl (float): Seconds finished jobs are kept
+    """
+
+    def __init__(self, handler, db_path=JOBS_DB_PATH, workers=JOBS_WORKERS, max_queued=JOBS_MAX_QUEUED,
+                 result_ttl=JOBS_RESULT_TTL):
+        self.handler = handler
+        self.db_path = db_path
+        self.workers = workers
+        self.max_queued = max_queued
+        self.result_ttl = result_ttl
+        self._pid = None
+        self._local = threading.local()
+        self._wakeup = threading.Condition()
+        self._threads = []
+        self._running = {}  # job id -> attempt, for jobs running in this process
+        self._lock = threading.Lock()
+        self._stats = {"submitted": 0, "deduplicated": 0, "rejected": 0, "succeeded": 0, "failed": 0,
+                       "webhooks_failed": 0}
+
+        db = self._connection()
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            "id TEXT PRIMARY KEY, dedupe_key TEXT NOT NULL, status TEXT NOT NULL, stage TEXT, "
+            "request TEXT NOT NULL, callback_url TEXT, result TEXT, error TEXT, attempts INTEGER NOT NULL DEFAULT 0, "
+            "created_at REAL NOT NULL, started_at REAL, updated_at REAL NOT NULL, finished_at REAL)"
+        )
+        db.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created_at)")
+        db.execute("CREATE INDEX IF NOT EXISTS jobs_dedupe ON jobs (dedupe_key, status)")
+
+    def _connection(self):
+        """One connection per thread (and per process, since connections do not survive fork)"""
+        db = getattr(self._local, "db", None)
+        if db is None or self._local.pid != os.getpid():
+            db = sqlite3.connect(self.db_path, isolation_level=None, timeout=30)
+            db.row_factory = sqlite3.Row
+            self._local.db = db
+            self._local.pid = os.getpid()
+        return db
+
+    def start(self):
+        """Start the worker threads in this process, restarting them after a fork"""
+        if self._pid == os.getpid():
+            return
+        self._pid = os.getpid()
+        self._wakeup = threading.Condition()
+        self._lock = threading.Lock()
+        self._running = {}
+        self._threads = [
+            threading.Thread(target=self._worker, name=f"job-worker-{i}", daemon=True)
+            for i in range(self.workers)
+        ]
+        if self.workers:
+            self._threads.append(threading.Thread(target=self._heartbeat, name="job-heartbeat", daemon=True))
+        for thread in self._threads:
+            thread.start()
+        if self.workers:
+            logger.info(f"Started {self.workers} job workers")
+
+    def submit(self, request, callback_url=None):
+        """
+        Queue a job, or return the matching job if an identical request is already queued or running
+
+        The callback URL is part of the match, so every distinct callback gets
+        its own job and webhook.
+
+        Args:
+            request (dict): Summarization request (text or url, model_type, max_length, ...)
+            callback_url (str): URL the finished job is POSTed to
+
+        Returns:
+            tuple: (job dict, True if an existing job was returned)
+
+        Raises:
+            JobQueueFullError: If JOBS_MAX_QUEUED jobs are already queued
+        """
+        self.start()
+        params = {"callback_url": callback_url} if callback_url else {}
+        dedupe_key = make_key(json.dumps(request, sort_keys=True), **params)
+        now = time.time()
+        db = self._connection()
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            row = db.execute(
+                "SELECT * FROM jobs WHERE dedupe_key = ? AND status IN (?, ?) ORDER BY created_at LIMIT 1",
+                (dedupe_key, *ACTIVE_STATUSES)
+            ).fetchone()
+            if row is not None:
+                db.execute("COMMIT")
+                self._count("deduplicated")
+                return self._as_dict(row), True
+
+            queued = db.execute("SELECT COUNT(*) FROM jobs WHERE status = 'queued'").fetchone()[0]
+            if queued >= self.max_queued:
+                db.execute("COMMIT")
+                self._count("rejected")
+                raise JobQueueFullError(f"Job queue is full ({queued} jobs queued)")
+
+            job_id = uuid.uuid4().hex
+            db.execute(
+                "INSERT INTO jobs (id, dedupe_key, status, stage, request, callback_url, created_at, updated_at) "
+                "VALUES (?, ?, 'queued', 'queued', ?, ?, ?, ?)",
+                (job_id, dedupe_key, json.dumps(request), callback_url, now, now)
+            )
+            db.execute("COMMIT")
+        except sqlite3.Error:
+            db.execute("ROLLBACK")
+            raise
+
+        self._count("submitted")
+        with self._wakeup:
+            self._wakeup.notify()
+        return self.get(job_id), False
+
+    def get(self, job_id):
+        """
+        Look up a job
+
+        Args:
+            job_id (str): Id returned by submit
+
+        Returns:
+            dict: Job status, progress stage and (once finished) result or error, or None if unknown
+        """
+        self.start()
+        row = self._connection().execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._as_dict(row) if row is not None else None
+
+    def _as_dict(self, row):
+        job = {
+            "job_id": row["id"],
+            "status": row["status"],
+            "stage": row["stage"],
+            "attempts": row["attempts"],
+            "created_at": row["created_at"],
+            "started_at": row["started_at"],
+            "finished_at": row["finished_at"],
+        }
+        if row["status"] == "succeeded":
+            job["result"] = json.loads(row["result"])
+        elif row["status"] == "failed":
+            job["error"] = row["error"]
+        return job
+
+    def _claim(self):
+        """Atomically take the oldest queued job, requeueing jobs whose worker went away first"""
+        now = time.time()
+        db = self._connection()
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            # Running jobs without progress past the lease belonged to a worker that died
+            db.execute(
+                "UPDATE jobs SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'queued' END, "
+                "error = CASE WHEN attempts >= ? THEN 'Job was interrupted too many times' END, "
+                "finished_at = CASE WHEN attempts >= ? THEN ? END, updated_at = ? "
+                "WHERE status = 'running' AND updated_at < ?",
+                (JOBS_MAX_ATTEMPTS, JOBS_MAX_ATTEMPTS, JOBS_MAX_ATTEMPTS, now, now, now - JOBS_LEASE_SECONDS)
+            )
+            row = db.execute(
+                "SELECT * FROM jobs WHERE status = 'queued' ORDER BY created_at LIMIT 1"
+            ).fetchone()
+            if row is not None:
+                db.execute(
+                    "UPDATE jobs SET status = 'running', stage = 'started', attempts = attempts + 1, "
+                    "started_at = ?, updated_at = ? WHERE id = ?",
+                    (now, now, row["id"])
+                )
+            db.execute("COMMIT")
+        except sqlite3.Error:
+            db.execute("ROLLBACK")
+            raise
+        return row
+
+    def _count(self, name):
+        with self._lock:
+            self._stats[name] += 1
+
+    def _progress(self, job_id, attempt, stage):
+        self._connection().execute(
+            "UPDATE jobs SET stage = ?, updated_at = ? WHERE id = ? AND status = 'running' AND attempts = ?",
+            (stage, time.time(), job_id, attempt)
+        )
+
+    def _finish(self, job_id, attempt, status, result=None, error=None):
+        """Record the outcome of a run; returns False if the job was requeued and is no longer this run's"""
+        now = time.time()
+        updated = self._connection().execute(
+            "UPDATE jobs SET status = ?, stage = 'done', result = ?, error = ?, finished_at = ?, updated_at = ? "
+            "WHERE id = ? AND status = 'running' AND attempts = ?",
+            (status, json.dumps(result) if result is not None else None, error, now, now, job_id, attempt)
+        ).rowcount
+        if not updated:
+            logger.warning(f"Job {job_id} lost its lease; discarding the result of attempt {attempt}")
+            return False
+        self._count(status)
+        return True
+
+    def _heartbeat(self):
+        """Renew the leases of the jobs running in this process"""
+        while True:
+            time.sleep(JOBS_LEASE_SECONDS / HEARTBEATS_PER_LEASE)
+            with self._lock:
+                running = list(self._running.items())
+            try:
+                db = self._connection()
+                now = time.time()
+                for job_id, attempt in running:
+                    db.execute(
+                        "UPDATE jobs SET updated_at = ? WHERE id = ? AND status = 'running' AND attempts = ?",
+                        (now, job_id, attempt)
+                    )
+            except sqlite3.Error as e:
+                logger.error(f"Job queue database error: {str(e)}")
+
+    def _purge_finished(self):
+        self._connection().execute(
+            "DELETE FROM jobs WHERE status IN ('succeeded', 'failed') AND finished_at < ?",
+            (time.time() - self.result_ttl,)
+        )
+
+    def _worker(self):
+        last_purge = 0.0
+        while True:
+            try:
+                if time.monotonic() - last_purge > 60:
+                    self._purge_finished()
+                    last_purge = time.monotonic()
+                row = self._claim()
+            except sqlite3.Error as e:
+                logger.error(f"Job queue database error: {str(e)}")
+                row = None
+            if row is None:
+                with self._wakeup:
+                    self._wakeup.wait(POLL_INTERVAL)
+                continue
+            self._run(row)
+
+    def _run(self, row):
+        job_id = row["id"]
+        # The claim incremented attempts after the row was read
+        attempt = row["attempts"] + 1
+        logger.info(f"Running job {job_id}")
+        with self._lock:
+            self._running[job_id] = attempt
+        try:
+            try:
+                result = self.handler(json.loads(row["request"]), lambda stage: self._progress(job_id, attempt, stage))
+                finished = self._finish(job_id, attempt, "succeeded", result=result)
+            except Exception as e:
+                logger.warning(f"Job {job_id} failed: {str(e)}")
+                finished = self._finish(job_id, attempt, "failed", error=str(e))
+        finally:
+            with self._lock:
+                self._running.pop(job_id, None)
+
+        if finished and row["callback_url"]:
+            self._deliver_webhook(row["callback_url"], self.get(job_id))
+
+    def _deliver_webhook(self, url, job):
+        """POST the finished job to its callback URL, retrying with backoff"""
+        for attempt in range(JOBS_WEBHOOK_ATTEMPTS):
+            try:
+                response = requests.post(url, json=job, timeout=JOBS_WEBHOOK_TIMEOUT)
+                if response.status_code < 400:
+                    return
+                logger.warning(f"Webhook for job {job['job_id']} returned {response.status_code}")
+            except requests.RequestException as e:
+                logger.warning(f"Webhook for job {job['job_id']} failed: {str(e)}")
+            if attempt < JOBS_WEBHOOK_ATTEMPTS - 1:
+                time.sleep(2 ** attempt)
+        self._count("webhooks_failed")
+
+    def get_stats(self):
+        """
+        Return queue counters
+
+        Returns:
+            dict: Jobs per status in the database and this process's submission counters
+        """
+        rows = self._connection().execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        with self._lock:
+            stats = dict(self._stats)
+        stats.update({status: 0 for status in ACTIVE_STATUSES})
+        stats.update({status: count for status, count in rows if status in ACTIVE_STATUSES})
+        stats["max_queued"] = self.max_queued
+        stats["workers"] = self.workers
+        return stats
@@ -0,0 +1,219 @@
+import os
+import time
+import logging
+import threading
+import contextvars
+from bisect import bisect_left
+from contextlib import contextmanager
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Prefix for exported metric names
+METRICS_PREFIX = os.environ.get("METRICS_PREFIX", "newsapp")
+# Add a Server-Timing header with the per-stage breakdown to every response
+SERVER_TIMING_HEADER = os.environ.get("METRICS_SERVER_TIMING", "1") == "1"
+
+# Bucket upper bounds in seconds, from cache hits up to long generate calls
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+TOKEN_BUCKETS = (16, 32, 64, 128, 256, 512, 768, 1024, 2048)
+
+_registry = []
+_collectors = []
+_registry_lock = threading.Lock()
+
+# Per-request stage timings (stage -> seconds) while a request is being handled
+_request_timings = contextvars.ContextVar("request_timings", default=None)
+
+
+def _format_labels(names, values, extra=None):
+    pairs = list(zip(names, values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ""
+    escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in pairs)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + "}"
+
+
+def _format_value(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Histogram:
+    """
+    Prometheus-style histogram with optional labels
+
+    Args:
+        name (str): Metric name (without the prefix)
+        documentation (str): Help text
+        labelnames (tuple): Label names, passed as keyword arguments to observe
+        buckets (tuple): Upper bounds of the buckets
+    """
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.name = f"{METRICS_PREFIX}_{name}"
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._series = {}
+        self._lock = threading.Lock()
+        with _registry_lock:
+            _registry.append(self)
+
+    def observe(self, value, **labels):
+        """Record one observation"""
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = sorted((key, (list(counts), total, count)) for key, (counts, total, count) in self._series.items())
+        for key, (counts, total, count) in series:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = "+Inf" if bound == float("inf") else _format_value(bound)
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, ('le', le))} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {count}")
+        return lines
+
+
+class Counter:
+    """
+    Prometheus-style counter with optional labels
+
+    Args:
+        name (str): Metric name (without the prefix; '_total' is appended)
+        documentation (str): Help text
+        labelnames (tuple): Label names, passed as keyword arguments to inc
+    """
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = f"{METRICS_PREFIX}_{name}_total"
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+        with _registry_lock:
+            _registry.append(self)
+
+    def inc(self, amount=1, **labels):
+        """Increase the counter"""
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            values = sorted(self._values.items())
+        lines.extend(f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}" for key, value in values)
+        return lines
+
+
+# Shared metrics recorded across modules
+REQUEST_DURATION = Histogram("http_request_duration_seconds", "Time spent handling HTTP requests",
+                             ("endpoint", "method", "status"))
+STAGE_DURATION = Histogram("stage_duration_seconds", "Time spent in each processing stage", ("stage",))
+EXTRACTION_DURATION = Histogram("extraction_duration_seconds", "Article extraction time by method", ("method",))
+SUMMARY_DURATION = Histogram("summary_duration_seconds", "Summary generation time by model type", ("model_type",))
+INPUT_TOKENS = Histogram("summary_input_tokens", "Tokens per text sent to the model", ("backend",), TOKEN_BUCKETS)
+OUTPUT_TOKENS = Histogram("summary_output_tokens", "Tokens per generated summary", ("backend",), TOKEN_BUCKETS)
+
+
+def register_collector(collect):
+    """
+    Register a callback that returns extra gauge samples at scrape time
+
+    Args:
+        collect (callable): Returns a list of (name, documentation, {label tuple: value}, labelnames)
+    """
+    with _registry_lock:
+        _collectors.append(collect)
+
+
+def render():
+    """
+    Render all metrics in the Prometheus text exposition format
+
+    Returns:
+        str: Metrics page
+    """
+    with _registry_lock:
+        metrics = list(_registry)
+        collectors = list(_collectors)
+
+    lines = []
+    for metric in metrics:
+        lines.extend(metric.render())
+    for collect in collectors:
+        try:
+            for name, documentation, values, labelnames in collect():
+                name = f"{METRICS_PREFIX}_{name}"
+                lines.append(f"# HELP {name} {documentation}")
+                lines.append(f"# TYPE {name} gauge")
+                lines.extend(f"{name}{_format_labels(labelnames, key)} {_format_value(value)}"
+                             for key, value in sorted(values.items()))
+        except Exception as e:
+            logger.error(f"Error collecting metrics: {str(e)}")
+    return "\n".join(lines) + "\n"
+
+
+def record(stage, seconds):
+    """Record time spent in a stage, both in the histogram and in the current request's breakdown"""
+    STAGE_DURATION.observe(seconds, stage=stage)
+    timings = _request_timings.get()
+    if timings is not None:
+        timings[stage] = timings.get(stage, 0.0) + seconds
+
+
+@contextmanager
+def span(stage):
+    """
+    Time a block of code as a processing stage
+
+    Args:
+        stage (str): Stage name (e.g. 'fetch', 'generate', 'credibility')
+    """
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(stage, time.perf_counter() - started)
+
+
+def begin_request():
+    """Start collecting a per-request stage breakdown; returns a token for end_request"""
+    return _request_timings.set({})
+
+
+def end_request(token):
+    """Stop collecting the per-request breakdown started by begin_request"""
+    _request_timings.reset(token)
+
+
+def request_timings():
+    """
+    Return the current request's stage breakdown
+
+    Returns:
+        dict: Stage name to milliseconds, or an empty dict outside a request
+    """
+    timings = _request_timings.get() or {}
+    return {stage: round(seconds * 1000, 2) for stage, seconds in timings.items()}
+
+
+def server_timing_header():
+    """Format the current request's breakdown as a Server-Timing header value"""
+    return ", ".join(f"{stage};dur={ms}" for stage, ms in request_timings().items())
@@ -0,0 +1,379 @@
+import os
+import sys
+import time
+import queue
+import signal
+import logging
+import argparse
+import tempfile
+import threading
+import multiprocessing
+from multiprocessing.connection import Listener, Client
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Pool settings (overridable through the environment)
+# Number of model processes; 0 keeps the model inside each web worker
+MODEL_POOL_SIZE = int(os.environ.get("MODEL_POOL_SIZE", "0"))
+# torch threads per model process; 0 divides the cores evenly between processes
+MODEL_POOL_THREADS = int(os.environ.get("MODEL_POOL_THREADS", "0"))
+# Socket the pool listens on; web workers use the pool when this is set
+MODEL_POOL_ADDRESS = os.environ.get("MODEL_POOL_ADDRESS", "")
+# Shared secret for the socket (hex); set automatically when the pool is started through start_pool
+MODEL_POOL_AUTHKEY = os.environ.get("MODEL_POOL_AUTHKEY", "")
+# Seconds a web worker waits for the pool to become ready
+MODEL_POOL_WAIT_SECONDS = float(os.environ.get("MODEL_POOL_WAIT_SECONDS", os.environ.get("MODEL_LOAD_WAIT_SECONDS", "600")))
+# Seconds a batch may take in the pool (queueing included) before the client gets an error
+MODEL_POOL_REQUEST_TIMEOUT = float(os.environ.get("MODEL_POOL_REQUEST_TIMEOUT", "600"))
+# Seconds between liveness checks of an idle model process
+WATCH_INTERVAL = 1.0
+
+
+class PoolError(Exception):
+    """Raised when the model pool cannot serve a request"""
+
+
+def _authkey(value):
+    return bytes.fromhex(value) if value else None
+
+
+def _threads_per_process(size, threads):
+    if threads > 0:
+        return threads
+    return max(1, (os.cpu_count() or 1) // max(size, 1))
+
+
+def _model_worker(worker_id, model_name, backend, threads, connection):
+    """Model process: loads the model, then runs generate for each batch the dispatcher sends until it exits"""
+    # Pin thread counts before torch is imported
+    os.environ["OMP_NUM_THREADS"] = str(threads)
+    os.environ["MKL_NUM_THREADS"] = str(threads)
+    import torch
+    from backends import load_backend, generate_batch
+    torch.set_num_threads(threads)
+    try:
+        torch.set_num_interop_threads(1)
+    except RuntimeError:
+        pass
+
+    models = {}
+    try:
+        models[backend] = load_backend(backend, model_name)
+        connection.send(("ready", None))
+    except Exception as e:
+        logger.error(f"Model worker {worker_id} failed to load: {str(e)}")
+        connection.send(("failed", str(e)))
+        return
+
+    while True:
+        try:
+            texts, settings = connection.recv()
+        except (EOFError, OSError):
+            # The dispatcher went away
+            return
+        try:
+            task_backend = settings.pop("backend", backend)
+            if task_backend not in models:
+                models[task_backend] = load_backend(task_backend, model_name)
+            summaries = generate_batch(*models[task_backend], texts, backend=task_backend, **settings)
+            connection.send((True, summaries))
+        except Exception as e:
+            connection.send((False, str(e)))
+
+
+class _Task:
+    """A batch waiting for a model process, and the queue its reply goes to"""
+
+    __slots__ = ("texts", "settings", "reply", "abandoned")
+
+    def __init__(self, texts, settings):
+        self.texts = texts
+        self.settings = settings
+        self.reply = queue.Queue(maxsize=1)
+        self.abandoned = False
+
+
+class _Dispatcher:
+    """
+    Accepts client connections and hands their batches to the model processes
+
+    Each model process has a pipe and a dispatcher thread that feeds it
+    batches from one shared in-process queue, so whichever process is idle
+    picks up the next batch. Batches travel as pickled lists of texts (or of
+    input ids the caller already tokenized); any tokenization left happens
+    in the model process.
+
+    A model process that dies is noticed at once (its pipe closes): the
+    batch it was running is answered with an error and the process is
+    replaced. A request not answered within MODEL_POOL_REQUEST_TIMEOUT is
+    answered with an error as well.
+    """
+
+    def __init__(self, address, authkey, size, threads, model_name, backend):
+        self.context = multiprocessing.get_context("spawn")
+        self.tasks = queue.Queue()
+        self.size = size
+        self.threads = threads
+        self.model_name = model_name
+        self.backend = backend
+        self.status = {"ready": 0, "failed": [], "restarts": 0}
+        self._lock = threading.Lock()
+        # Remove a socket left behind by a previous run
+        if os.path.exists(address):
+            os.unlink(address)
+        self.listener = Listener(address, family="AF_UNIX", authkey=authkey)
+
+    def serve_forever(self):
+        for worker_id in range(self.size):
+            threading.Thread(target=self._feed_worker, args=(worker_id,), name=f"pool-worker-{worker_id}",
+                             daemon=True).start()
+        logger.info(f"Model pool listening on {self.listener.address} "
+                    f"({self.size} processes x {self.threads} threads)")
+        while True:
+            try:
+                connection = self.listener.accept()
+            except Exception as e:
+                logger.warning(f"Rejected pool connection: {str(e)}")
+                continue
+            threading.Thread(target=self._serve_connection, args=(connection,), daemon=True).start()
+
+    def _start_worker(self, worker_id):
+        """Start a model process and wait for it to load; returns its pipe (None if loading failed) and the process"""
+        connection, child = self.context.Pipe()
+        process = self.context.Process(target=_model_worker, name=f"model-worker-{worker_id}", daemon=True,
+                                       args=(worker_id, self.model_name, self.backend, self.threads, child))
+        process.start()
+        child.close()
+        try:
+            kind, error = connection.recv()
+        except (EOFError, OSError):
+            process.join()
+            kind, error = "failed", f"Model process {worker_id} exited while loading (code {process.exitcode})"
+        with self._lock:
+            if kind == "ready":
+                self.status["ready"] += 1
+                return connection, process
+            self.status["failed"].append(error)
+        connection.close()
+        return None, process
+
+    def _feed_worker(self, worker_id):
+        """Send batches to one model process, replacing the process if it dies"""
+        connection, process = self._start_worker(worker_id)
+        while connection is not None:
+            try:
+                task = self.tasks.get(timeout=WATCH_INTERVAL)
+            except queue.Empty:
+                task = None
+            if not process.is_alive():
+                # Died while idle: hand the batch to whichever process is free next
+                if task is not None:
+                    self.tasks.put(task)
+                connection, process = self._restart_worker(worker_id, connection, process)
+                continue
+            if task is None or task.abandoned:
+                continue
+            try:
+                connection.send((task.texts, task.settings))
+                task.reply.put(connection.recv())
+            except (EOFError, OSError):
+                process.join()
+                task.reply.put((False, f"Model process {worker_id} exited (code {process.exitcode}) "
+                                       "during generation"))
+                connection, process = self._restart_worker(worker_id, connection, process)
+
+    def _restart_worker(self, worker_id, connection, process):
+        process.join()
+        logger.warning(f"Model process {worker_id} exited (code {process.exitcode}); starting a new one")
+        connection.close()
+        with self._lock:
+            self.status["ready"] -= 1
+            self.status["restarts"] += 1
+        return self._start_worker(worker_id)
+
+    def _serve_connection(self, connection):
+        """Answer requests from one client connection until it closes"""
+        with connection:
+            while True:
+                try:
+                    request = connection.recv()
+                except (EOFError, OSError):
+                    return
+
+                if request[0] == "status":
+                    with self._lock:
+                        connection.send({"size": self.size, "threads": self.threads, "ready": self.status["ready"],
+                                         "failed": list(self.status["failed"]),
+                                         "restarts": self.status["restarts"]})
+                    continue
+
+                _, texts, settings = request
+                task = _Task(texts, settings)
+                self.tasks.put(task)
+                try:
+                    reply = task.reply.get(timeout=MODEL_POOL_REQUEST_TIMEOUT)
+                except queue.Empty:
+                    # Skipped if still queued; a late reply is dropped
+                    task.abandoned = True
+                    reply = (False, f"Model pool did not answer within {MODEL_POOL_REQUEST_TIMEOUT:g}s")
+                try:
+                    connection.send(reply)
+                except OSError:
+                    return
+
+
+def _run_dispatcher(address, authkey, size, threads, model_name, backend):
+    """Entry point of the dispatcher process"""
+    # Exit normally on SIGTERM so the daemonic model processes are cleaned up
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    _Dispatcher(address, authkey, size, threads, model_name, backend).serve_forever()
+
+
+def start_pool(size=None, threads=None, model_name=None, backend=None):
+    """
+    Start the dispatcher and model processes in the background
+
+    Exports MODEL_POOL_ADDRESS and MODEL_POOL_AUTHKEY so processes forked or
+    started afterwards (e.g. gunicorn workers) use the pool.
+
+    Args:
+        size (int): Number of model processes (defaults to MODEL_POOL_SIZE)
+        threads (int): torch threads per process (defaults to MODEL_POOL_THREADS, or an even share of the cores)
+        model_name (str): Model to load (defaults to BART_MODEL_NAME)
+        backend (str): Inference backend to preload (defaults to SUMMARIZER_BACKEND)
+
+    Returns:
+        multiprocessing.Process: The dispatcher process
+    """
+    global MODEL_POOL_ADDRESS, MODEL_POOL_AUTHKEY, _pool_client
+    size = size or MODEL_POOL_SIZE or 1
+    threads = _threads_per_process(size, threads or MODEL_POOL_THREADS)
+    model_name = model_name or os.environ.get("BART_MODEL_NAME", "facebook/bart-large-cnn")
+    backend = backend or os.environ.get("SUMMARIZER_BACKEND", "pytorch").lower()
+
+    address = MODEL_POOL_ADDRESS or os.path.join(tempfile.mkdtemp(prefix="model-pool-"), "pool.sock")
+    authkey = MODEL_POOL_AUTHKEY or os.urandom(16).hex()
+    MODEL_POOL_ADDRESS = os.environ["MODEL_POOL_ADDRESS"] = address
+    MODEL_POOL_AUTHKEY = os.environ["MODEL_POOL_AUTHKEY"] = authkey
+    _pool_client = None
+
+    context = multiprocessing.get_context("spawn")
+    process = context.Process(target=_run_dispatcher, name="model-pool",
+                              args=(address, _authkey(authkey), size, threads, model_name, backend))
+    process.start()
+    logger.info(f"Started model pool at {address} ({size} processes x {threads} threads)")
+    return process
+
+
+class PoolClient:
+    """
+    Thread-safe client for the model pool; keeps one connection per concurrent caller
+
+    Args:
+        address (str): Socket path of the pool
+        authkey (bytes): Shared secret, if the pool uses one
+    """
+
+    def __init__(self, address, authkey=None):
+        self.address = address
+        self.authkey = authkey
+        self._idle = queue.LifoQueue()
+
+    def _call(self, request):
+        try:
+            connection = self._idle.get_nowait()
+        except queue.Empty:
+            connection = None
+        try:
+            if connection is None:
+                connection = Client(self.address, family="AF_UNIX", authkey=self.authkey)
+            connection.send(request)
+            reply = connection.recv()
+        except (OSError, EOFError) as e:
+            if connection is not None:
+                connection.close()
+            raise PoolError(f"Model pool unavailable: {str(e)}")
+        self._idle.put(connection)
+        return reply
+
+    def status(self):
+        """Return the pool size, threads per process, number of ready model processes and restarts"""
+        return self._call(("status",))
+
+    def wait_ready(self, timeout=MODEL_POOL_WAIT_SECONDS):
+        """
+        Wait until at least one model process has loaded the model
+
+        Returns:
+            bool: True once the pool can serve requests, False on timeout or if every process failed
+        """
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            try:
+                status = self.status()
+                if status["ready"] > 0:
+                    return True
+                if len(status["failed"]) >= status["size"]:
+                    logger.error(f"Model pool failed to load: {status['failed'][0]}")
+                    return False
+            except PoolError:
+                pass
+            time.sleep(0.5)
+        return False
+
+    def generate(self, texts, **settings):
+        """
+        Summarize a batch of texts in one of the model processes
+
+        Args:
+            texts (list): Preprocessed texts, or their input ids
+            **settings: Generation settings (max_length, num_beams, max_time, return_truncated, backend)
+
+        Returns:
+            list: One summary per text
+
+        Raises:
+            PoolError: If the pool is unreachable or generation failed
+        """
+        ok, payload = self._call(("generate", list(texts), settings))
+        if not ok:
+            raise PoolError(payload)
+        return payload
+
+
+_pool_client = None
+_pool_client_pid = None
+_pool_client_lock = threading.Lock()
+
+
+def get_pool_client():
+    """
+    Return the shared pool client, or None if no pool is configured
+
+    Returns:
+        PoolClient: Client for MODEL_POOL_ADDRESS
+    """
+    global _pool_client, _pool_client_pid
+    if not MODEL_POOL_ADDRESS:
+        return None
+    with _pool_client_lock:
+        # Connections do not survive fork (e.g. gunicorn workers)
+        if _pool_client is None or _pool_client_pid != os.getpid():
+            _pool_client = PoolClient(MODEL_POOL_ADDRESS, _authkey(MODEL_POOL_AUTHKEY))
+            _pool_client_pid = os.getpid()
+        return _pool_client
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the BART model pool")
+    parser.add_argument("--address", default=MODEL_POOL_ADDRESS or "model-pool.sock", help="Socket path to listen on")
+    parser.add_argument("--size", type=int, default=MODEL_POOL_SIZE or 1, help="Number of model processes")
+    parser.add_argument("--threads", type=int, default=MODEL_POOL_THREADS, help="torch threads per process (0 = cores / size)")
+    args = parser.parse_args()
+
+    _run_dispatcher(args.address, _authkey(MODEL_POOL_AUTHKEY), args.size,
+                    _threads_per_process(args.size, args.threads),
+                    os.environ.get("BART_MODEL_NAME", "facebook/bart-large-cnn"),
+                    os.environ.get("SUMMARIZER_BACKEND", "pytorch").lower())
@@ -0,0 +1,105 @@
+import os
+import logging
+import threading
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Only a prefix of about this many characters per model input token is tokenized;
+# the rest of an article is cut off by truncation anyway. Byte-level BPE averages
+# 4-5 characters per token on news text, so 8 leaves a wide margin.
+PREPROCESS_CHARS_PER_TOKEN = int(os.environ.get("PREPROCESS_CHARS_PER_TOKEN", "8"))
+
+# Fast tokenizers are not safe to call from several threads at once (calls that change
+# the truncation or padding settings fail with "Already borrowed"), so every call holds this
+tokenizer_lock = threading.Lock()
+
+
+class PreparedText:
+    """
+    An article text with the derived forms the pipeline needs, each computed once
+
+    The summarizer, the credibility analysis and the caches all work from the
+    same object, so a large article is whitespace-normalized, lowercased and
+    tokenized at most once per request. Each form is computed on first use.
+
+    Args:
+        text (str): Article text as received (paragraph breaks are kept in raw)
+    """
+
+    __slots__ = ("raw", "_normalized", "_lowered", "_encodings")
+
+    def __init__(self, text):
+        self.raw = text
+        self._normalized = None
+        self._lowered = None
+        self._encodings = {}
+
+    def __len__(self):
+        return len(self.raw)
+
+    @property
+    def normalized(self):
+        """Text with whitespace collapsed to single spaces, as fed to the model and the caches"""
+        if self._normalized is None:
+            self._normalized = ' '.join(self.raw.split())
+        return self._normalized
+
+    @property
+    def lowered(self):
+        """Lowercased raw text, as matched by the credibility rules"""
+        if self._lowered is None:
+            self._lowered = self.raw.lower()
+        return self._lowered
+
+    def encode(self, tokenizer, max_tokens):
+        """
+        Model input ids for the normalized text, truncated to max_tokens
+
+        Only a prefix of the text, cut at a space, is tokenized. Byte-level BPE
+        splits on spaces before merging, so when the prefix already yields more
+        tokens than fit, the kept tokens are exactly those of the full text; when
+        it does not, the full text is tokenized instead.
+
+        Args:
+            tokenizer: Fast tokenizer of the model
+            max_tokens (int): Model input limit, including special tokens
+
+        Returns:
+            tuple: (list of input ids, True if the full text has more than max_tokens tokens)
+        """
+        cache_key = (id(tokenizer), max_tokens)
+        if cache_key not in self._encodings:
+            text = self.normalized
+            limit = max_tokens * PREPROCESS_CHARS_PER_TOKEN
+            cut = text.rfind(' ', 0, limit) if len(text) > limit else -1
+            ids, exceeds = self._truncate(tokenizer, text[:cut] if cut > 0 else text, max_tokens)
+            if cut > 0 and not exceeds:
+                # The prefix did not fill the input, so the cut was too early
+                ids, exceeds = self._truncate(tokenizer, text, max_tokens)
+            self._encodings[cache_key] = (ids, exceeds)
+        return self._encodings[cache_key]
+
+    @staticmethod
+    def _truncate(tokenizer, text, max_tokens):
+        """Tokenize with the tokenizer's own truncation, reporting whether anything was cut off"""
+        with tokenizer_lock:
+            rows = tokenizer(text, max_length=max_tokens, truncation=True, return_overflowing_tokens=True,
+                             verbose=False)["input_ids"]
+        return rows[0], len(rows) > 1
+
+
+def prepare(text):
+    """
+    Wrap an article text for the pipeline
+
+    Args:
+        text (str or PreparedText): Article text, or one already prepared
+
+    Returns:
+        PreparedText: The prepared text (the argument itself if it already was one)
+    """
+    if isinstance(text, PreparedText):
+        return text
+    return PreparedText(text)
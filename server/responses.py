@@ -0,0 +1,166 @@
+import os
+import gzip
+import logging
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    # Faster JSON serialization
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    # Brotli compression, preferred over gzip when the client accepts it
+    import brotli
+except ImportError:
+    brotli = None
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Compress responses to clients that accept gzip or brotli
+RESPONSE_COMPRESSION = os.environ.get("RESPONSE_COMPRESSION", "1") == "1"
+# Responses smaller than this many bytes are sent uncompressed
+COMPRESS_MIN_BYTES = int(os.environ.get("COMPRESS_MIN_BYTES", "1024"))
+# gzip level (1-9); low levels keep the CPU cost small for JSON
+GZIP_LEVEL = int(os.environ.get("GZIP_LEVEL", "5"))
+# Brotli quality (0-11)
+BROTLI_QUALITY = int(os.environ.get("BROTLI_QUALITY", "4"))
+
+COMPRESSIBLE_MIMETYPES = ("application/json", "text/plain", "text/html")
+
+
+class ORJSONProvider(DefaultJSONProvider):
+    """
+    Flask JSON provider backed by orjson
+
+    Types orjson does not handle natively fall back to Flask's default
+    conversions (dates, decimals, dataclasses, ...).
+    """
+
+    option = orjson.OPT_NON_STR_KEYS if orjson else 0
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, default=self.default, option=self.option).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(orjson.dumps(obj, default=self.default, option=self.option),
+                                        mimetype=self.mimetype)
+
+
+def install_json_provider(app):
+    """Use orjson for request and response bodies when it is installed"""
+    if orjson is not None:
+        app.json = ORJSONProvider(app)
+    else:
+        logger.info("orjson not available, using the standard json module")
+
+
+def requested_fields(data):
+    """
+    Read the response field selection from a request body
+
+    'fields' (a list or a comma-separated string) limits the response to the
+    named top-level fields. 'include' adds opt-in fields such as
+    'original_text' to the default response.
+
+    Args:
+        data (dict): Request JSON
+
+    Returns:
+        tuple: (set of selected fields or None for the default set, set of opt-in fields)
+    """
+    def as_set(value):
+        if not value:
+            return set()
+        if isinstance(value, str):
+            value = value.split(",")
+        return {str(name).strip() for name in value if str(name).strip()}
+
+    data = data or {}
+    selected = as_set(data.get("fields")) or None
+    included = as_set(data.get("include"))
+    return selected, included
+
+
+def wants(field, fields, optional=False):
+    """
+    Whether a response field should be produced
+
+    Args:
+        field (str): Field name
+        fields (tuple): Result of requested_fields
+        optional (bool): True for opt-in fields that are left out by default
+
+    Returns:
+        bool: True if the field is selected
+    """
+    selected, included = fields
+    if selected is not None:
+        return field in selected
+    return not optional or field in included
+
+
+def shape(payload, fields, optional=()):
+    """
+    Drop the fields a request did not ask for
+
+    Args:
+        payload (dict): Full response payload
+        fields (tuple): Result of requested_fields
+        optional (tuple): Opt-in field names, left out unless requested
+
+    Returns:
+        dict: Payload with only the selected fields
+    """
+    return {key: value for key, value in payload.items() if wants(key, fields, key in optional)}
+
+
+def _choose_encoding(accept_encodings):
+    if brotli is not None and accept_encodings.quality("br") > 0:
+        return "br"
+    if accept_encodings.quality("gzip") > 0:
+        return "gzip"
+    return None
+
+
+def compress_response(response, accept_encodings):
+    """
+    Compress a buffered response body with brotli or gzip
+
+    Streamed responses (NDJSON, Server-Sent Events) and small bodies are left
+    as they are.
+
+    Args:
+        response: Flask response
+        accept_encodings: The request's parsed Accept-Encoding header
+
+    Returns:
+        Response: The same response, compressed when worthwhile
+    """
+    if (not RESPONSE_COMPRESSION or response.is_streamed or response.direct_passthrough
+            or response.status_code < 200 or response.status_code == 204
+            or "Content-Encoding" in response.headers
+            or response.mimetype not in COMPRESSIBLE_MIMETYPES):
+        return response
+
+    response.vary.add("Accept-Encoding")
+    encoding = _choose_encoding(accept_encodings)
+    if encoding is None:
+        return response
+    body = response.get_data()
+    if len(body) < COMPRESS_MIN_BYTES:
+        return response
+
+    if encoding == "br":
+        compressed = brotli.compress(body, quality=BROTLI_QUALITY)
+    else:
+        compressed = gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+    response.set_data(compressed)
+    response.headers["Content-Encoding"] = encoding
+    return response
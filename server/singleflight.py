@@ -0,0 +1,120 @@
+import os
+import logging
+import threading
+from concurrent.futures import Future
+from metrics import Counter, span
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Set to 0 to run every request's work separately
+SINGLEFLIGHT_ENABLED = os.environ.get("SINGLEFLIGHT_ENABLED", "1") == "1"
+
+CALLS = Counter("singleflight_calls", "Calls through single-flight groups, by whether they ran the work or waited on it",
+                ("group", "role"))
+
+# Registry of groups, so their stats can be reported together
+_groups = {}
+_registry_lock = threading.Lock()
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls for the same key into one computation
+
+    The first caller for a key runs the function; callers that arrive while
+    it is running wait for it and get the same result (or exception). Nothing
+    is kept once the call finishes, so this complements the result caches
+    rather than replacing them.
+
+    Args:
+        name (str): Group name, used in metrics
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self._pid = os.getpid()
+        self._lock = threading.Lock()
+        self._calls = {}   # key -> Future
+        self._stats = {"leaders": 0, "coalesced": 0}
+
+    def do(self, key, fn, *args, **kwargs):
+        """
+        Run fn(*args, **kwargs), or wait for the identical call already in flight
+
+        Args:
+            key (str): Identifies the computation (e.g. a canonical URL or a text hash)
+            fn (callable): Function to run
+
+        Returns:
+            tuple: (result, True if the result came from another caller's computation)
+        """
+        if not SINGLEFLIGHT_ENABLED:
+            return fn(*args, **kwargs), False
+
+        if self._pid != os.getpid():
+            # Locks and in-flight calls do not survive fork (e.g. gunicorn workers)
+            self._pid = os.getpid()
+            self._lock = threading.Lock()
+            self._calls = {}
+
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = self._calls[key] = Future()
+                self._stats["leaders"] += 1
+            else:
+                self._stats["coalesced"] += 1
+        CALLS.inc(group=self.name, role="leader" if leader else "follower")
+
+        if not leader:
+            with span("singleflight_wait"):
+                return future.result(), True
+
+        try:
+            result = fn(*args, **kwargs)
+            future.set_result(result)
+            return result, False
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+
+    def get_stats(self):
+        """
+        Return group counters
+
+        Returns:
+            dict: Computations run, calls coalesced onto them and calls currently in flight
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats["in_flight"] = len(self._calls)
+        return stats
+
+
+def get_group(name):
+    """
+    Return the shared single-flight group for a name, creating it on first use
+
+    Args:
+        name (str): Group name (e.g. "extract", "summary")
+
+    Returns:
+        SingleFlight: The group
+    """
+    with _registry_lock:
+        if name not in _groups:
+            _groups[name] = SingleFlight(name)
+        return _groups[name]
+
+
+def get_singleflight_stats():
+    """Return stats for every group, keyed by name"""
+    with _registry_lock:
+        groups = dict(_groups)
+    return {name: group.get_stats() for name, group in groups.items()}
@@ -1,97 +1,602 @@
+import os
+import re
+import time
 import logging
-import torch
-from transformers import AutoTokenizer, AutoModelForSeq2SeqLM
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from transformers import AutoTokenizer, TextIteratorStreamer
+from backends import BACKENDS, SUMMARIZER_BACKEND, load_backend, resolve_backend, generate_batch, encode_batch
+import extractive
+from batcher import BatchScheduler, QueueFullError
+from model_pool import get_pool_client
+from metrics import span, record, SUMMARY_DURATION
+from cache import get_cache, make_key
+from dedup import get_dedup_index
+from budget import (SUMMARY_DEADLINE_MS, check_options, clamp_max_length, latency, plan_generation, remaining,
+                    time_budget)
+from preprocess import prepare, tokenizer_lock
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Global variables for models
-bart_tokenizer = None
-bart_model = None
+# Model settings (overridable through the environment)
+BART_MODEL_NAME = os.environ.get("BART_MODEL_NAME", "facebook/bart-large-cnn")
+# How the model is loaded: 'background' (thread started at import), 'lazy' (on first use)
+# or 'eager' (blocking at import, e.g. when preloading in the gunicorn master)
+MODEL_LOAD_MODE = os.environ.get("MODEL_LOAD_MODE", "background")
+# How long a request waits for a model that is still loading before falling back
+MODEL_LOAD_WAIT_SECONDS = float(os.environ.get("MODEL_LOAD_WAIT_SECONDS", "600"))
 
-def load_bart_model():
-    """Load the BART-large-CNN model"""
-    global bart_tokenizer, bart_model
-    
-    logger.info("Loading BART-large-CNN model...")
+# Inputs longer than the model accepts are handled according to LONG_DOCUMENT_MODE:
+# 'truncate' (cut at MODEL_MAX_TOKENS), 'map' (summarize overlapping chunks and join the
+# chunk summaries) or 'reduce' (map, then summarize the joined chunk summaries)
+LONG_DOCUMENT_MODES = ("truncate", "map", "reduce")
+LONG_DOCUMENT_MODE = os.environ.get("LONG_DOCUMENT_MODE", "reduce")
+CHUNK_MAX_TOKENS = int(os.environ.get("SUMMARY_CHUNK_MAX_TOKENS", "900"))
+CHUNK_OVERLAP_SENTENCES = int(os.environ.get("SUMMARY_CHUNK_OVERLAP_SENTENCES", "2"))
+MODEL_MAX_TOKENS = 1024
+# Reduce passes re-chunk the joined summaries while they are still too long for one call
+MAX_REDUCE_PASSES = 3
+
+# Streamed summaries bypass the batch scheduler, so limit how many decode at once
+STREAM_MAX_CONCURRENT = int(os.environ.get("SUMMARY_STREAM_MAX_CONCURRENT", "4"))
+
+PARAGRAPH_BREAK = re.compile(r'\n\s*\n')
+SENTENCE_BREAK = re.compile(r'(?<=[.!?])\s+|(?<=[.!?]["\'\u201d\u2019)])\s+')
+
+# Loaded BART models per inference backend: backend -> (tokenizer, model, device)
+bart_models = {}
+
+# Load state per model: status is one of not_loaded, loading, ready, failed.
+# The default backend is reported as 'bart', the others as 'bart-<backend>'.
+model_status = {"bart": {"status": "not_loaded"}}
+_load_locks = {backend: threading.Lock() for backend in BACKENDS}
+_status_lock = threading.Lock()
+_load_thread = None
+_stream_slots = threading.BoundedSemaphore(STREAM_MAX_CONCURRENT)
+
+# Cache of generated summaries, keyed by normalized text, model type and max length
+summary_cache = get_cache("summary")
+# Near-duplicate articles (e.g. syndicated copies) reuse each other's summaries
+dedup_index = get_dedup_index()
+
+def _status_name(backend):
+    """Name a backend's model is reported under"""
+    return "bart" if backend == SUMMARIZER_BACKEND else f"bart-{backend}"
+
+def _set_model_status(name, status, **details):
+    """Record the load state of a model"""
+    with _status_lock:
+        model_status[name] = dict(status=status, **details)
+
+def get_model_status():
+    """Return the load state (not_loaded/loading/ready/failed) of each model"""
+    with _status_lock:
+        return {name: dict(state) for name, state in model_status.items()}
+
+def is_ready():
+    """Whether the summarization model is loaded and ready to serve"""
+    return get_model_status()["bart"]["status"] == "ready"
+
+def load_bart_model(backend=SUMMARIZER_BACKEND):
+    """Load the BART-large-CNN model for a backend (waiting for any load already in progress)"""
+    if not _load_locks[backend].acquire(timeout=MODEL_LOAD_WAIT_SECONDS):
+        logger.warning(f"Timed out waiting for the BART model ({backend}) to load")
+        return False
     
+    name = _status_name(backend)
     try:
-        # Load tokenizer and model
-        bart_tokenizer = AutoTokenizer.from_pretrained("facebook/bart-large-cnn")
-        bart_model = AutoModelForSeq2SeqLM.from_pretrained("facebook/bart-large-cnn")
+        # Another thread may have finished loading while we waited
+        if backend in bart_models:
+            return True
+        
+        logger.info(f"Loading BART model {BART_MODEL_NAME} ({backend} backend)...")
+        _set_model_status(name, "loading", model=BART_MODEL_NAME, backend=backend)
+        started = time.monotonic()
+        
+        pool = get_pool_client()
+        if pool is not None:
+            # The weights live in the model pool; only the tokenizer (for chunking) is loaded here
+            if not pool.wait_ready():
+                raise Exception("Model pool is not available")
+            tokenizer, model, device = AutoTokenizer.from_pretrained(BART_MODEL_NAME), None, "pool"
+        else:
+            tokenizer, model, device = load_backend(backend, BART_MODEL_NAME)
         
-        # Move model to GPU if available
-        device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
-        bart_model.to(device)
+        # Publish only once the model is fully set up
+        bart_models[backend] = (tokenizer, model, device)
         
-        logger.info(f"BART model loaded successfully (device: {device})")
+        load_seconds = time.monotonic() - started
+        _set_model_status(name, "ready", model=BART_MODEL_NAME, backend=backend, device=str(device),
+                          load_seconds=round(load_seconds, 2))
+        logger.info(f"BART model loaded successfully ({backend}, device: {device}, {load_seconds:.1f}s)")
         return True
     
     except Exception as e:
-        logger.error(f"Error loading BART model: {str(e)}")
+        logger.error(f"Error loading BART model ({backend}): {str(e)}")
+        _set_model_status(name, "failed", model=BART_MODEL_NAME, backend=backend, error=str(e))
         return False
+    
+    finally:
+        _load_locks[backend].release()
+
+def start_background_loading():
+    """Start loading the BART model on a background thread, unless it is loaded or loading"""
+    global _load_thread
+    
+    with _status_lock:
+        if model_status["bart"]["status"] in ("loading", "ready"):
+            return
+        if _load_thread is not None and _load_thread.is_alive():
+            return
+        # Mark as loading right away so health checks never report a stale state
+        model_status["bart"] = {"status": "loading", "model": BART_MODEL_NAME, "backend": SUMMARIZER_BACKEND}
+        _load_thread = threading.Thread(target=load_bart_model, name="bart-loader", daemon=True)
+        _load_thread.start()
 
 def extract_sentences(text, num_sentences=5):
-    """Simple extractive summarization as fallback"""
-    # Split text into sentences
-    sentences = text.replace('!', '.').replace('?', '.').split('.')
-    sentences = [s.strip() for s in sentences if s.strip()]
+    """Extractive summarization (TF-IDF TextRank with MMR), used for non-BART models and as fallback"""
+    return extractive.summarize(text, num_sentences)
+
+def _split_sentences(text):
+    """Split text into (sentence, ends_paragraph) pairs with whitespace normalized"""
+    units = []
+    for paragraph in PARAGRAPH_BREAK.split(text):
+        sentences = [' '.join(s.split()) for s in SENTENCE_BREAK.split(paragraph.strip())]
+        sentences = [s for s in sentences if s]
+        units.extend((sentence, i == len(sentences) - 1) for i, sentence in enumerate(sentences))
+    return units
+
+def chunk_text(text, tokenizer, max_tokens=CHUNK_MAX_TOKENS, overlap=CHUNK_OVERLAP_SENTENCES):
+    """
+    Split text into overlapping chunks that fit the model input
+    
+    Chunks are built from whole sentences and end on a paragraph boundary
+    where one falls in their second half, so an edit to one paragraph
+    usually leaves the other chunks (and their cached summaries) unchanged.
+    
+    Args:
+        text (str): Text to split (paragraphs separated by blank lines)
+        tokenizer: Tokenizer used to count tokens
+        max_tokens (int): Token budget per chunk
+        overlap (int): Sentences repeated at the start of the following chunk
+        
+    Returns:
+        list: Chunk texts
+    """
+    units = _split_sentences(text)
+    if not units:
+        return []
     
-    # Simple scoring - favor sentences at the beginning with a bit of weight for longer sentences
-    scored_sentences = [(i, len(s.split()) / 5) for i, s in enumerate(sentences)]
-    scored_sentences.sort(key=lambda x: (-1 if x[0] < 3 else 1) * x[1], reverse=True)
+    # Count tokens for all sentences in one batched tokenizer call
+    with tokenizer_lock:
+        encoded = tokenizer([u[0] for u in units], add_special_tokens=False)["input_ids"]
+    counts = [len(ids) for ids in encoded]
+    prefix = [0]
+    for count in counts:
+        prefix.append(prefix[-1] + count)
     
-    # Get top sentences and sort them by original order
-    top_indices = [x[0] for x in scored_sentences[:min(num_sentences, len(sentences))]]
-    top_indices.sort()
+    chunks = []
+    start = 0
+    while start < len(units):
+        end = start + 1
+        while end < len(units) and prefix[end + 1] - prefix[start] <= max_tokens:
+            end += 1
+        
+        # Prefer ending on a paragraph boundary in the second half of the chunk
+        if end < len(units):
+            for cut in range(end, start, -1):
+                if prefix[cut] - prefix[start] < max_tokens // 2:
+                    break
+                if units[cut - 1][1]:
+                    end = cut
+                    break
+        
+        chunks.append(' '.join(u[0] for u in units[start:end]))
+        if end >= len(units):
+            break
+        start = max(end - overlap, start + 1)
+    return chunks
+
+def _exceeds_model_input(text, tokenizer):
+    """Whether text is longer than the model accepts in one call"""
+    # Byte-level BPE never produces more tokens than bytes, so short texts skip tokenization
+    if len(text.encode('utf-8')) + 2 <= MODEL_MAX_TOKENS:
+        return False
+    with tokenizer_lock:
+        return len(tokenizer(text, verbose=False)["input_ids"]) > MODEL_MAX_TOKENS
+
+def _wait(future, deadline):
+    """Wait for a scheduler result until the deadline, dropping the queued text if it passes"""
+    try:
+        return future.result(timeout=remaining(deadline))
+    except FutureTimeoutError:
+        future.cancel()
+        raise
+
+def _submit(text, backend, max_length, num_beams, deadline):
+    """Queue a text for generation, limited to the time left before the deadline"""
+    return bart_scheduler.submit(text, max_length=max_length, backend=backend, num_beams=num_beams,
+                                 max_time=time_budget(deadline), return_truncated=True)
+
+def _summarize_chunks(chunks, backend, max_length, cache_model, num_beams=4, deadline=None, generation=None):
+    """Summarize chunks through the scheduler, reusing cached chunk summaries"""
+    keys = [make_key(chunk, model_type=cache_model, max_length=max_length, num_beams=num_beams, stage="chunk")
+            for chunk in chunks]
+    summaries = [summary_cache.get(key) for key in keys]
+    
+    # Queue every uncached chunk at once so they run in shared batches
+    futures = {i: _submit(chunks[i], backend, max_length, num_beams, deadline)
+               for i, summary in enumerate(summaries) if summary is None}
+    try:
+        for i, future in futures.items():
+            summaries[i], truncated = _wait(future, deadline)
+            if truncated:
+                # Cut short by the deadline: usable, but not worth caching
+                if generation is not None:
+                    generation["truncated"] = True
+                continue
+            summary_cache.set(keys[i], summaries[i])
+    except FutureTimeoutError:
+        for future in futures.values():
+            future.cancel()
+        raise
+    
+    logger.info(f"Summarized {len(chunks)} chunks ({len(chunks) - len(futures)} cached)")
+    return summaries
+
+def _condense_long_document(text, backend, max_length, cache_model, passes=MAX_REDUCE_PASSES, num_beams=4,
+                            deadline=None, generation=None):
+    """Summarize the chunks of a long text and join the summaries, re-chunking up to `passes` times until they fit one call"""
+    tokenizer = bart_models[backend][0]
+    combined = ' '.join(_summarize_chunks(chunk_text(text, tokenizer), backend, max_length, cache_model,
+                                          num_beams, deadline, generation))
+    
+    # Keep condensing while the chunk summaries are still too long for one call
+    for _ in range(passes):
+        if not _exceeds_model_input(combined, tokenizer):
+            break
+        combined = ' '.join(_summarize_chunks(chunk_text(combined, tokenizer), backend, max_length, cache_model,
+                                              num_beams, deadline, generation))
+    return combined
+
+def _summarize_long_document(text, backend, max_length, mode, cache_model, num_beams=4, deadline=None,
+                             generation=None):
+    """
+    Summarize a text longer than the model input by chunking it (map) and optionally reducing
     
-    # Join selected sentences
-    summary = '. '.join([sentences[i] for i in top_indices])
-    return summary + ('.' if not summary.endswith('.') else '')
+    Sets generation['truncated'] when a chunk or the reduce step was cut short by the deadline.
+    """
+    if mode != "reduce":
+        return _condense_long_document(text, backend, max_length, cache_model, passes=0, num_beams=num_beams,
+                                       deadline=deadline, generation=generation)
+    combined = _condense_long_document(text, backend, max_length, cache_model, num_beams=num_beams,
+                                       deadline=deadline, generation=generation)
+    summary, truncated = _wait(_submit(combined, backend, max_length, num_beams, deadline), deadline)
+    if truncated and generation is not None:
+        generation["truncated"] = True
+    return summary
 
-def generate_summary(text, model_type="bart", max_length=150):
-    """Generate summary for the given text"""
-    global bart_tokenizer, bart_model
+def _generate_bart_batch(texts, max_length=150, backend=SUMMARIZER_BACKEND, num_beams=4, max_time=None,
+                         return_truncated=False):
+    """Run one padded BART generate call over a batch of preprocessed texts (see backends.generate_batch)"""
+    tokenizer, model, device = bart_models[backend]
+    if model is None:
+        # The model lives in the worker pool
+        return get_pool_client().generate(texts, max_length=max_length, backend=backend, num_beams=num_beams,
+                                          max_time=max_time, return_truncated=return_truncated)
+    return generate_batch(tokenizer, model, device, texts, max_length=max_length, num_beams=num_beams,
+                          backend=backend, max_time=max_time, return_truncated=return_truncated)
+
+def _stream_bart(text, max_length=150, backend=SUMMARIZER_BACKEND):
+    """
+    Decode a summary for one text (or its input ids), yielding text pieces as tokens are produced
+
+    Streaming needs a single hypothesis, so this uses greedy decoding rather
+    than the beam search of the batched path.
+    """
+    tokenizer, model, device = bart_models[backend]
+    if model is None:
+        # Pool workers return whole summaries
+        yield get_pool_client().generate([text], max_length=max_length, backend=backend, num_beams=1)[0]
+        return
+    
+    inputs = encode_batch(tokenizer, [text], device, max_length=MODEL_MAX_TOKENS)
+    streamer = TextIteratorStreamer(tokenizer, skip_prompt=True, skip_special_tokens=True)
+    errors = []
+    
+    def run():
+        try:
+            model.generate(
+                inputs["input_ids"],
+                attention_mask=inputs["attention_mask"],
+                num_beams=1,
+                min_length=min(30, max_length),
+                max_length=max_length,
+                streamer=streamer
+            )
+        except Exception as e:
+            errors.append(e)
+            streamer.end()
     
-    # Preprocess text (remove excessive whitespace)
-    text = ' '.join(text.split())
+    with _stream_slots:
+        thread = threading.Thread(target=run, name="bart-stream", daemon=True)
+        thread.start()
+        for piece in streamer:
+            if piece:
+                yield piece
+        thread.join()
     
-    if model_type.lower() == "bart":
+    if errors:
+        raise errors[0]
+
+# Scheduler that groups concurrent requests into batched generate calls
+bart_scheduler = BatchScheduler(_generate_bart_batch)
+
+def get_batcher_stats():
+    """Return batch size, queue depth and wait time metrics for the BART scheduler"""
+    return bart_scheduler.get_stats()
+
+def generate_summaries(texts, model_type="bart", max_length=150, long_document=None, quality=None, deadline_ms=None):
+    """
+    Generate summaries for many texts
+    
+    Every text goes through generate_summary (caches, long-document handling
+    and fallbacks). They are queued concurrently, so uncached texts share
+    batched generate calls in the scheduler.
+    
+    Args:
+        texts (list): Texts (str or PreparedText) to summarize
+        model_type, max_length, long_document, quality, deadline_ms: As for generate_summary
+    
+    Returns:
+        list: One summary per text
+    
+    Raises:
+        ValueError: If max_length, quality or deadline_ms is invalid
+    """
+    max_length = clamp_max_length(max_length)
+    quality, deadline_ms = check_options(quality, deadline_ms)
+    documents = [prepare(text) for text in texts]
+    if not documents:
+        return []
+    
+    def summarize(document):
+        return generate_summary(document, model_type, max_length, long_document, quality, deadline_ms)
+    
+    if not resolve_backend(model_type):
+        # Extractive summaries are CPU-bound; threads would not speed them up
+        return [summarize(document) for document in documents]
+    # Enough callers to fill one batch while the previous one runs
+    workers = min(len(documents), 2 * bart_scheduler.max_batch_size)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(summarize, documents))
+
+def generate_summary(text, model_type="bart", max_length=150, long_document=None, quality=None, deadline_ms=None):
+    """
+    Generate summary for the given text
+    
+    Args:
+        text (str or PreparedText): Text to summarize
+        model_type (str): 'bart' (or 'bart-<backend>') for abstractive, anything else for extractive
+        max_length (int): Maximum summary length in tokens (capped at SUMMARY_MAX_LENGTH_LIMIT)
+        long_document (str): How to handle text longer than the model input:
+            'truncate', 'map' or 'reduce' (defaults to LONG_DOCUMENT_MODE)
+        quality (str): Decoding tier: 'beams4', 'beams2' or 'greedy' (defaults to SUMMARY_QUALITY)
+        deadline_ms (float): Time budget for the summary (defaults to SUMMARY_DEADLINE_MS; 0 means none)
+    
+    Returns:
+        str: Summary
+    """
+    return generate_summary_details(text, model_type, max_length, long_document, quality, deadline_ms)["summary"]
+
+def generate_summary_details(text, model_type="bart", max_length=150, long_document=None, quality=None,
+                             deadline_ms=None):
+    """
+    Generate a summary and report how it was produced
+    
+    Takes the same arguments as generate_summary.
+    
+    Returns:
+        dict: 'summary' and 'generation', which holds the decoding tier used (None for
+            extractive summaries), the effective max_length and deadline_ms, and flags
+            for summaries that were served from the cache, cut short by the deadline
+            ('truncated') or replaced by an extractive fallback
+    
+    Raises:
+        ValueError: If max_length, quality or deadline_ms is invalid
+    """
+    started = time.perf_counter()
+    max_length = clamp_max_length(max_length)
+    quality, deadline_ms = check_options(quality, deadline_ms)
+    if deadline_ms is None:
+        deadline_ms = SUMMARY_DEADLINE_MS
+    generation = {"quality": None, "max_length": max_length, "deadline_ms": deadline_ms or None,
+                  "cached": False, "truncated": False, "fallback": False}
+    deadline = time.monotonic() + deadline_ms / 1000.0 if deadline_ms else None
+    try:
+        summary = _generate_summary(text, model_type, max_length, long_document, quality, deadline, generation)
+        return {"summary": summary, "generation": generation}
+    finally:
+        SUMMARY_DURATION.observe(time.perf_counter() - started, model_type=model_type.lower())
+
+def _generate_summary(text, model_type, max_length, long_document, quality, deadline, generation):
+    backend = resolve_backend(model_type)
+    long_document = long_document if long_document in LONG_DOCUMENT_MODES else LONG_DOCUMENT_MODE
+    
+    decoding = {}
+    if backend:
+        # Pick the decoding tier from the request, the queue depth and the time budget
+        plan = plan_generation(quality, deadline, queue_depth=bart_scheduler.get_queue_depth(),
+                               batch_size=bart_scheduler.max_batch_size, input_chars=len(text))
+        generation["quality"] = plan["quality"]
+        num_beams = decoding["num_beams"] = plan["num_beams"]
+    
+    with span("preprocess"):
+        # Normalize whitespace once; the raw text keeps its paragraph breaks for chunking
+        document = prepare(text)
+        raw_text = document.raw
+        text = document.normalized
+        
+        # Reuse a previous summary of the same text and settings
+        cache_model = f"bart-{backend}" if backend else model_type.lower()
+        cache_key = make_key(text, model_type=cache_model, max_length=max_length, long_document=long_document,
+                             **decoding)
+        cached = summary_cache.get(cache_key)
+    if cached is not None:
+        generation["cached"] = True
+        return cached
+    
+    if backend:
+        # Reuse the summary of a near-duplicate article
+        near_key = f"summary:{cache_model}:{max_length}:{long_document}:{num_beams}"
+        if dedup_index is not None:
+            with span("dedup"):
+                match = dedup_index.lookup(text, near_key)
+            if match is not None:
+                summary_cache.set(cache_key, match[0])
+                generation["cached"] = True
+                return match[0]
+        
         # Ensure model is loaded
-        if bart_tokenizer is None or bart_model is None:
-            success = load_bart_model()
+        if backend not in bart_models:
+            with span("model_load"):
+                success = load_bart_model(backend)
             if not success:
                 logger.warning("Falling back to extractive summarization")
+                generation["fallback"] = True
                 return extract_sentences(text)
         
         try:
-            # Generate summary with BART
-            device = next(bart_model.parameters()).device
-            inputs = bart_tokenizer(text, return_tensors="pt", max_length=1024, truncation=True).to(device)
-            
-            # Generate summary
-            summary_ids = bart_model.generate(
-                inputs["input_ids"], 
-                num_beams=4,
-                min_length=30,
-                max_length=max_length,
-                early_stopping=True
-            )
-            
-            # Decode summary
-            summary = bart_tokenizer.decode(summary_ids[0], skip_special_tokens=True)
+            tokenizer = bart_models[backend][0]
+            with span("tokenize"):
+                # Tokenized once here; the ids go to the model as they are
+                input_ids, exceeds = document.encode(tokenizer, MODEL_MAX_TOKENS)
+            if long_document != "truncate" and exceeds:
+                with span("long_document"):
+                    summary = _summarize_long_document(raw_text, backend, max_length, long_document, cache_model,
+                                                       num_beams, deadline, generation)
+            else:
+                # Queue the input so concurrent requests share one generate call; with a
+                # deadline, generate stops at max_time and returns what it has decoded
+                future = _submit(input_ids, backend, max_length, num_beams, deadline)
+                summary, truncated = _wait(future, deadline)
+                record("queue_wait", future.queue_wait)
+                record("generate", future.run_time)
+                latency.observe(num_beams, future.run_time)
+                generation["truncated"] = truncated
+            if generation["truncated"]:
+                # Cut short by the deadline: usable, but not worth caching
+                return summary
+            summary_cache.set(cache_key, summary)
+            if dedup_index is not None:
+                dedup_index.store(text, near_key, summary)
             return summary
         
+        except FutureTimeoutError:
+            logger.warning("Summary deadline passed, falling back to extractive summarization")
+            generation["fallback"] = True
+            return extract_sentences(text)
+        
+        except QueueFullError as e:
+            logger.warning(f"{str(e)}, falling back to extractive summarization")
+            generation["fallback"] = True
+            return extract_sentences(text)
+        
         except Exception as e:
             logger.error(f"Error generating summary with BART: {str(e)}")
             logger.warning("Falling back to extractive summarization")
+            generation["fallback"] = True
             return extract_sentences(text)
     
     else:
         # Fallback to extractive summarization
         logger.info("Using extractive summarization")
-        return extract_sentences(text)
+        with span("extractive"):
+            summary = extract_sentences(text)
+        summary_cache.set(cache_key, summary)
+        return summary
+
+def stream_summary(text, model_type="bart", max_length=150, long_document=None):
+    """
+    Generate a summary incrementally
+    
+    BART summaries are decoded greedily and yielded piece by piece; cached,
+    extractive and fallback summaries are yielded whole.
+    
+    Args:
+        text (str or PreparedText): Text to summarize
+        model_type (str): 'bart' (or 'bart-<backend>') for abstractive, anything else for extractive
+        max_length (int): Maximum summary length in tokens (capped at SUMMARY_MAX_LENGTH_LIMIT)
+        long_document (str): 'truncate', 'map' or 'reduce' (defaults to LONG_DOCUMENT_MODE)
+    
+    Yields:
+        str: Consecutive pieces of the summary
+    """
+    backend = resolve_backend(model_type)
+    max_length = clamp_max_length(max_length)
+    if not backend:
+        yield generate_summary(text, model_type=model_type, max_length=max_length, long_document=long_document)
+        return
+    long_document = long_document if long_document in LONG_DOCUMENT_MODES else LONG_DOCUMENT_MODE
+    
+    # Normalize whitespace once; the raw text keeps its paragraph breaks for chunking
+    document = prepare(text)
+    raw_text = document.raw
+    text = document.normalized
+    
+    cache_model = f"bart-{backend}"
+    cache_key = make_key(text, model_type=cache_model, max_length=max_length,
+                         long_document=long_document, decoding="greedy")
+    near_key = f"summary:{cache_model}:{max_length}:{long_document}:greedy"
+    cached = summary_cache.get(cache_key)
+    if cached is None and dedup_index is not None:
+        # Reuse the summary of a near-duplicate article
+        match = dedup_index.lookup(text, near_key)
+        cached = match[0] if match is not None else None
+    if cached is not None:
+        yield cached
+        return
+    
+    pieces = []
+    try:
+        # Ensure model is loaded
+        if backend not in bart_models and not load_bart_model(backend):
+            raise Exception("BART model not available")
+        
+        tokenizer = bart_models[backend][0]
+        model_input, exceeds = document.encode(tokenizer, MODEL_MAX_TOKENS)
+        if long_document != "truncate" and exceeds:
+            if long_document == "map":
+                summary = _summarize_long_document(raw_text, backend, max_length, long_document, cache_model)
+                summary_cache.set(cache_key, summary)
+                if dedup_index is not None:
+                    dedup_index.store(text, near_key, summary)
+                yield summary
+                return
+            # Batch the chunk summaries, then stream the final reduce pass
+            model_input = _condense_long_document(raw_text, backend, max_length, cache_model)
+        
+        for piece in _stream_bart(model_input, max_length=max_length, backend=backend):
+            pieces.append(piece)
+            yield piece
+    
+    except Exception as e:
+        # Once part of the summary is out there is nothing to fall back to
+        if pieces:
+            raise
+        logger.error(f"Error streaming summary with BART: {str(e)}")
+        logger.warning("Falling back to extractive summarization")
+        yield extract_sentences(text)
+        return
+    
+    summary_cache.set(cache_key, ''.join(pieces))
+    if dedup_index is not None:
+        dedup_index.store(text, near_key, ''.join(pieces))
 
-# Load model at module import time (can be commented out if you want to lazy-load)
-load_bart_model()
\ No newline at end of file
+# Load the model according to MODEL_LOAD_MODE ('lazy' waits for the first request)
+if MODEL_LOAD_MODE == "eager":
+    load_bart_model()
+elif MODEL_LOAD_MODE == "background":
+    start_background_loading()
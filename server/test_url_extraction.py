@@ -3,9 +3,28 @@ Test script for URL extraction functionality
 Run this script to test if the URL extraction is working properly
 """
 
+import os
 import sys
 import json
+import time
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from url_processor import extract_article_from_url, is_valid_url
+import fetcher
+import url_cache
+
+SAMPLE_ARTICLE_HTML = """<html><head><title>Council approves transit budget</title></head>
+<body><nav>Home | News | Sports</nav>
+<article>
+<h1>Council approves transit budget</h1>
+<p>The city council approved the new transit budget on Tuesday after a lengthy debate that ran late into the evening.</p>
+<p>Officials said the plan would expand bus service to three neighborhoods that currently lack reliable routes.</p>
+<p>"We have to invest in the people who depend on public transit every day," the mayor told reporters outside city hall.</p>
+<p>According to a study by the regional planning office, ridership could grow by 12 percent over the next five years.</p>
+</article>
+<footer>Copyright</footer></body></html>"""
+SAMPLE_ARTICLE_ETAG = '"transit-v1"'
 
 def test_url_extraction(url):
     """Test extracting article from a URL"""
@@ -42,11 +61,122 @@ def test_url_extraction(url):
     else:
         print(f"❌ Failed to extract article: {result.get('error', 'Unknown error')}")
 
+class StandInHandler(BaseHTTPRequestHandler):
+    """Local stand-in for a news site, recording how it is hit"""
+    hits = {}
+    # Requests currently being handled by /slow, and the peak seen
+    active = 0
+    max_active = 0
+    lock = threading.Lock()
+    
+    def do_GET(self):
+        with StandInHandler.lock:
+            StandInHandler.hits[self.path] = StandInHandler.hits.get(self.path, 0) + 1
+        
+        if self.path == "/article":
+            if self.headers.get("If-None-Match") == SAMPLE_ARTICLE_ETAG:
+                self._send(304, b"")
+            else:
+                self._send(200, SAMPLE_ARTICLE_HTML.encode("utf-8"), etag=SAMPLE_ARTICLE_ETAG)
+        elif self.path == "/huge":
+            # No Content-Length, so the size limit has to be enforced while streaming
+            self._send(200, b"x" * (fetcher.MAX_RESPONSE_BYTES + 1), declare_length=False)
+        elif self.path.startswith("/slow"):
+            with StandInHandler.lock:
+                StandInHandler.active += 1
+                StandInHandler.max_active = max(StandInHandler.max_active, StandInHandler.active)
+            time.sleep(0.2)
+            with StandInHandler.lock:
+                StandInHandler.active -= 1
+            self._send(200, SAMPLE_ARTICLE_HTML.encode("utf-8"))
+        else:
+            self._send(404, b"Not found")
+    
+    def _send(self, status, body, declare_length=True, etag=None):
+        self.send_response(status)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        if etag:
+            self.send_header("ETag", etag)
+        if declare_length:
+            self.send_header("Content-Length", str(len(body)))
+        else:
+            self.send_header("Connection", "close")
+        self.end_headers()
+        try:
+            self.wfile.write(body)
+        except ConnectionError:
+            # The client hung up early (e.g. after hitting its size limit)
+            pass
+    
+    def log_message(self, format, *args):
+        pass
+
+def check(condition, message):
+    """Print a check result and return whether it passed"""
+    print(f"{'✓' if condition else '❌'} {message}")
+    return condition
+
+def test_local_server():
+    """Run the extraction and fetch checks against a local stand-in HTTP server"""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StandInHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    print(f"Testing against local stand-in server at {base}")
+    print("-" * 80)
+    
+    # Use a throwaway article cache
+    cache_dir = tempfile.mkdtemp()
+    cache = url_cache.ArticleCache(os.path.join(cache_dir, "article_cache.db"))
+    url_cache._article_cache = cache
+    
+    passed = True
+    try:
+        result = extract_article_from_url(f"{base}/article")
+        passed &= check(result['success'] and "transit budget" in result.get('text', ''),
+                        f"Article extracted (method: {result.get('method')})")
+        passed &= check(StandInHandler.hits.get("/article") == 1, "Page downloaded exactly once")
+        
+        cached = extract_article_from_url(f"{base}/article?utm_source=feed#comments")
+        passed &= check(cached == result and StandInHandler.hits.get("/article") == 1,
+                        "Fresh cached article served without a request")
+        
+        cache.fresh_seconds = 0
+        revalidated = extract_article_from_url(f"{base}/article")
+        passed &= check(revalidated == result and StandInHandler.hits.get("/article") == 2
+                        and cache.get_stats()["revalidated"] == 1,
+                        "Stale article revalidated with a conditional GET (304)")
+        
+        result = extract_article_from_url(f"{base}/missing")
+        passed &= check(not result['success'] and "404" in result.get('error', ''), "404 reported as a failure")
+        
+        try:
+            fetcher.fetch_url(f"{base}/huge")
+            passed &= check(False, "Oversized response rejected")
+        except fetcher.FetchError:
+            passed &= check(True, "Oversized response rejected")
+        
+        urls = [f"{base}/slow{i}" for i in range(fetcher.PER_HOST_LIMIT * 3)]
+        pages = fetcher.fetch_many(urls, max_workers=len(urls))
+        passed &= check(all(isinstance(page, dict) and page['status'] == 200 for page in pages),
+                        f"Fetched {len(urls)} pages concurrently")
+        passed &= check(StandInHandler.max_active <= fetcher.PER_HOST_LIMIT,
+                        f"Per-host limit respected (peak {StandInHandler.max_active}, limit {fetcher.PER_HOST_LIMIT})")
+    finally:
+        server.shutdown()
+    
+    print("-" * 80)
+    print("All checks passed" if passed else "Some checks failed")
+    return passed
+
 if __name__ == "__main__":
     if len(sys.argv) < 2:
         print("Please provide a URL to test")
         print("Usage: python test_url_extraction.py <url>")
+        print("       python test_url_extraction.py --local")
         sys.exit(1)
     
+    if sys.argv[1] == "--local":
+        sys.exit(0 if test_local_server() else 1)
+    
     url = sys.argv[1]
     test_url_extraction(url)
\ No newline at end of file
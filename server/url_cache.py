@@ -0,0 +1,178 @@
+import os
+import json
+import time
+import logging
+import sqlite3
+import threading
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# SQLite file for the article cache; set to an empty string to disable caching
+DEFAULT_DB_PATH = os.environ.get(
+    "ARTICLE_CACHE_DB",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "article_cache.db")
+)
+# Entries younger than this are served without touching the network
+FRESH_SECONDS = float(os.environ.get("ARTICLE_CACHE_FRESH_SECONDS", "300"))
+# Entries older than this are refetched without revalidation
+MAX_AGE_SECONDS = float(os.environ.get("ARTICLE_CACHE_MAX_AGE_SECONDS", "86400"))
+
+# Query parameters that never change the page content
+TRACKING_PARAMS = {"fbclid", "gclid", "dclid", "msclkid", "mc_cid", "mc_eid", "ref", "cmpid"}
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+
+def canonicalize_url(url):
+    """
+    Normalize a URL so equivalent spellings share a cache entry
+
+    Lowercases the scheme and host, drops default ports, fragments and
+    tracking parameters, and sorts the remaining query parameters.
+
+    Args:
+        url (str): URL to normalize
+
+    Returns:
+        str: Canonical form of the URL
+    """
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    if parts.port and parts.port != DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{parts.port}"
+    query = [(k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+             if not k.lower().startswith("utm_") and k.lower() not in TRACKING_PARAMS]
+    query.sort()
+    return urlunsplit((scheme, host, parts.path or "/", urlencode(query), ""))
+
+
+class ArticleCache:
+    """
+    Persistent cache of extracted articles along with the HTTP validators
+    (ETag / Last-Modified) needed to revalidate them.
+
+    Args:
+        db_path (str): SQLite file holding the cache
+        fresh_seconds (float): Age below which an entry is used without revalidation
+        max_age_seconds (float): Age above which an entry is ignored
+    """
+
+    def __init__(self, db_path=DEFAULT_DB_PATH, fresh_seconds=FRESH_SECONDS, max_age_seconds=MAX_AGE_SECONDS):
+        self.db_path = db_path
+        self.fresh_seconds = fresh_seconds
+        self.max_age_seconds = max_age_seconds
+        self._lock = threading.Lock()
+        self._stats = {"fresh_hits": 0, "revalidated": 0, "misses": 0, "stores": 0}
+        self._db = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS article_cache ("
+            "url TEXT PRIMARY KEY, article TEXT NOT NULL, etag TEXT, last_modified TEXT, fetched_at REAL NOT NULL)"
+        )
+
+    def get(self, url):
+        """
+        Look up a cached article
+
+        Args:
+            url (str): Canonical URL
+
+        Returns:
+            dict: article, etag, last_modified, fetched_at and whether it is fresh,
+                or None if there is no usable entry
+        """
+        with self._lock:
+            row = self._db.execute(
+                "SELECT article, etag, last_modified, fetched_at FROM article_cache WHERE url = ?", (url,)
+            ).fetchone()
+        if row is None:
+            return None
+
+        age = time.time() - row[3]
+        if age > self.max_age_seconds:
+            return None
+        return {
+            "article": json.loads(row[0]),
+            "etag": row[1],
+            "last_modified": row[2],
+            "fetched_at": row[3],
+            "fresh": age <= self.fresh_seconds,
+        }
+
+    def set(self, url, article, etag=None, last_modified=None):
+        """
+        Store an extracted article
+
+        Args:
+            url (str): Canonical URL
+            article (dict): Extraction result
+            etag (str): ETag response header, if any
+            last_modified (str): Last-Modified response header, if any
+        """
+        with self._lock:
+            self._stats["stores"] += 1
+            self._db.execute(
+                "INSERT OR REPLACE INTO article_cache (url, article, etag, last_modified, fetched_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (url, json.dumps(article), etag, last_modified, time.time())
+            )
+
+    def touch(self, url):
+        """Mark an entry as just revalidated"""
+        with self._lock:
+            self._db.execute("UPDATE article_cache SET fetched_at = ? WHERE url = ?", (time.time(), url))
+
+    def record(self, outcome):
+        """Count a lookup outcome ('fresh_hits', 'revalidated' or 'misses')"""
+        with self._lock:
+            self._stats[outcome] += 1
+
+    def get_stats(self):
+        """Return lookup counters"""
+        with self._lock:
+            return dict(self._stats)
+
+
+def conditional_headers(entry):
+    """
+    Build the conditional GET headers for a cached entry
+
+    Args:
+        entry (dict): Result of ArticleCache.get
+
+    Returns:
+        dict: If-None-Match / If-Modified-Since headers
+    """
+    headers = {}
+    if entry.get("etag"):
+        headers["If-None-Match"] = entry["etag"]
+    if entry.get("last_modified"):
+        headers["If-Modified-Since"] = entry["last_modified"]
+    return headers
+
+
+_article_cache = None
+_article_cache_lock = threading.Lock()
+
+
+def get_article_cache():
+    """
+    Return the shared article cache, or None if caching is disabled
+
+    Returns:
+        ArticleCache: The cache instance
+    """
+    global _article_cache
+    if not DEFAULT_DB_PATH:
+        return None
+    with _article_cache_lock:
+        if _article_cache is None:
+            try:
+                _article_cache = ArticleCache()
+            except sqlite3.Error as e:
+                logger.error(f"Error opening article cache {DEFAULT_DB_PATH}: {str(e)}")
+                return None
+        return _article_cache
@@ -1,5 +1,8 @@
 import logging
-import requests
+from fetcher import fetch_url, decode_html
+from url_cache import get_article_cache, canonicalize_url, conditional_headers
+import time
+from metrics import span, EXTRACTION_DURATION
 try:
     from bs4 import BeautifulSoup
 except ImportError:
@@ -7,127 +10,346 @@ except ImportError:
     print("Warning: BeautifulSoup (bs4) not available")
     BeautifulSoup = None
 
+try:
+    # C-backed parser for the fast extraction path
+    from lxml import etree, html as lxml_html
+except ImportError:
+    lxml_html = None
+
 try:
     from newspaper import Article
 except ImportError:
     # Fallback for newspaper
     print("Warning: newspaper3k not available")
     Article = None
+import os
 import re
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# BeautifulSoup fallback mode: 'fast' (single tree walk) or 'legacy'
+SOUP_EXTRACTOR_MODE = os.environ.get("SOUP_EXTRACTOR_MODE", "fast")
+
+SKIPPED_TAGS = {'script', 'style', 'header', 'footer', 'nav'}
+PARAGRAPH_TAGS = {'p', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6'}
+CONTAINER_PATTERN = re.compile("(content|article|post|entry)")
+WHITESPACE_PATTERN = re.compile(r'\s+')
+# Containers with less text than this are not considered article content
+MIN_CONTAINER_TEXT = 300
+# Containers where links make up more than this share of the text are navigation, not content
+MAX_LINK_DENSITY = 0.5
+
 def extract_article_from_url(url):
     """
     Extract article content from a URL using newspaper3k with fallback to BeautifulSoup
     
+    Recently extracted pages are served from the article cache; older cached
+    pages are revalidated with a conditional GET and reused on a 304.
+    
     Args:
         url (str): URL of the article
         
     Returns:
         dict: Dictionary with title, text, and metadata of the article
     """
+    started = time.perf_counter()
+    method = "failed"
     try:
         logger.info(f"Extracting article from URL: {url}")
         
-        # Method 1: Try using newspaper3k (best for news articles)
-        try:
-            article = Article(url)
-            article.download()
-            article.parse()
-            
-            # If article text is too short, it probably failed to extract properly
-            if len(article.text) < 100 and not article.title:
-                logger.warning("Newspaper3k extraction yielded insufficient content, trying BeautifulSoup")
-                raise Exception("Insufficient content extracted")
-            
-            return {
-                "title": article.title,
-                "text": article.text,
-                "authors": article.authors,
-                "publish_date": article.publish_date.isoformat() if article.publish_date else None,
-                "top_image": article.top_image,
-                "success": True,
-                "method": "newspaper3k"
-            }
-        
-        except Exception as e:
-            logger.warning(f"Newspaper3k extraction failed: {str(e)}")
-            # Fall back to BeautifulSoup
-        
-        # Method 2: BeautifulSoup extraction
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        }
+        with span("article_cache"):
+            cache = get_article_cache()
+            cache_key = canonicalize_url(url)
+            entry = cache.get(cache_key) if cache else None
+        
+        # Serve recently fetched pages without touching the network
+        if entry and entry["fresh"]:
+            cache.record("fresh_hits")
+            method = "cache"
+            return entry["article"]
+        
+        # Download the page once (revalidating any cached copy); both extractors work from the same bytes
+        with span("fetch"):
+            page = fetch_url(url, headers=conditional_headers(entry) if entry else None)
         
-        response = requests.get(url, headers=headers, timeout=10)
-        if response.status_code != 200:
-            raise Exception(f"Failed to fetch URL, status code: {response.status_code}")
+        if page["status"] == 304 and entry:
+            logger.info("Page not modified, using cached article")
+            cache.touch(cache_key)
+            cache.record("revalidated")
+            method = "revalidated"
+            return entry["article"]
         
-        soup = BeautifulSoup(response.content, 'html.parser')
+        article_data = parse_article(url, page)
+        method = article_data.get("method", "unknown")
         
-        # Get title
-        title = soup.title.text.strip() if soup.title else ""
+        if cache:
+            cache.record("misses")
+            cache.set(cache_key, article_data,
+                      etag=page["headers"].get('ETag'),
+                      last_modified=page["headers"].get('Last-Modified'))
+        return article_data
+    
+    except Exception as e:
+        logger.error(f"Failed to extract article from URL: {str(e)}")
+        return {
+            "success": False,
+            "error": str(e)
+        }
+    
+    finally:
+        EXTRACTION_DURATION.observe(time.perf_counter() - started, method=method)
+
+def parse_article(url, page):
+    """
+    Parse a downloaded page using newspaper3k with fallback to BeautifulSoup
+    
+    Args:
+        url (str): URL of the article
+        page (dict): Downloaded page from fetch_url
         
-        # Extract text content
-        # Remove script and style elements
-        for script_or_style in soup(['script', 'style', 'header', 'footer', 'nav']):
-            script_or_style.extract()
+    Returns:
+        dict: Dictionary with title, text, and metadata of the article
+    """
+    # Method 1: Try using newspaper3k (best for news articles)
+    try:
+        if Article is None:
+            raise Exception("newspaper3k not available")
         
-        # Find the main content
-        main_content = None
+        with span("parse_newspaper"):
+            article = Article(url)
+            article.download(input_html=decode_html(page))
+            article.parse()
         
-        # Common content containers
-        potential_content_elements = [
-            soup.find('article'),
-            soup.find('main'),
-            soup.find(attrs={"role": "main"}),
-            soup.find(class_=re.compile("(content|article|post|entry)")),
-            soup.find(id=re.compile("(content|article|post|entry)"))
-        ]
+        # If article text is too short, it probably failed to extract properly
+        if len(article.text) < 100 and not article.title:
+            logger.warning("Newspaper3k extraction yielded insufficient content, trying BeautifulSoup")
+            raise Exception("Insufficient content extracted")
         
-        # Use first valid content container
-        for element in potential_content_elements:
-            if element and len(element.get_text(strip=True)) > 300:
-                main_content = element
-                break
+        return {
+            "title": article.title,
+            "text": article.text,
+            "authors": article.authors,
+            "publish_date": article.publish_date.isoformat() if article.publish_date else None,
+            "top_image": article.top_image,
+            "success": True,
+            "method": "newspaper3k"
+        }
+    
+    except Exception as e:
+        logger.warning(f"Newspaper3k extraction failed: {str(e)}")
+        # Fall back to BeautifulSoup
+    
+    # Method 2: BeautifulSoup extraction
+    with span("parse_soup"):
+        return extract_with_soup(page["content"])
+
+def extract_with_soup(content, mode=None):
+    """
+    Extract article text from raw HTML with BeautifulSoup
+    
+    Args:
+        content (bytes): Raw HTML
+        mode (str): 'fast' (single walk over an lxml tree, used when lxml is installed) or 'legacy';
+            defaults to SOUP_EXTRACTOR_MODE
         
-        # If no main content found, fall back to the body
-        if not main_content:
-            logger.warning("No specific content container found, using body")
-            main_content = soup.body
+    Returns:
+        dict: Dictionary with title and text of the article
+    """
+    # The fast path needs lxml's C parser; without it the original path is quicker
+    if (mode or SOUP_EXTRACTOR_MODE) == "fast" and lxml_html is not None:
+        return _extract_with_soup_fast(content)
+    
+    if BeautifulSoup is None:
+        raise Exception("BeautifulSoup (bs4) not available")
+    return _extract_with_soup_legacy(content)
+
+def _extract_with_soup_fast(content):
+    """
+    Streamlined extraction using lxml
+    
+    Walks the parsed tree once, collecting per-node text and link-text lengths
+    plus paragraph texts. Candidate containers are scored by text density,
+    and the output is built from the collected texts without re-walking any
+    subtree.
+    """
+    collector = _ArticleTextCollector()
+    
+    try:
+        root = lxml_html.document_fromstring(content)
+    except (etree.ParserError, ValueError):
+        raise Exception("Could not locate article content")
+    title_element = root.find('.//title')
+    title = title_element.text_content().strip() if title_element is not None else ""
+    
+    stack = [(root, False)]
+    while stack:
+        element, closing = stack.pop()
+        if closing:
+            collector.end()
+        elif isinstance(element.tag, str) and element.tag not in SKIPPED_TAGS:
+            collector.start(element.tag, element.attrib)
+            if element.text:
+                collector.text(element.text)
+            stack.append((element, True))
+            stack.extend((child, False) for child in reversed(element))
+            continue
+        # Text following an element (or a skipped element/comment) belongs to its parent
+        if element.tail and element is not root:
+            collector.text(element.tail)
+    
+    return {
+        "title": title,
+        "text": collector.article_text(),
+        "success": True,
+        "method": "beautifulsoup"
+    }
+
+class _ArticleTextCollector:
+    """
+    Receives a document as start/text/end events and keeps just enough per node
+    (text length, link-text length, paragraph and text ranges) to pick the
+    content container and build its text afterwards
+    """
+    
+    def __init__(self):
+        self.strings = []      # text fragments in document order
+        self.paragraphs = []   # paragraph texts in document order (None until closed)
+        self.candidates = []   # (score, order, paragraph range, string range)
+        self.body = None       # (paragraph range, string range) of <body>
+        # Open elements: [name, text_len, link_len, first_paragraph, first_string, slot, is_candidate]
+        self._frames = []
+    
+    def start(self, name, attrs):
+        slot = None
+        if name in PARAGRAPH_TAGS:
+            slot = len(self.paragraphs)
+            self.paragraphs.append(None)
+        self._frames.append([name, 0, 0, len(self.paragraphs) if slot is None else slot,
+                             len(self.strings), slot, _is_content_container(name, attrs)])
+    
+    def text(self, value):
+        self.strings.append(value)
+        if self._frames:
+            self._frames[-1][1] += len(value.strip())
+    
+    def end(self):
+        name, text_len, link_len, first_paragraph, first_string, slot, is_candidate = self._frames.pop()
+        if name == 'a':
+            link_len = text_len
+        if slot is not None:
+            self.paragraphs[slot] = ''.join(self.strings[first_string:]).strip()
+        ranges = ((first_paragraph, len(self.paragraphs)), (first_string, len(self.strings)))
+        
+        # Score containers by how much of their text is not link text
+        if is_candidate and text_len > MIN_CONTAINER_TEXT and link_len <= MAX_LINK_DENSITY * text_len:
+            non_link = text_len - link_len
+            self.candidates.append((non_link * non_link / text_len, -len(self.candidates)) + ranges)
+        if name == 'body' and self.body is None:
+            self.body = ranges
         
-        if not main_content:
+        if self._frames:
+            self._frames[-1][1] += text_len
+            self._frames[-1][2] += link_len
+    
+    def article_text(self):
+        """Build the article text from the best container (or the body)"""
+        # Use the densest content container, falling back to the body
+        if self.candidates:
+            paragraph_range, string_range = max(self.candidates)[2:]
+        elif self.body:
+            logger.warning("No specific content container found, using body")
+            paragraph_range, string_range = self.body
+        else:
             raise Exception("Could not locate article content")
         
         # Extract paragraphs
-        paragraphs = main_content.find_all(['p', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6'])
-        text = "\n\n".join([p.get_text().strip() for p in paragraphs if len(p.get_text().strip()) > 20])
+        paragraphs = self.paragraphs[paragraph_range[0]:paragraph_range[1]]
+        text = ' '.join(p for p in paragraphs if p and len(p) > 20)
         
         # If we still don't have enough text, get all text
         if len(text) < 200:
             logger.warning("Paragraph extraction yielded insufficient content, using all text")
-            text = main_content.get_text(separator='\n\n')
-        
-        # Clean up the text
-        text = re.sub(r'\n+', '\n\n', text)  # Replace multiple newlines with double newlines
-        text = re.sub(r'\s+', ' ', text)     # Replace multiple spaces with single space
+            text = ' '.join(self.strings[string_range[0]:string_range[1]])
         
-        return {
-            "title": title,
-            "text": text,
-            "success": True,
-            "method": "beautifulsoup"
-        }
+        # Collapse whitespace in a single pass
+        return WHITESPACE_PATTERN.sub(' ', text)
+
+def _is_content_container(name, attrs):
+    """Whether an element looks like a main content container"""
+    if name in ('article', 'main'):
+        return True
+    if not attrs:
+        return False
+    if attrs.get('role') == 'main':
+        return True
+    classes = attrs.get('class')
+    if classes:
+        if isinstance(classes, str):
+            classes = classes.split()
+        if any(CONTAINER_PATTERN.search(c) for c in classes):
+            return True
+    element_id = attrs.get('id')
+    return bool(element_id and CONTAINER_PATTERN.search(element_id))
+
+def _extract_with_soup_legacy(content):
+    """Original BeautifulSoup extraction using html.parser and repeated get_text calls"""
+    soup = BeautifulSoup(content, 'html.parser')
     
-    except Exception as e:
-        logger.error(f"Failed to extract article from URL: {str(e)}")
-        return {
-            "success": False,
-            "error": str(e)
-        }
+    # Get title
+    title = soup.title.text.strip() if soup.title else ""
+    
+    # Extract text content
+    # Remove script and style elements
+    for script_or_style in soup(['script', 'style', 'header', 'footer', 'nav']):
+        script_or_style.extract()
+    
+    # Find the main content
+    main_content = None
+    
+    # Common content containers
+    potential_content_elements = [
+        soup.find('article'),
+        soup.find('main'),
+        soup.find(attrs={"role": "main"}),
+        soup.find(class_=re.compile("(content|article|post|entry)")),
+        soup.find(id=re.compile("(content|article|post|entry)"))
+    ]
+    
+    # Use first valid content container
+    for element in potential_content_elements:
+        if element and len(element.get_text(strip=True)) > 300:
+            main_content = element
+            break
+    
+    # If no main content found, fall back to the body
+    if not main_content:
+        logger.warning("No specific content container found, using body")
+        main_content = soup.body
+    
+    if not main_content:
+        raise Exception("Could not locate article content")
+    
+    # Extract paragraphs
+    paragraphs = main_content.find_all(['p', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6'])
+    text = "\n\n".join([p.get_text().strip() for p in paragraphs if len(p.get_text().strip()) > 20])
+    
+    # If we still don't have enough text, get all text
+    if len(text) < 200:
+        logger.warning("Paragraph extraction yielded insufficient content, using all text")
+        text = main_content.get_text(separator='\n\n')
+    
+    # Clean up the text
+    text = re.sub(r'\n+', '\n\n', text)  # Replace multiple newlines with double newlines
+    text = re.sub(r'\s+', ' ', text)     # Replace multiple spaces with single space
+    
+    return {
+        "title": title,
+        "text": text,
+        "success": True,
+        "method": "beautifulsoup"
+    }
 
 def is_valid_url(url):
     """